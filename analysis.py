@@ -0,0 +1,151 @@
+from nodes import *
+
+# Queries over statements and expressions of the AST shared by the optimization passes.
+
+ARITHMETIC = ("+", "-", "*", "/")
+
+# Number of statements writing each variable, at any depth.
+def writes(statements: list) -> dict:
+    counts = {}
+    for statement in statements:
+        kind = type(statement)
+        if kind in (Assign, Declare, Input, ArrayDeclare, AssignIndex, AssignArray, For):
+            counts[statement.name] = counts.get(statement.name, 0) + 1
+        if kind in (If, While, For):
+            for name, count in writes(statement.body).items():
+                counts[name] = counts.get(name, 0) + count
+    return counts
+
+# Variables an expression reads.
+def variables(node: Node) -> set:
+    kind = type(node)
+    if kind is Variable:
+        return {node.name}
+    if kind is UnaryOp:
+        return variables(node.operand)
+    if kind is BinaryOp:
+        return variables(node.left) | variables(node.right)
+    if kind is Index:
+        return {node.name} | variables(node.index)
+    if kind is Reduce:
+        return {node.name}
+    return set()
+
+# Whether any of the statements reads input, at any depth.
+def hasInput(statements: list) -> bool:
+    for statement in statements:
+        kind = type(statement)
+        if kind is Input:
+            return True
+        if kind in (If, While, For) and hasInput(statement.body):
+            return True
+    return False
+
+# Variables the statements read, at any depth.
+def reads(statements: list) -> set:
+    names = set()
+    for statement in statements:
+        kind = type(statement)
+        if kind is Print:
+            if statement.format == "str":
+                names.add(statement.value)
+            elif statement.format != "string":
+                names |= variables(statement.value)
+        elif kind in (Assign, AssignArray) or (kind is Declare and statement.varType != "str"):
+            names |= variables(statement.value)
+        elif kind is AssignIndex:
+            names |= variables(statement.index) | variables(statement.value)
+        elif kind in (If, While):
+            names |= variables(statement.condition) | reads(statement.body)
+        elif kind is For:
+            names |= variables(statement.start) | variables(statement.end) | reads(statement.body)
+    return names
+
+# Apply replace to every expression in the statements, at any depth.
+def rewrite(statements: list, replace) -> None:
+    for statement in statements:
+        kind = type(statement)
+        if kind is Print:
+            if statement.format not in ("string", "str"):
+                statement.value = replace(statement.value)
+        elif kind in (Assign, AssignArray) or (kind is Declare and statement.varType != "str"):
+            statement.value = replace(statement.value)
+        elif kind is AssignIndex:
+            statement.index = replace(statement.index)
+            statement.value = replace(statement.value)
+        elif kind in (If, While):
+            statement.condition = replace(statement.condition)
+            rewrite(statement.body, replace)
+        elif kind is For:
+            statement.start = replace(statement.start)
+            statement.end = replace(statement.end)
+            rewrite(statement.body, replace)
+
+# C type of an expression: float literals are doubles, so a temporary holding one must be a double
+# to give the same result.
+def cType(node: Node) -> str:
+    kind = type(node)
+    if kind is Number:
+        return "double" if node.isFloat else "int"
+    if kind is Variable:
+        return node.varType
+    if kind is Bool:
+        return "bool"
+    if kind is Index or kind is Reduce:
+        return "int"
+    if kind is UnaryOp:
+        operandType = cType(node.operand)
+        return "int" if operandType == "bool" else operandType
+    if node.op not in ARITHMETIC:
+        return "int"
+    types = (cType(node.left), cType(node.right))
+    for widest in ("double", "float"):
+        if widest in types:
+            return widest
+    return "int"
+
+# Whether evaluating an expression can stop the program: int division by anything but a constant
+# other than 0 and -1 (INT_MIN / -1 traps too), and array indexing, which the VM checks.
+def mayTrap(node: Node) -> bool:
+    kind = type(node)
+    if kind is Index:
+        return True
+    if kind is UnaryOp:
+        return mayTrap(node.operand)
+    if kind is not BinaryOp:
+        return False
+    if node.op == "/" and cType(node) == "int":
+        divisor = node.right
+        if type(divisor) is not Number or int(divisor.text) in (0, -1):
+            return True
+    return mayTrap(node.left) or mayTrap(node.right)
+
+# The element expression of an AssignArray value and the scalar subexpressions it uses. Arrays in
+# the value become Index nodes at variable counter, and every scalar part other than a literal or
+# a variable becomes Variable(prefix + k) for the k-th of scalars, to be evaluated before the loop.
+def elementwise(value: Node, counter: str, prefix: str):
+    scalars = []
+
+    def split(node: Node) -> Node:
+        kind = type(node)
+        if kind is Variable and node.varType == "int[]":
+            return Index(node.name, Variable(counter, "int"))
+        if kind in (Number, Bool, Variable):
+            return node
+        if not any(type(part) is Variable and part.varType == "int[]" for part in operands(node)):
+            scalars.append(node)
+            return Variable(prefix + str(len(scalars) - 1), "int")
+        if kind is UnaryOp:
+            return UnaryOp(node.op, split(node.operand))
+        return BinaryOp(node.op, split(node.left), split(node.right))
+
+    return split(value), scalars
+
+# The leaves of an arithmetic expression.
+def operands(node: Node) -> list:
+    kind = type(node)
+    if kind is UnaryOp:
+        return operands(node.operand)
+    if kind is BinaryOp:
+        return operands(node.left) + operands(node.right)
+    return [node]
@@ -0,0 +1,67 @@
+import functools
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from compiler import *
+
+# Expand the command line inputs into .pog files: directories are searched recursively,
+# anything with glob characters is expanded, and everything else is taken as a file.
+def findSources(inputs: list) -> list:
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, "**", "*.pog"), recursive=True)))
+        elif glob.has_magic(item):
+            paths.extend(sorted(glob.glob(item, recursive=True)))
+        else:
+            paths.append(item)
+
+    # The same file given twice is only compiled once.
+    seen = set()
+    unique = []
+    for path in paths:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+# Compile every path into outDir across a pool of worker processes. Each file's abort is
+# caught in its worker, so one bad program only fails its own result.
+def compileBatch(paths: list, outDir: str, options: CompileOptions, jobs: int = None, cache=None) -> list:
+    os.makedirs(outDir, exist_ok=True)
+    results = []
+
+    # Two sources with the same file name would overwrite each other's C file.
+    owners = {}
+    todo = []
+    for path in paths:
+        outPath = outputPath(path, outDir)
+        if outPath in owners:
+            results.append(CompileResult(path, outPath, "Output " + outPath + " is already written by " + owners[outPath]))
+        else:
+            owners[outPath] = path
+            todo.append(path)
+
+    worker = functools.partial(compileFile, outDir=outDir, options=options, cache=cache)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(todo) <= 1:
+        results.extend(map(worker, todo))
+    else:
+        # Hand out files in chunks so thousands of small programs don't pay one round trip each.
+        chunksize = max(1, len(todo) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results.extend(executor.map(worker, todo, chunksize=chunksize))
+    return results
+
+# Print one line per file and a total. Returns the number of failed files.
+def printSummary(results: list) -> int:
+    failed = 0
+    for result in results:
+        if result.error is None:
+            print("ok    %s -> %s (%.3fs%s)" % (result.path, result.outPath, result.seconds, ", cached" if result.cached else ""))
+        else:
+            failed += 1
+            print("FAIL  %s: %s" % (result.path, result.error))
+    print("%d compiled, %d failed" % (len(results) - failed, failed))
+    return failed
@@ -0,0 +1,129 @@
+# Runtime of whole-array operations on int[] against the same work written as element-by-element
+# ONLY IN OHIO loops, both built at -O2. Each operation runs once per pass over arrays of the
+# given size; the setup that fills the arrays is the same for both.
+# Usage: python benchmarks/array_bench.py [elements] [passes]
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from compiler import CompileOptions, compileSource
+from build import findCompiler
+
+SETUP = """ON GYATT a [%(elements)d] IS []
+ON GYATT b [%(elements)d] IS []
+ON GYATT c [%(elements)d] IS []
+ON GYATT i IS 0
+ONLY IN OHIO i < %(elements)d
+    a[i] IS i - i / 97 * 97 - 48
+    b[i] IS i - i / 13 * 13
+    i IS i + 1
+SUSSY
+ON GYATT total IS 0
+ON GYATT pass IS 0
+ONLY IN OHIO pass < %(passes)d
+"""
+
+FINISH = """    pass IS pass + 1
+SUSSY
+RIZZ total
+RIZZ c[%(last)d]
+"""
+
+# Operation -> (bulk form, element-by-element form), both indented into the pass loop.
+OPERATIONS = {
+    "fill": ("""    c IS pass
+""", """    i IS 0
+    ONLY IN OHIO i < %(elements)d
+        c[i] IS pass
+        i IS i + 1
+    SUSSY
+"""),
+    "copy": ("""    a[0] IS pass
+    c IS a
+""", """    a[0] IS pass
+    i IS 0
+    ONLY IN OHIO i < %(elements)d
+        c[i] IS a[i]
+        i IS i + 1
+    SUSSY
+"""),
+    "c=a*3+b-k": ("""    c IS a * 3 + b - pass
+""", """    i IS 0
+    ONLY IN OHIO i < %(elements)d
+        c[i] IS a[i] * 3 + b[i] - pass
+        i IS i + 1
+    SUSSY
+"""),
+    "sum": ("""    a[0] IS pass
+    total IS total + SUM a
+""", """    a[0] IS pass
+    i IS 0
+    ONLY IN OHIO i < %(elements)d
+        total IS total + a[i]
+        i IS i + 1
+    SUSSY
+"""),
+    "min": ("""    a[0] IS 0 - pass
+    total IS total + MIN a
+""", """    a[0] IS 0 - pass
+    ON GYATT least IS a[0]
+    i IS 1
+    ONLY IN OHIO i < %(elements)d
+        IS a[i] < least CHAT
+            least IS a[i]
+        THANKS CHAT
+        i IS i + 1
+    SUSSY
+    total IS total + least
+"""),
+    "max": ("""    a[0] IS pass
+    total IS total + MAX a
+""", """    a[0] IS pass
+    ON GYATT most IS a[0]
+    i IS 1
+    ONLY IN OHIO i < %(elements)d
+        IS a[i] > most CHAT
+            most IS a[i]
+        THANKS CHAT
+        i IS i + 1
+    SUSSY
+    total IS total + most
+"""),
+}
+
+def measure(workDir, source, repeat=5):
+    cPath = os.path.join(workDir, "program.c")
+    binary = os.path.join(workDir, "program")
+    compileSource(source, cPath, CompileOptions())
+    subprocess.run(findCompiler() + ["-O2", "-o", binary, cPath], check=True)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([binary], stdout=subprocess.PIPE, check=True).stdout
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+def main():
+    elements = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    passes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    sizes = {"elements": elements, "passes": passes, "last": elements - 1}
+    print("%d elements, %d passes, -O2" % (elements, passes))
+    print("%-10s %10s %10s %9s" % ("operation", "loop", "bulk", "speedup"))
+    with tempfile.TemporaryDirectory() as workDir:
+        empty, _ = measure(workDir, (SETUP + FINISH) % sizes)
+        for name, (bulk, loop) in OPERATIONS.items():
+            looped, expected = measure(workDir, (SETUP + loop + FINISH) % sizes)
+            whole, output = measure(workDir, (SETUP + bulk + FINISH) % sizes)
+            # The setup is the same for both, so it is taken out of both times.
+            looped, whole = looped - empty, whole - empty
+            print("%-10s %9.3fs %9.3fs %8.2fx" % (name, looped, whole, looped / whole))
+            if output != expected:
+                print("%-10s OUTPUT DIFFERS" % name)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Measures memory per AST node on a large synthetic program, with the slotted node classes
+# and with plain __dict__ classes holding the same fields for comparison.
+# Usage: python benchmarks/ast_memory.py [statements]
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import nodes
+from fastlexer import FastLexer
+from parse import Parser
+from corpus import generateProgram
+
+def children(node):
+    for name in node.__slots__:
+        value = getattr(node, name)
+        if isinstance(value, nodes.Node):
+            yield value
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, nodes.Node):
+                    yield item
+
+def countNodes(root):
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(children(node))
+    return count
+
+# Plain classes with the same fields as the slotted ones, used by the comparison run.
+def dictClasses():
+    classes = {}
+    for name in dir(nodes):
+        cls = getattr(nodes, name)
+        if isinstance(cls, type) and issubclass(cls, nodes.Node) and cls is not nodes.Node:
+            def init(self, *args, _fields=cls.__slots__):
+                for field, value in zip(_fields, args):
+                    setattr(self, field, value)
+            classes[name] = type(name, (), {"__init__": init})
+    return classes
+
+def measure(source):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tree = Parser(FastLexer(source)).program()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return tree, retained
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    source = generateProgram(statements)
+
+    tree, slotted = measure(source)
+    count = countNodes(tree)
+    del tree
+
+    # Rebind the node classes the parser uses to the __dict__ versions and parse again.
+    import parse
+    originals = {name: getattr(parse, name) for name in dictClasses()}
+    for name, cls in dictClasses().items():
+        setattr(parse, name, cls)
+    try:
+        tree, plain = measure(source)
+    finally:
+        for name, cls in originals.items():
+            setattr(parse, name, cls)
+    del tree
+
+    print("Program: " + str(statements) + " statements, " + str(count) + " nodes")
+    print("__slots__ nodes: %.2f MB retained, %.1f bytes/node" % (slotted / 1e6, slotted / count))
+    print("__dict__ nodes:  %.2f MB retained, %.1f bytes/node" % (plain / 1e6, plain / count))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# Generates large synthetic .pog programs for the benchmarks.
+import random
+
+def generateProgram(statements: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    ints = ["a", "b", "c"]
+    floats = ["f", "g"]
+    lines = ["# synthetic benchmark program",
+             "ON GYATT a IS 0",
+             "ON GYATT b IS 1",
+             "ON GYATT c IS 2",
+             "ON GYATT f IS 1.5",
+             "ON GYATT g IS 0.25",
+             "ON GYATT arr [4] IS [1, 2, 3, 4]"]
+
+    def operand(names):
+        if rng.random() < 0.5:
+            return rng.choice(names)
+        return str(rng.randint(1, 99))
+
+    def expression(names):
+        parts = [operand(names)]
+        for _ in range(rng.randint(0, 4)):
+            parts.append(rng.choice("+-*/"))
+            parts.append(operand(names))
+        return " ".join(parts)
+
+    emitted = 0
+    while emitted < statements:
+        choice = rng.random()
+        if choice < 0.3:
+            lines.append(rng.choice(ints) + " IS " + expression(ints))
+        elif choice < 0.45:
+            lines.append("ON GYATT " + rng.choice(floats) + " IS " + expression(floats) + " + 0.5")
+        elif choice < 0.6:
+            lines.append("RIZZ " + expression(ints))
+        elif choice < 0.7:
+            lines.append("RIZZ \"line " + str(emitted) + " of the program\"")
+        elif choice < 0.85:
+            lines.append("IS " + expression(ints) + " > " + expression(ints) + " CHAT   # branch")
+            lines.append("    " + rng.choice(ints) + " IS " + expression(ints))
+            lines.append("THANKS CHAT")
+        else:
+            lines.append("ONLY IN OHIO a < " + str(rng.randint(1, 9)))
+            lines.append("    a IS a + 1")
+            lines.append("    RIZZ a")
+            lines.append("SUSSY")
+        emitted += 1
+
+    return "\n".join(lines) + "\n"
+
+# Generates programs that use every kind of statement Parser.statement accepts: RIZZ of literals,
+# expressions and str variables, assignments to scalars, array elements and whole arrays,
+# IS ... CHAT, ONLY IN OHIO, SQUAD, ON GYATT of every type and SKIBIDI, nested up to depth blocks
+# deep. Every loop runs at most trips times, so a program always terminates, and every index is
+# inside its array. Divisions are by nonzero literals only. Ints may overflow, which wraps.
+# statements counts statements at any depth, not lines.
+def generateMixed(statements: int, depth: int = 3, seed: int = 0, trips: int = 4) -> str:
+    rng = random.Random(seed)
+    ints = ["i0", "i1", "i2", "i3"]
+    floats = ["f0", "f1"]
+    arrays = ["arr0", "arr1"]
+    size = 16
+    trips = min(trips, size)
+    lines = ["# synthetic benchmark program: every statement kind, nested " + str(depth) + " deep",
+             "ON GYATT i0 IS 0",
+             "ON GYATT i1 IS 1",
+             "ON GYATT i2 IS 2",
+             "ON GYATT i3 IS 3",
+             "ON GYATT f0 IS 0.5",
+             "ON GYATT f1 IS 2.25",
+             "ON GYATT b0 IS BASED",
+             "ON GYATT s0 IS \"start\"",
+             "ON GYATT arr0 [" + str(size) + "] IS [3, 1, 4, 1, 5, 9, 2, 6]",
+             "ON GYATT arr1 [" + str(size) + "] IS []"]
+    lines += ["ON GYATT k" + str(level) + " IS 0" for level in range(depth)]
+    emitted = [0]
+
+    # Loop variables usable as indexes at the current depth: every one is below trips.
+    def index(counters):
+        if counters and rng.random() < 0.6:
+            return rng.choice(counters)
+        return str(rng.randrange(size))
+
+    def operand(counters):
+        choice = rng.random()
+        if choice < 0.4:
+            return rng.choice(ints + counters)
+        if choice < 0.6:
+            return str(rng.randint(0, 99))
+        if choice < 0.8:
+            return rng.choice(arrays) + "[" + index(counters) + "]"
+        if choice < 0.9:
+            return rng.choice(["SUM", "MIN", "MAX"]) + " " + rng.choice(arrays)
+        return "-" + rng.choice(ints)
+
+    def intExpression(counters):
+        parts = [operand(counters)]
+        for _ in range(rng.randint(0, 3)):
+            if rng.random() < 0.2:
+                parts.append("/ " + str(rng.randint(1, 9)))
+            else:
+                parts.append(rng.choice("+-*") + " " + operand(counters))
+        return " ".join(parts)
+
+    def floatExpression(counters):
+        parts = [rng.choice(floats + ["1.5", "0.25"])]
+        for _ in range(rng.randint(0, 3)):
+            parts.append(rng.choice("+-*") + " " + rng.choice(floats + [operand(counters), "0.75"]))
+        return " ".join(parts)
+
+    def condition(counters):
+        return intExpression(counters) + " " + rng.choice(["<", "<=", ">", ">=", "==", "!="]) + " " + intExpression(counters)
+
+    def block(level, counters, indent, count):
+        for _ in range(count):
+            if emitted[0] >= statements:
+                return
+            statement(level, counters, indent)
+
+    def statement(level, counters, indent):
+        emitted[0] += 1
+        choice = rng.random()
+        if level >= depth:
+            choice *= 0.58      # only statements without a body
+        if choice < 0.15:
+            lines.append(indent + rng.choice(ints) + " IS " + intExpression(counters))
+        elif choice < 0.22:
+            lines.append(indent + rng.choice(floats) + " IS " + floatExpression(counters))
+        elif choice < 0.3:
+            lines.append(indent + rng.choice(arrays) + "[" + index(counters) + "] IS " + intExpression(counters))
+        elif choice < 0.34:
+            target, source = rng.sample(arrays, 2)
+            lines.append(indent + target + " IS " + rng.choice([source + " * 2 - " + target, target + " + " + rng.choice(ints), rng.choice(ints)]))
+        elif choice < 0.42:
+            lines.append(indent + "RIZZ " + rng.choice([intExpression(counters), floatExpression(counters), "b0", "s0"]))
+        elif choice < 0.46:
+            lines.append(indent + "RIZZ \"statement " + str(emitted[0]) + "\"")
+        elif choice < 0.52:
+            lines.append(indent + "ON GYATT " + rng.choice(ints) + " IS " + intExpression(counters))
+        elif choice < 0.55:
+            lines.append(indent + "ON GYATT " + rng.choice(["b0 IS BASED", "b0 IS CRINGE", "s0 IS \"line " + str(emitted[0]) + "\""]))
+        elif choice < 0.58:
+            lines.append(indent + "SKIBIDI " + rng.choice(ints + floats + ["s0"]))
+        elif choice < 0.72:
+            lines.append(indent + "IS " + condition(counters) + " CHAT")
+            block(level + 1, counters, indent + "    ", rng.randint(1, 4))
+            lines.append(indent + "THANKS CHAT")
+        elif choice < 0.86:
+            counter = "k" + str(level)
+            lines.append(indent + counter + " IS 0")
+            lines.append(indent + "ONLY IN OHIO " + counter + " < " + str(rng.randint(1, trips)))
+            block(level + 1, counters + [counter], indent + "    ", rng.randint(1, 5))
+            lines.append(indent + "    " + counter + " IS " + counter + " + 1")
+            lines.append(indent + "SUSSY")
+        else:
+            counter = "q" + str(level)
+            lines.append(indent + "SQUAD " + counter + " FROM 0 UNTIL " + str(rng.randint(1, trips)))
+            block(level + 1, counters + [counter], indent + "    ", rng.randint(1, 5))
+            lines.append(indent + "SUSSY")
+
+    while emitted[0] < statements:
+        statement(0, [], "")
+    lines.append("RIZZ SUM arr0 + SUM arr1")
+    return "\n".join(lines) + "\n"
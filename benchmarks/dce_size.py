@@ -0,0 +1,96 @@
+# Size of the generated code with and without --dce: statements left in the AST, lines of C, the
+# text size of the binary at -O0 and -O2, and bytecode instructions in the VM. Also checks that
+# the VM prints the same either way.
+# Usage: python benchmarks/dce_size.py [statements]
+import io
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from compiler import CompileOptions, compileSource, parseSource
+from build import findCompiler
+from nodes import If, While
+from vm import BytecodeCompiler, VM
+from corpus import generateProgram
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "code-examples")
+
+# Scratch work that never reaches the output: unused temporaries, overwritten stores and a
+# debugging block switched off with a constant condition.
+SCRATCH = """ON GYATT n IS 0
+SKIBIDI n
+ON GYATT total IS 0
+ON GYATT i IS 0
+ONLY IN OHIO i < n
+    ON GYATT square IS i * i
+    ON GYATT cube IS square * i
+    ON GYATT scratch IS cube - square + 7
+    total IS total + square
+    scratch IS total * 2
+    IS CRINGE CHAT
+        RIZZ "square"
+        RIZZ square
+        RIZZ cube
+    THANKS CHAT
+    i IS i + 1
+SUSSY
+ON GYATT label IS "total"
+ON GYATT label IS "sum of squares"
+RIZZ label
+RIZZ total
+"""
+
+def countStatements(statements):
+    total = 0
+    for statement in statements:
+        total += 1
+        if type(statement) in (If, While):
+            total += countStatements(statement.body)
+    return total
+
+def textSize(binary):
+    output = subprocess.run(["size", binary], stdout=subprocess.PIPE, check=True).stdout.decode()
+    return int(output.splitlines()[1].split()[0])
+
+def measure(workDir, source, options, stdinText):
+    program, stats = parseSource(source, options)
+    bytecode = BytecodeCompiler().compile(program)
+    output = io.StringIO()
+    try:
+        VM(bytecode, io.StringIO(stdinText), output).run()
+    except SystemExit as error:
+        output.write(str(error.code))     # the corpus may divide by zero; it must still stop there
+    row = [countStatements(program.statements), len(bytecode.code) // 2]
+
+    cPath = os.path.join(workDir, "program.c")
+    binary = os.path.join(workDir, "program")
+    compileSource(source, cPath, options)
+    with open(cPath) as cFile:
+        row.append(sum(1 for _ in cFile))
+    for optLevel in ("0", "2"):
+        subprocess.run(findCompiler() + ["-O" + optLevel, "-o", binary, cPath], check=True)
+        row.append(textSize(binary))
+    return row, output.getvalue()
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with open(os.path.join(EXAMPLES, "fibonacci.pog")) as sourceFile:
+        fibonacci = sourceFile.read()
+    programs = {"corpus": generateProgram(statements), "scratch": SCRATCH, "fibonacci": fibonacci}
+    columns = ("statements", "bytecode", "C lines", "-O0 text", "-O2 text")
+    print("%-10s %-6s" % ("program", "run") + "".join("%11s" % column for column in columns))
+    with tempfile.TemporaryDirectory() as workDir:
+        for name, source in programs.items():
+            before, first = measure(workDir, source, CompileOptions(), "10\n")
+            after, second = measure(workDir, source, CompileOptions(dce=True), "10\n")
+            print("%-10s %-6s" % (name, "plain") + "".join("%11d" % value for value in before))
+            print("%-10s %-6s" % (name, "--dce") + "".join("%11d" % value for value in after))
+            print("%-10s %-6s" % (name, "change") + "".join("%10.0f%%" % (100.0 * (b - a) / a) for a, b in zip(before, after)))
+            if first != second:
+                print("%-10s OUTPUT DIFFERS" % name)
+
+if __name__ == "__main__":
+    main()
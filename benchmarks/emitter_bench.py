@@ -0,0 +1,40 @@
+# Shows that Emitter's peak memory stays flat as the generated C file grows.
+# Usage: python benchmarks/emitter_bench.py
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from emitter import Emitter
+
+def emitProgram(path, lines):
+    emitter = Emitter(path)
+    emitter.headerLine("#include <stdio.h>")
+    emitter.headerLine("int main(void) {")
+    for i in range(lines):
+        emitter.emit("a = ")
+        emitter.emit(str(i))
+        emitter.emitLine(";")
+    emitter.enderLine("return 0;")
+    emitter.enderLine("}")
+    emitter.writeFile()
+
+def main():
+    with tempfile.TemporaryDirectory() as outDir:
+        path = os.path.join(outDir, "out.c")
+        for lines in (10000, 100000, 1000000):
+            tracemalloc.start()
+            start = time.perf_counter()
+            emitProgram(path, lines)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            size = os.path.getsize(path)
+            print("%8d lines: %6.2f MB of C in %.3fs, peak traced memory %.2f MB"
+                  % (lines, size / 1e6, elapsed, peak / 1e6))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Input throughput of a compiled program that reads a large file of numbers through SKIBIDI,
+# with scanf against --fast-input, and a check that both print exactly the same.
+# Usage: python benchmarks/input_bench.py [numbers]
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from compiler import CompileOptions, compileSource
+from build import findCompiler
+
+# Reads pairs of an int and a float until the count runs out, and prints running totals.
+PROGRAM = """ON GYATT n IS 0
+SKIBIDI n
+ON GYATT i IS 0
+ON GYATT x IS 0
+ON GYATT f IS 0.0
+ON GYATT total IS 0
+ON GYATT ftotal IS 0.0
+ONLY IN OHIO i < n
+    SKIBIDI x
+    SKIBIDI f
+    total IS total + x
+    ftotal IS ftotal + f
+    i IS i + 1
+SUSSY
+RIZZ total
+RIZZ ftotal
+"""
+
+# Mostly well-formed numbers, with some words scanf rejects so the recovery path is exercised too.
+def writeInput(path, numbers, seed=0):
+    rng = random.Random(seed)
+    with open(path, 'w') as inputFile:
+        inputFile.write(str(numbers // 2) + "\n")
+        for i in range(numbers // 2):
+            x = str(rng.randint(-100000, 100000)) if rng.random() < 0.99 else "oops"
+            f = "%.3f" % rng.uniform(-1000, 1000) if rng.random() < 0.99 else "1e"
+            inputFile.write(x + " " + f + ("\n" if i % 8 == 7 else " "))
+
+def build(workDir, name, options):
+    cPath = os.path.join(workDir, name + ".c")
+    binary = os.path.join(workDir, name)
+    compileSource(PROGRAM, cPath, options)
+    subprocess.run(findCompiler() + ["-O2", "-o", binary, cPath], check=True)
+    return binary
+
+def timeRun(binary, inputPath, repeat=3):
+    best = None
+    for _ in range(repeat):
+        with open(inputPath, 'rb') as inputFile:
+            start = time.perf_counter()
+            output = subprocess.run([binary], stdin=inputFile, stdout=subprocess.PIPE, check=True).stdout
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+def main():
+    numbers = int(sys.argv[1]) if len(sys.argv) > 1 else 4000000
+    with tempfile.TemporaryDirectory() as workDir:
+        inputPath = os.path.join(workDir, "input.txt")
+        writeInput(inputPath, numbers)
+        size = os.path.getsize(inputPath)
+        scanfTime, scanfOutput = timeRun(build(workDir, "scanf", CompileOptions()), inputPath)
+        fastTime, fastOutput = timeRun(build(workDir, "fast", CompileOptions(fastInput=True)), inputPath)
+    print("%d numbers, %.1f MB of input" % (numbers, size / 1e6))
+    print("scanf        %.3fs (%.1f MB/s)" % (scanfTime, size / 1e6 / scanfTime))
+    print("--fast-input %.3fs (%.1f MB/s, %.1fx)" % (fastTime, size / 1e6 / fastTime, scanfTime / fastTime))
+    print("output identical" if scanfOutput == fastOutput else "OUTPUT DIFFERS")
+
+if __name__ == "__main__":
+    main()
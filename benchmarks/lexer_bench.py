@@ -0,0 +1,57 @@
+# Compares the character-at-a-time Lexer against FastLexer on a large synthetic program.
+# Usage: python benchmarks/lexer_bench.py [statements]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lexer import Lexer
+from fastlexer import FastLexer
+from tok import TokenType
+from corpus import generateProgram
+
+def lexAll(lexerClass, source):
+    lexer = lexerClass(source)
+    tokens = []
+    while True:
+        token = lexer.getToken()
+        tokens.append((token.text, token.kind))
+        if token.kind == TokenType.EOF:
+            return tokens
+
+def drain(lexerClass, source):
+    lexer = lexerClass(source)
+    eof = TokenType.EOF
+    count = 1
+    while lexer.getToken().kind != eof:
+        count += 1
+    return count
+
+def timeLexer(lexerClass, source, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = drain(lexerClass, source)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    source = generateProgram(statements)
+    print("Source: " + str(len(source)) + " characters, " + str(source.count("\n")) + " lines")
+
+    if lexAll(Lexer, source) != lexAll(FastLexer, source):
+        sys.exit("Token streams differ!")
+
+    slowTime, count = timeLexer(Lexer, source)
+    fastTime, count = timeLexer(FastLexer, source)
+
+    print("Tokens: " + str(count))
+    print("Lexer:     %.3fs (%.0f tokens/s)" % (slowTime, count / slowTime))
+    print("FastLexer: %.3fs (%.0f tokens/s)" % (fastTime, count / fastTime))
+    print("Speedup:   %.1fx" % (slowTime / fastTime))
+
+if __name__ == "__main__":
+    main()
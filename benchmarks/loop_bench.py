@@ -0,0 +1,170 @@
+# Runtime of loop-heavy programs with and without --loops, in the VM and as C built at -O0 and
+# -O2, and a check that every build prints the same.
+# Usage: python benchmarks/loop_bench.py [iterations]
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from compiler import CompileOptions, compileSource, parseSource
+from build import findCompiler
+from vm import BytecodeCompiler, VM
+
+# Each program reads its iteration count n first.
+PROGRAMS = {
+    # An invariant assignment and invariant int and float subexpressions.
+    "invariant": """ON GYATT n IS 0
+SKIBIDI n
+ON GYATT w IS 3
+ON GYATT h IS 7
+ON GYATT f IS 1.5
+ON GYATT total IS 0
+ON GYATT ft IS 0.0
+ON GYATT i IS 0
+ONLY IN OHIO i < n
+    ON GYATT area IS w * h + w - h
+    total IS total + area * 2 - w * h * 2
+    ft IS ft + f * 0.25 - f / 3.0
+    i IS i + 1
+SUSSY
+RIZZ total
+RIZZ ft
+""",
+    # Multiplications by the loop counter, in the body and in a condition.
+    "strength": """ON GYATT n IS 0
+SKIBIDI n
+ON GYATT stride IS 5
+ON GYATT half IS n * 8
+ON GYATT hits IS 0
+ON GYATT i IS 0
+ONLY IN OHIO i < n
+    ON GYATT offset IS i * 12 + i * stride
+    IS offset > half CHAT
+        hits IS hits + 1
+    THANKS CHAT
+    IS i * 3 < 1000 CHAT
+        hits IS hits + 2
+    THANKS CHAT
+    i IS i + 1
+SUSSY
+RIZZ hits
+RIZZ offset
+""",
+    # A short inner loop with a constant trip count.
+    "unroll": """ON GYATT n IS 0
+SKIBIDI n
+ON GYATT total IS 0
+ON GYATT i IS 0
+ON GYATT k IS 0
+ONLY IN OHIO i < n
+    k IS 0
+    ONLY IN OHIO k < 4
+        total IS total + k * k - 3
+        k IS k + 1
+    SUSSY
+    i IS i + 1
+SUSSY
+RIZZ total
+""",
+    # A constant loop that never runs, unrolled away, whose body has the first declarations of
+    # variables used after it.
+    "never": """ON GYATT n IS 0
+SKIBIDI n
+ON GYATT k IS 0
+ONLY IN OHIO k < 0
+    ON GYATT x IS 5
+    IS n > 0 CHAT
+        ON GYATT y IS 1.5
+    THANKS CHAT
+    k IS k + 1
+SUSSY
+x IS 2
+y IS 0.5
+ON GYATT i IS 0
+ONLY IN OHIO i < n
+    x IS x + i - i / 3
+    y IS y + 0.25
+    i IS i + 1
+SUSSY
+RIZZ x
+RIZZ y
+""",
+    # A row-major grid walk: every cell index is r * cols + c.
+    "grid": """ON GYATT n IS 0
+SKIBIDI n
+ON GYATT cols IS 250
+ON GYATT rows IS n / cols
+ON GYATT limit IS rows * cols / 2
+ON GYATT count IS 0
+ON GYATT r IS 0
+ON GYATT c IS 0
+ONLY IN OHIO r < rows
+    c IS 0
+    ONLY IN OHIO c < cols
+        ON GYATT cell IS r * cols + c
+        IS cell > limit CHAT
+            count IS count + 1
+        THANKS CHAT
+        c IS c + 1
+    SUSSY
+    r IS r + 1
+SUSSY
+RIZZ count
+""",
+}
+
+VMSCALE = 200   # the VM runs this many times fewer iterations
+
+def timeC(workDir, name, source, options, optLevel, stdinText, repeat=5):
+    cPath = os.path.join(workDir, name + ".c")
+    binary = os.path.join(workDir, name)
+    compileSource(source, cPath, options)
+    subprocess.run(findCompiler() + ["-O" + optLevel, "-o", binary, cPath], check=True)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([binary], input=stdinText.encode(), stdout=subprocess.PIPE, check=True).stdout.decode()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+def timeVM(source, options, stdinText):
+    program, stats = parseSource(source, options)
+    bytecode = BytecodeCompiler().compile(program)
+    output = io.StringIO()
+    start = time.perf_counter()
+    VM(bytecode, io.StringIO(stdinText), output).run()
+    return time.perf_counter() - start, output.getvalue()
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000000
+    plain = CompileOptions()
+    loops = CompileOptions(loops=True)
+    print("%-10s %-6s %10s %10s %8s" % ("program", "run", "plain", "--loops", "speedup"))
+    with tempfile.TemporaryDirectory() as workDir:
+        for name, source in PROGRAMS.items():
+            outputs = set()
+            rows = []
+            stdinText = str(iterations // VMSCALE) + "\n"
+            before, first = timeVM(source, plain, stdinText)
+            after, second = timeVM(source, loops, stdinText)
+            rows.append(("vm", before, after))
+            vmOutputs = {first, second}
+            stdinText = str(iterations) + "\n"
+            for optLevel in ("0", "2"):
+                before, first = timeC(workDir, name + "_plain", source, plain, optLevel, stdinText)
+                after, second = timeC(workDir, name + "_loops", source, loops, optLevel, stdinText)
+                rows.append(("C -O" + optLevel, before, after))
+                outputs |= {first, second}
+            for run, before, after in rows:
+                print("%-10s %-6s %9.3fs %9.3fs %7.2fx" % (name, run, before, after, before / after))
+            if len(outputs) != 1 or len(vmOutputs) != 1:
+                print("%-10s OUTPUT DIFFERS" % name)
+    print("(the VM runs %d times fewer iterations)" % VMSCALE)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Runtime of a print-heavy compiled program with printf per RIZZ against --fast-output,
+# and a check that both print exactly the same bytes.
+# Usage: python benchmarks/output_bench.py [iterations]
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from compiler import CompileOptions, compileSource
+from build import findCompiler
+
+# Prints ints, floats, bools and literals in a hot loop, like fibonacci.pog does.
+PROGRAM = """ON GYATT n IS 0
+SKIBIDI n
+ON GYATT i IS 0
+ON GYATT x IS 0.5
+ON GYATT b IS BASED
+ONLY IN OHIO i < n
+    RIZZ i
+    RIZZ x * i - 1000
+    RIZZ b
+    RIZZ "tick"
+    i IS i + 1
+SUSSY
+"""
+
+def build(workDir, name, options):
+    cPath = os.path.join(workDir, name + ".c")
+    binary = os.path.join(workDir, name)
+    compileSource(PROGRAM, cPath, options)
+    subprocess.run(findCompiler() + ["-O2", "-o", binary, cPath], check=True)
+    return binary
+
+def timeRun(binary, stdinText, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([binary], input=stdinText.encode(), stdout=subprocess.PIPE, check=True).stdout
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    stdinText = str(iterations) + "\n"
+    with tempfile.TemporaryDirectory() as workDir:
+        printfTime, printfOutput = timeRun(build(workDir, "printf", CompileOptions()), stdinText)
+        fastTime, fastOutput = timeRun(build(workDir, "fast", CompileOptions(fastOutput=True)), stdinText)
+    print("%d lines of output (%.1f MB)" % (iterations * 4, len(printfOutput) / 1e6))
+    print("printf        %.3fs" % printfTime)
+    print("--fast-output %.3fs (%.1fx)" % (fastTime, printfTime / fastTime))
+    print("output identical" if printfOutput == fastOutput else "OUTPUT DIFFERS")
+
+if __name__ == "__main__":
+    main()
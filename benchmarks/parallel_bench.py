@@ -0,0 +1,80 @@
+# Runtime of SQUAD loops over a large int[] array, built at -O2 without OpenMP (one thread) and
+# with -fopenmp at several thread counts. The program fills the array, then takes its sum, min
+# and max a number of times; every loop in it is parallel.
+# Usage: python benchmarks/parallel_bench.py [elements] [passes]
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from compiler import CompileOptions, parseSource, compileSource
+from build import findCompiler, compilerFlags, usesOpenMP
+
+PROGRAM = """ON GYATT a [%(elements)d] IS []
+SQUAD i FROM 0 UNTIL %(elements)d
+    a[i] IS i - i / 97 * 97 - 48
+SUSSY
+ON GYATT total IS 0
+ON GYATT lo IS 1000
+ON GYATT hi IS 0
+ON GYATT pass IS 0
+ONLY IN OHIO pass < %(passes)d
+    SQUAD i FROM 0 UNTIL %(elements)d
+        total IS total + a[i] * a[i]
+        IS a[i] + pass < lo CHAT
+            lo IS a[i] + pass
+        THANKS CHAT
+        IS a[i] - pass > hi CHAT
+            hi IS a[i] - pass
+        THANKS CHAT
+    SUSSY
+    pass IS pass + 1
+SUSSY
+RIZZ total
+RIZZ lo
+RIZZ hi
+"""
+
+def run(binary, threads, repeat=3):
+    env = dict(os.environ)
+    if threads is not None:
+        env["OMP_NUM_THREADS"] = str(threads)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([binary], stdout=subprocess.PIPE, env=env, check=True).stdout
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+def main():
+    elements = int(sys.argv[1]) if len(sys.argv) > 1 else 10000000
+    passes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    source = PROGRAM % {"elements": elements, "passes": passes}
+    _, stats = parseSource(source, CompileOptions())
+    cores = os.cpu_count() or 1
+    print("%d elements, %d passes, %d of %d SQUAD loops parallel, %d cores"
+          % (elements, passes, stats["parallel"], stats["squads"], cores))
+
+    with tempfile.TemporaryDirectory() as workDir:
+        cPath = os.path.join(workDir, "program.c")
+        compileSource(source, cPath, CompileOptions())
+        serial = os.path.join(workDir, "serial")
+        parallel = os.path.join(workDir, "parallel")
+        subprocess.run(findCompiler() + compilerFlags("2") + ["-o", serial, cPath], check=True)
+        subprocess.run(findCompiler() + compilerFlags("2", usesOpenMP(cPath)) + ["-o", parallel, cPath], check=True)
+
+        baseline, expected = run(serial, None)
+        print("%-16s %10s %9s" % ("build", "run", "speedup"))
+        print("%-16s %9.3fs %8.2fx" % ("-O2", baseline, 1.0))
+        for threads in sorted({1, 2, 4, cores}):
+            elapsed, output = run(parallel, threads)
+            print("%-16s %9.3fs %8.2fx" % ("-fopenmp %d thr" % threads, elapsed, baseline / elapsed))
+            if output != expected:
+                print("%-16s OUTPUT DIFFERS" % ("-fopenmp %d thr" % threads))
+
+if __name__ == "__main__":
+    main()
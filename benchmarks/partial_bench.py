@@ -0,0 +1,90 @@
+# Compile time and runtime of programs with and without --partial-eval: two that never read
+# input, and one that builds a table before reading its input. C is built at -O2.
+# Usage: python benchmarks/partial_bench.py
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from compiler import CompileOptions, compileSource
+from build import findCompiler
+
+PROGRAMS = {
+    # Counts primes by trial division; nothing depends on input.
+    "primes": """ON GYATT count IS 0
+ON GYATT n IS 2
+ONLY IN OHIO n < 3000
+    ON GYATT d IS 2
+    ON GYATT prime IS 1
+    ONLY IN OHIO d * d <= n
+        IS n - n / d * d == 0 CHAT
+            prime IS 0
+            d IS n
+        THANKS CHAT
+        d IS d + 1
+    SUSSY
+    count IS count + prime
+    n IS n + 1
+SUSSY
+RIZZ "primes below 3000"
+RIZZ count
+""",
+    # Prints a multiplication table.
+    "table": """ON GYATT row IS 1
+ONLY IN OHIO row <= 30
+    ON GYATT col IS 1
+    ONLY IN OHIO col <= 30
+        RIZZ row * col
+        col IS col + 1
+    SUSSY
+    row IS row + 1
+SUSSY
+""",
+    # Sums a series before reading how many times to print the result.
+    "prefix": """ON GYATT total IS 0.0
+ON GYATT k IS 1
+ONLY IN OHIO k < 20000
+    total IS total + 1.0 / k
+    k IS k + 1
+SUSSY
+ON GYATT times IS 0
+SKIBIDI times
+ONLY IN OHIO times > 0
+    RIZZ total
+    times IS times - 1
+SUSSY
+""",
+}
+
+def measure(workDir, source, options, repeat=5):
+    cPath = os.path.join(workDir, "program.c")
+    binary = os.path.join(workDir, "program")
+    start = time.perf_counter()
+    compileSource(source, cPath, options)
+    transpiled = time.perf_counter() - start
+    subprocess.run(findCompiler() + ["-O2", "-o", binary, cPath], check=True)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([binary], input=b"3\n", stdout=subprocess.PIPE, check=True).stdout
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return transpiled, best, output
+
+def main():
+    print("%-8s %-15s %12s %12s" % ("program", "run", "transpile", "run -O2"))
+    with tempfile.TemporaryDirectory() as workDir:
+        for name, source in PROGRAMS.items():
+            outputs = set()
+            for label, options in (("plain", CompileOptions()), ("--partial-eval", CompileOptions(partialEval=True))):
+                transpiled, ran, output = measure(workDir, source, options)
+                outputs.add(output)
+                print("%-8s %-15s %11.4fs %11.4fs" % (name, label, transpiled, ran))
+            if len(outputs) != 1:
+                print("%-8s OUTPUT DIFFERS" % name)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Per-file latency of a cold "python main.py FILE" against "python client.py FILE" talking to a
+# warm server.py, with and without the compile cache. Each case is a whole command, process start
+# included, as a user would run it; the median of --repeat runs is reported.
+# Usage: python benchmarks/server_bench.py [--repeat 15] [--workers 2]
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import generateMixed
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Sources to compile: the fibonacci example and generated programs of growing size.
+def sources(workDir: str) -> dict:
+    paths = {"fibonacci": os.path.join(ROOT, "code-examples", "fibonacci.pog")}
+    for statements in (200, 2000, 20000):
+        path = os.path.join(workDir, "mixed%d.pog" % statements)
+        with open(path, 'w') as sourceFile:
+            sourceFile.write(generateMixed(statements))
+        paths["mixed%d" % statements] = path
+    return paths
+
+def median(command: list, env: dict, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+# Wait until the server accepts connections.
+def waitForServer(path: str, server) -> None:
+    while True:
+        if server.poll() is not None:
+            sys.exit("Error: server.py exited with status %d." % server.returncode)
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            return
+        except (FileNotFoundError, ConnectionRefusedError):
+            time.sleep(0.05)
+        finally:
+            probe.close()
+
+def main():
+    argParser = argparse.ArgumentParser(description="Compare cold main.py runs with client.py against a warm server.")
+    argParser.add_argument("--repeat", type=int, default=15, help="runs per case; the median counts")
+    argParser.add_argument("--workers", type=int, default=2, help="server worker processes")
+    args = argParser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workDir:
+        env = dict(os.environ, POG_SOCKET=os.path.join(workDir, "server.sock"))
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), "--workers", str(args.workers)],
+                                  env=env, stdout=subprocess.DEVNULL)
+        try:
+            waitForServer(env["POG_SOCKET"], server)
+            print("%-11s %-9s %12s %12s %9s" % ("file", "cache", "main.py", "client.py", "speedup"))
+            for name, path in sources(workDir).items():
+                for cache in ("off", "warm"):
+                    flags = ["-o", os.path.join(workDir, "out")]
+                    if cache == "off":
+                        flags.append("--no-cache")
+                    else:
+                        flags += ["--cache-dir", os.path.join(workDir, "cache")]
+                        subprocess.run([sys.executable, os.path.join(ROOT, "main.py"), path] + flags,
+                                       env=env, stdout=subprocess.DEVNULL, check=True)
+                    cold = median([sys.executable, os.path.join(ROOT, "main.py"), path] + flags, env, args.repeat)
+                    warm = median([sys.executable, os.path.join(ROOT, "client.py"), path] + flags, env, args.repeat)
+                    print("%-11s %-9s %11.1fms %11.1fms %8.1fx" % (name, cache, 1000 * cold, 1000 * warm, cold / warm))
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# Benchmark suite with regression thresholds. Measures compiler throughput on programs from
+# corpus.generateMixed (lines and tokens per second through the lexer, the parser and the whole
+# transpile) and the runtime of compiled programs at -O2, then compares every metric against
+# benchmarks/baselines.json. A metric more than --tolerance worse than its baseline is reported
+# as a REGRESSION and the suite exits with status 1. Metrics are compared relative to a pure Python
+# calibration loop timed in the same run, so a machine that is busy as a whole doesn't fail it.
+# Baselines are only meaningful on the machine that recorded them: after changing machines, or
+# after a change that is meant to move the numbers, record new ones with --update.
+# Usage: python benchmarks/suite.py [--update] [--tolerance 0.25] [--statements 20000] [--depth 3]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from compiler import CompileOptions, compileSource
+from chunklexer import makeLexer
+from parse import Parser
+from profiler import TokenReplay
+from tok import TokenType
+from build import findCompiler
+from corpus import generateMixed
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+BASELINES = os.path.join(BENCHMARKS, "baselines.json")
+CALIBRATION = "machine.calibrationSeconds"
+
+# Programs whose runtime is measured, with their stdin. Each reads its size first, so the C
+# compiler can't compute the result ahead of time.
+PROGRAMS = {
+    # Prints 200000 fibonacci numbers (wrapping around), one RIZZ per number.
+    "fibonacci": (os.path.join(BENCHMARKS, "..", "code-examples", "fibonacci.pog"), "200000\n"),
+    # Nested ONLY IN OHIO loops doing int and float arithmetic.
+    "loops": ("""ON GYATT n IS 0
+SKIBIDI n
+ON GYATT total IS 0
+ON GYATT f IS 0.0
+ON GYATT i IS 0
+ONLY IN OHIO i < n
+    ON GYATT j IS 0
+    ONLY IN OHIO j < 1000
+        total IS total + i * j - j / 7
+        f IS f + 0.5
+        j IS j + 1
+    SUSSY
+    i IS i + 1
+SUSSY
+RIZZ total
+RIZZ f
+""", "20000\n"),
+    # Element loops, SQUAD loops and whole-array operations over a 100000-element array.
+    "arrays": ("""ON GYATT n IS 0
+SKIBIDI n
+ON GYATT a [100000] IS []
+ON GYATT b [100000] IS []
+ON GYATT total IS 0
+SQUAD i FROM 0 UNTIL 100000
+    a[i] IS i - i / 89 * 89 + n
+SUSSY
+ON GYATT pass IS 0
+ONLY IN OHIO pass < n
+    b IS a * 3 - b
+    SQUAD i FROM 0 UNTIL 100000
+        total IS total + b[i]
+    SUSSY
+    total IS total + MIN b + MAX a
+    pass IS pass + 1
+SUSSY
+RIZZ total
+""", "1000\n"),
+}
+
+def lexAll(source):
+    lexer = makeLexer(source, 1)
+    tokens = []
+    token = lexer.getToken()
+    while token.kind != TokenType.EOF:
+        tokens.append(token)
+        token = lexer.getToken()
+    return tokens
+
+# A fixed amount of pure Python work, timed alongside the workloads to tell how fast the machine
+# was running at the time.
+def calibrate() -> None:
+    total = 0
+    for i in range(300000):
+        total += i * i % 7
+
+def seconds(measure) -> float:
+    start = time.perf_counter()
+    measure()
+    return time.perf_counter() - start
+
+# Metric name -> (function to time, amount of work per call, or None to report the time itself).
+# Throughput is lines or tokens of the generated program per second; runtimes are for compiled
+# programs at -O2, process start included.
+def workloads(source, workDir) -> dict:
+    lines = source.count("\n")
+    tokens = lexAll(source)
+    cPath = os.path.join(workDir, "throughput.c")
+    lex = lambda: lexAll(source)
+    parse = lambda: Parser(TokenReplay(tokens, None)).program()
+    transpile = lambda: compileSource(source, cPath, CompileOptions())
+    result = {"compile.lexLinesPerSecond": (lex, lines),
+              "compile.lexTokensPerSecond": (lex, len(tokens)),
+              "compile.parseLinesPerSecond": (parse, lines),
+              "compile.parseTokensPerSecond": (parse, len(tokens)),
+              "compile.transpileLinesPerSecond": (transpile, lines)}
+    for name, (program, stdinText) in PROGRAMS.items():
+        if os.path.exists(program):
+            with open(program) as sourceFile:
+                program = sourceFile.read()
+        cPath = os.path.join(workDir, name + ".c")
+        binary = os.path.join(workDir, name)
+        compileSource(program, cPath, CompileOptions())
+        subprocess.run(findCompiler() + ["-O2", "-o", binary, cPath], check=True)
+        run = lambda binary=binary, stdinText=stdinText: subprocess.run(
+            [binary], input=stdinText.encode(), stdout=subprocess.DEVNULL, check=True)
+        result["run." + name + ".seconds"] = (run, None)
+    result[CALIBRATION] = (calibrate, None)
+    return result
+
+# The best of config["repeat"] rounds for every metric. Each round times every workload once, so
+# the repeats of one metric are spread over the whole run and a slow spell of the machine doesn't
+# hit all of them.
+def measure(config) -> dict:
+    source = generateMixed(config["statements"], config["depth"], config["seed"])
+    with tempfile.TemporaryDirectory() as workDir:
+        timed = workloads(source, workDir)
+        fastest = {}
+        for _ in range(config["repeat"]):
+            times = {}
+            for metric, (function, work) in timed.items():
+                if function not in times:
+                    times[function] = seconds(function)
+                fastest[metric] = min(fastest.get(metric, times[function]), times[function])
+    return {metric: fastest[metric] if work is None else work / fastest[metric]
+            for metric, (function, work) in timed.items()}
+
+# Throughputs regress when they fall, times when they rise.
+def higherIsBetter(metric: str) -> bool:
+    return metric.endswith("PerSecond")
+
+# Print every metric against its baseline; returns the names of the ones that regressed.
+# Shared machines slow down and speed up as a whole by far more than any tolerance worth having,
+# so every metric is first scaled by how much faster or slower the calibration loop ran than when
+# the baselines were recorded: a metric regresses only if it got worse relative to the machine.
+def compare(metrics: dict, baselines: dict, tolerance: float) -> list:
+    regressions = []
+    speed = baselines[CALIBRATION] / metrics[CALIBRATION]
+    print("Machine speed against the baselines: %.2fx; metrics below are scaled by it." % speed)
+    print("%-34s %14s %14s %8s" % ("metric", "baseline", "current", "change"))
+    for metric, value in metrics.items():
+        if metric == CALIBRATION:
+            continue
+        value = value / speed if higherIsBetter(metric) else value * speed
+        baseline = baselines.get(metric)
+        if baseline is None:
+            print("%-34s %14s %14.4g %8s  NEW" % (metric, "-", value, "-"))
+            continue
+        change = (value - baseline) / baseline
+        worse = -change if higherIsBetter(metric) else change
+        status = ""
+        if worse > tolerance:
+            status = "  REGRESSION"
+            regressions.append(metric)
+        elif worse < -tolerance:
+            status = "  improved"
+        print("%-34s %14.4g %14.4g %+7.1f%%%s" % (metric, baseline, value, 100 * change, status))
+    return regressions
+
+def main():
+    argParser = argparse.ArgumentParser(description="Run the benchmark suite and compare it against stored baselines.")
+    argParser.add_argument("--update", action="store_true",
+                           help="record the results as the new baselines instead of comparing")
+    argParser.add_argument("--tolerance", type=float, default=0.25,
+                           help="how much worse than its baseline a metric may be, as a fraction (default: 0.25)")
+    argParser.add_argument("--baselines", default=BASELINES,
+                           help="baseline file (default: benchmarks/baselines.json)")
+    argParser.add_argument("--statements", type=int, default=20000,
+                           help="statements in the generated program for the throughput metrics")
+    argParser.add_argument("--depth", type=int, default=3,
+                           help="how deep the generated program nests blocks")
+    argParser.add_argument("--seed", type=int, default=0,
+                           help="seed of the generated program")
+    argParser.add_argument("--repeat", type=int, default=5,
+                           help="runs per metric; the best one counts")
+    args = argParser.parse_args()
+    config = {"statements": args.statements, "depth": args.depth, "seed": args.seed, "repeat": args.repeat}
+
+    baselines = None
+    if not args.update:
+        if not os.path.exists(args.baselines):
+            sys.exit("Error: No baselines at " + args.baselines + ". Record them with --update.")
+        with open(args.baselines) as baselineFile:
+            baselines = json.load(baselineFile)
+        # repeat only changes how noisy a result is, not what it measures.
+        recorded = {key: value for key, value in baselines["config"].items() if key != "repeat"}
+        if recorded != {key: value for key, value in config.items() if key != "repeat"}:
+            sys.exit("Error: Baselines were recorded with " + json.dumps(baselines["config"])
+                     + "; run with the same settings or record new baselines with --update.")
+
+    metrics = measure(config)
+    if args.update:
+        with open(args.baselines, 'w') as baselineFile:
+            json.dump({"config": config, "metrics": metrics}, baselineFile, indent=2)
+            baselineFile.write("\n")
+        for metric, value in metrics.items():
+            print("%-34s %14.4g" % (metric, value))
+        print("Recorded baselines in " + args.baselines + ".")
+        return
+
+    regressions = compare(metrics, baselines["metrics"], args.tolerance)
+    if regressions:
+        print("REGRESSION: %d of %d metrics are more than %.0f%% worse than their baselines: %s"
+              % (len(regressions), len(metrics) - 1, 100 * args.tolerance, ", ".join(regressions)))
+        sys.exit(1)
+    print("All %d metrics within %.0f%% of their baselines." % (len(metrics) - 1, 100 * args.tolerance))
+
+if __name__ == "__main__":
+    main()
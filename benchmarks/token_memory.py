@@ -0,0 +1,82 @@
+# Memory per token and peak RSS of Token objects (Lexer, FastLexer) against TokenBuffer on
+# multi-megabyte synthetic programs. Each measurement runs in a fresh process so RSS peaks don't mix.
+# Usage: python benchmarks/token_memory.py [statements ...]
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lexer import Lexer
+from fastlexer import FastLexer
+from tokenbuffer import TokenBuffer
+from parse import Parser
+from tok import TokenType
+from corpus import generateProgram
+
+MODES = ["Lexer", "FastLexer", "TokenBuffer"]
+
+# Every token of the file at path, held at once the way each design stores them.
+def loadTokens(mode, path):
+    if mode == "TokenBuffer":
+        return TokenBuffer.fromFile(path)
+    with open(path, 'r') as sourceFile:
+        lexer = Lexer(sourceFile.read()) if mode == "Lexer" else FastLexer(sourceFile.read())
+    tokens = []
+    while True:
+        token = lexer.getToken()
+        tokens.append(token)
+        if token.kind == TokenType.EOF:
+            return tokens
+
+# Parse the file at path: reading it into a string for FastLexer, or mapping it into a TokenBuffer.
+def parseFile(mode, path):
+    if mode == "TokenBuffer":
+        with TokenBuffer.fromFile(path) as buffer:
+            return Parser(buffer.cursor()).program()
+    with open(path, 'r') as sourceFile:
+        return Parser(FastLexer(sourceFile.read())).program()
+
+# Run in a child process: print the traced bytes held by the tokens, the token count and peak RSS.
+def measure(task, mode, path):
+    if task == "tokens":
+        tracemalloc.start()
+        tokens = loadTokens(mode, path)
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        count = len(tokens)
+    else:
+        parseFile(mode, path)
+        held = count = 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(held, count, peak)
+
+def runChild(task, mode, path):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", task, mode, path],
+                            capture_output=True, text=True, check=True).stdout
+    return [int(value) for value in output.split()]
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [50000, 200000]
+    with tempfile.TemporaryDirectory() as workDir:
+        for statements in sizes:
+            path = os.path.join(workDir, "program.pog")
+            with open(path, 'w') as sourceFile:
+                sourceFile.write(generateProgram(statements))
+            print("%d statements, %.1f MB of source" % (statements, os.path.getsize(path) / 1e6))
+            for mode in MODES:
+                held, count, peak = runChild("tokens", mode, path)
+                print("  %-12s %6.1f bytes/token over %d tokens, peak RSS holding them all %6.1f MB"
+                      % (mode, held / count, count, peak / 1e6))
+            for mode in MODES[1:]:
+                peak = runChild("parse", mode, path)[2]
+                print("  parse with %-12s peak RSS %6.1f MB" % (mode, peak / 1e6))
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        measure(*sys.argv[2:])
+    else:
+        main()
@@ -0,0 +1,51 @@
+# Compares the bytecode VM with transpiling and building with the C compiler, on time to the
+# first byte of output and total runtime of `main.py --run`.
+# Usage: python benchmarks/vm_bench.py [source.pog] [stdin text]
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+REPEATS = 5
+
+def timeRun(arguments, stdinText):
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py")] + arguments,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    process.stdin.write(stdinText.encode())
+    process.stdin.close()
+    first = process.stdout.read(1)
+    firstByte = time.perf_counter() - start
+    output = first + process.stdout.read()
+    process.wait()
+    return firstByte, time.perf_counter() - start, output
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "code-examples", "fibonacci.pog")
+    stdinText = sys.argv[2] if len(sys.argv) > 2 else "40\n"
+
+    with tempfile.TemporaryDirectory() as cacheDir:
+        common = ["--run", "--cache-dir", cacheDir, source]
+        modes = [("vm", ["--backend", "vm"] + common),
+                 ("c, cold", ["--no-cache"] + common),
+                 ("c, warm", common)]
+        timeRun(common, stdinText)  # fill the cache for the warm runs
+
+        outputs = {}
+        for name, arguments in modes:
+            firsts = []
+            totals = []
+            for i in range(REPEATS):
+                firstByte, total, outputs[name] = timeRun(arguments, stdinText)
+                firsts.append(firstByte)
+                totals.append(total)
+            print("%-8s first output %7.1f ms, total %7.1f ms (best of %d)"
+                  % (name, min(firsts) * 1000, min(totals) * 1000, REPEATS))
+
+    if len(set(outputs.values())) != 1:
+        print("outputs differ between backends")
+
+if __name__ == "__main__":
+    main()
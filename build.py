@@ -0,0 +1,79 @@
+import hashlib
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+from cache import *
+
+OPTLEVELS = ["0", "1", "2", "3", "s"]
+
+# The system C compiler as a command line: $CC if set, split like a shell would (CC="ccache gcc"),
+# otherwise cc or gcc from PATH.
+def findCompiler() -> list:
+    if os.environ.get("CC"):
+        compiler = shlex.split(os.environ["CC"])
+        if not compiler or not shutil.which(compiler[0]):
+            sys.exit("Error: The C compiler in CC was not found: " + os.environ["CC"])
+        return compiler
+    compiler = shutil.which("cc") or shutil.which("gcc")
+    if not compiler:
+        sys.exit("Error: No C compiler found. Install cc/gcc or set CC.")
+    return [compiler]
+
+# What the compiler says about its version, so binaries built by an older one aren't reused
+# after an upgrade.
+def compilerVersion(compiler: list) -> str:
+    try:
+        process = subprocess.run(compiler + ["--version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    except OSError as e:
+        sys.exit("Error: Could not run the C compiler " + " ".join(compiler) + ": " + str(e))
+    return process.stdout
+
+# Command line flags passed to the C compiler for an optimization level, for OpenMP when the
+# C has parallel loops, and for debug information (which instrumented C maps to .pog lines).
+def compilerFlags(optLevel: str, openmp: bool = False, debug: bool = False) -> list:
+    return ["-O" + optLevel] + (["-fopenmp"] if openmp else []) + (["-g"] if debug else [])
+
+# Whether the generated C at cPath has OpenMP pragmas.
+def usesOpenMP(cPath: str) -> bool:
+    with open(cPath, 'rb') as cFile:
+        return b"#pragma omp" in cFile.read()
+
+# Build the C file at cPath into an executable, reusing a cached binary when the same C was
+# already built with the same compiler, compiler version and flags. Returns (path to the
+# executable, whether it was cached).
+def buildExecutable(cPath: str, binaries: CompileCache, compiler: list, flags: list) -> tuple:
+    with open(cPath, 'rb') as cFile:
+        code = cFile.read()
+    digest = hashlib.sha256(code)
+    digest.update(b"\0" + " ".join(compiler).encode() + b"\0" + compilerVersion(compiler).encode())
+    digest.update(b"\0" + " ".join(flags).encode())
+    key = digest.hexdigest()
+
+    binary = binaries.lookup(key)
+    if binary is not None:
+        return binary, True
+
+    # Build next to the cache entry and move it in place, so a failed or concurrent build
+    # never leaves a broken binary behind.
+    handle, tempPath = tempfile.mkstemp(dir=binaries.directory, suffix=".tmp")
+    os.close(handle)
+    try:
+        try:
+            process = subprocess.run(compiler + flags + ["-o", tempPath, cPath], stderr=subprocess.PIPE, text=True)
+        except OSError as e:
+            sys.exit("Error: Could not run the C compiler " + " ".join(compiler) + ": " + str(e))
+        if process.returncode != 0:
+            sys.exit("Error: C compiler failed on " + cPath + ":\n" + process.stderr)
+        binary = binaries.entryPath(key)
+        os.replace(tempPath, binary)
+    finally:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+    return binary, False
+
+# Run an executable with this process's stdin, stdout and stderr. Returns its exit code.
+def runExecutable(binary: str) -> int:
+    return subprocess.run([binary]).returncode
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+STATSFILE = "stats.json"
+
+# On-disk cache of generated C, keyed by a hash of the source text, the compiler version and
+# the options that change the output. Entries are plain files named <key><suffix>; their
+# modification time is bumped on every hit so eviction can drop the least recently used ones first.
+class CompileCache:
+    def __init__(self, directory: str, maxBytes: int = 256 * 1024 * 1024, suffix: str = ".c") -> None:
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    # source is the text, or its UTF-8 bytes (e.g. a memory-mapped file); both give the same key.
+    def key(self, source, version: str, optionsKey: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(version.encode() + b"\0" + optionsKey.encode() + b"\0")
+        if isinstance(source, str):
+            source = source.encode("utf-8", "surrogatepass")
+        digest.update(source)
+        return digest.hexdigest()
+
+    def entryPath(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    # Path of the entry for key, or None on a miss. Counts as a use of the entry.
+    def lookup(self, key: str):
+        entry = self.entryPath(key)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    # Copy the cached C for key to outPath. Returns False on a miss.
+    def fetch(self, key: str, outPath: str) -> bool:
+        entry = self.entryPath(key)
+        try:
+            os.utime(entry)
+            shutil.copyfile(entry, outPath)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    # Store the C file at outPath under key. Written to a temporary file first so concurrent
+    # workers never see half an entry.
+    def store(self, key: str, outPath: str) -> None:
+        handle, tempPath = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(handle)
+        try:
+            shutil.copyfile(outPath, tempPath)
+            os.replace(tempPath, self.entryPath(key))
+        except OSError:
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+
+    # Remove least recently used entries until the cache fits in maxBytes.
+    def evict(self) -> None:
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(self.suffix):
+                    info = entry.stat()
+                    entries.append((info.st_mtime, info.st_size, entry.path))
+                    total += info.st_size
+
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            self.evictions += 1
+
+    # Add hits, misses and evictions to the totals kept in the cache directory and return them.
+    # Batch workers count in their own processes, so the caller passes the combined numbers.
+    def recordStats(self, hits: int, misses: int, evictions: int) -> dict:
+        path = os.path.join(self.directory, STATSFILE)
+        try:
+            with open(path, 'r') as statsFile:
+                totals = json.load(statsFile)
+        except (OSError, ValueError):
+            totals = {}
+        for name, value in (("hits", hits), ("misses", misses), ("evictions", evictions)):
+            totals[name] = totals.get(name, 0) + value
+
+        handle, tempPath = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, 'w') as statsFile:
+            json.dump(totals, statsFile)
+        os.replace(tempPath, path)
+        return totals
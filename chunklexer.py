@@ -0,0 +1,92 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from fastlexer import *
+
+# Sources shorter than this are lexed in-process; starting a pool costs more than it saves.
+PARALLELTHRESHOLD = 1024 * 1024
+
+# Chunks per worker, so one slow chunk doesn't leave the other workers idle.
+CHUNKSPERJOB = 4
+
+# Split source into chunks that each end with a newline. No token crosses a newline, with one
+# exception: a string whose last character is a newline ("abc<newline>"), so never split before a quote.
+def splitSource(source: str, chunks: int) -> list:
+    source += '\n'  # Same newline Lexer appends.
+    size = max(1, len(source) // chunks)
+    pieces = []
+    start = 0
+    while start < len(source):
+        end = source.find('\n', min(start + size, len(source) - 1))
+        while end != -1 and end + 1 < len(source) and source[end + 1] == '"':
+            end = source.find('\n', end + 1)
+        if end == -1:
+            end = len(source) - 1
+        pieces.append(source[start:end + 1])
+        start = end + 1
+    return pieces
+
+# Lex one chunk in a worker. Returns (texts, kinds, ended, error): ended is True when the chunk
+# stopped at an EOF token before its end (a '\0' in the source), and error is the abort message
+# of a lexing error after the last token, or None.
+def lexChunk(chunk: str) -> tuple:
+    lexer = FastLexer(chunk[:-1])   # Lexer adds the chunk's last newline back.
+    texts = []
+    kinds = []
+    try:
+        while True:
+            token = lexer.getToken()
+            if token.kind == TokenType.EOF:
+                return texts, kinds, lexer.curPos <= len(lexer.source), None
+            texts.append(token.text)
+            kinds.append(token.kind.value)
+    except SystemExit as e:
+        return texts, kinds, False, str(e.code)
+
+# Lexes a large source in line-aligned chunks across a process pool, then hands the tokens to the
+# Parser one at a time in source order. A lexing error is raised only when the parser reaches it,
+# so errors come out in the same order and with the same message as with Lexer.
+class ChunkLexer:
+    def __init__(self, source: str, jobs: int) -> None:
+        self.tokens = []
+        self.error = None
+        kinds = {kind.value: kind for kind in TokenType}
+        seen = {}   # Text -> shared Token; the text of a token always decides its kind.
+
+        chunks = splitSource(source, jobs * CHUNKSPERJOB)
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for texts, kindValues, ended, error in executor.map(lexChunk, chunks):
+                for text, kind in zip(texts, kindValues):
+                    token = seen.get(text)
+                    if token is None:
+                        token = seen[text] = Token(text, kinds[kind])
+                    self.tokens.append(token)
+                if ended or error is not None:
+                    self.error = error
+                    break
+        self.pending = iter(self.tokens)
+        self.line = 0       # Line of the last token returned, as in Lexer.
+        self.nextLine = 1
+
+    # Return the next token.
+    def getToken(self) -> Token:
+        token = next(self.pending, None)
+        if token is not None:
+            self.line = self.nextLine
+            if token.kind is TokenType.NEWLINE:
+                self.nextLine += 1
+            elif token.kind is TokenType.STRING:
+                self.nextLine += token.text.count('\n')
+            return token
+        if self.error is not None:
+            sys.exit(self.error)
+        self.line = self.nextLine
+        return Token('', TokenType.EOF)
+
+# Lexer for source: a ChunkLexer for large sources when more than one job is allowed, otherwise
+# a FastLexer. jobs defaults to the number of CPUs.
+def makeLexer(source: str, jobs: int = None):
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(source) < PARALLELTHRESHOLD:
+        return FastLexer(source)
+    return ChunkLexer(source, jobs)
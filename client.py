@@ -0,0 +1,80 @@
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# Thin client of server.py: takes exactly the arguments of main.py and has the compile server
+# carry them out, printing what it printed and exiting with its status. It only imports the
+# standard library, so it starts in a fraction of the time main.py takes to import the compiler.
+# With --run the server builds the program and the client runs it, so it reads and writes this
+# terminal; the VM backend, --watch and a server that is missing or doesn't reply fall back to
+# running main.py here.
+# Usage: python client.py <main.py arguments>
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+# Socket path shared with server.py: $POG_SOCKET, or one per user in /tmp.
+def socketPath() -> str:
+    return os.environ.get("POG_SOCKET") or "/tmp/pog-%d.sock" % os.getuid()
+
+# Send one request and wait for the reply, or return None when no server is listening or it
+# closed the connection without replying.
+def request(message: dict):
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socketPath())
+    except (FileNotFoundError, ConnectionRefusedError):
+        connection.close()
+        sys.stderr.write("No compile server at " + socketPath() + "; compiling here.\n")
+        return None
+    try:
+        with connection, connection.makefile('rb') as replies:
+            connection.sendall(json.dumps(message).encode() + b"\n")
+            line = replies.readline()
+    except ConnectionError:
+        line = b""
+    if not line:
+        sys.stderr.write("The compile server at " + socketPath() + " didn't reply; compiling here.\n")
+        return None
+    return json.loads(line)
+
+# Run main.py in this process's place.
+def runLocally(argv: list) -> None:
+    sys.stdout.flush()
+    os.execv(sys.executable, [sys.executable, MAIN] + argv)
+
+# --watch never finishes, so it would hold a server worker for good. argparse takes any prefix
+# of it too.
+def watches(argv: list) -> bool:
+    return any(len(arg) > 2 and "--watch".startswith(arg) for arg in argv)
+
+def main():
+    argv = sys.argv[1:]
+    if watches(argv):
+        runLocally(argv)
+    scratch = tempfile.mkdtemp(prefix="pog-client-")
+    try:
+        reply = request({"argv": argv, "cwd": os.getcwd(), "env": dict(os.environ), "scratch": scratch})
+        if reply is None or reply.get("local"):
+            shutil.rmtree(scratch)
+            runLocally(argv)
+
+        sys.stdout.write(reply["stdout"])
+        sys.stderr.write(reply["stderr"])
+        code = reply["code"]
+        if "binary" in reply:
+            sys.stdout.flush()
+            start = time.perf_counter()
+            code = subprocess.run([reply["binary"]]).returncode
+            finished = time.perf_counter()
+            sys.stderr.write(reply["timings"] + ", run %.3fs\n" % (finished - start) + reply["notes"])
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    sys.exit(code)
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,7 @@ scanf("%*s");
 a = 0;
 b = 1;
 while (nums>0) {
-printf("%d\n", (int)(a));
+printf("%d\n", a);
 c = a+b;
 a = b;
 b = c;
@@ -0,0 +1,369 @@
+import os
+from emitter import *
+from nodes import *
+from runtime import *
+from analysis import elementwise, operands
+
+# printf format and cast used for each RIZZ expression type. The parser types every expression
+# exactly, so only floats need a cast: their float literals are C doubles, which are rounded to
+# float first like a float variable would be.
+PRINTFORMATS = {"float": ("%.2f", "(float)"),
+                "int": ("%d", ""),
+                "bool": ("%d", "")}
+
+# Runtime function --fast-output prints each RIZZ expression type with, and the cast applied first.
+FASTPRINTS = {"float": ("bro_print_float", "(float)"),
+              "int": ("bro_print_int", ""),
+              "bool": ("bro_print_int", "")}
+
+# scanf conversion used for each SKIBIDI variable type, and whether it needs the address taken.
+SCANFORMATS = {"float": ("%f", "&"),
+               "int": ("%d", "&"),
+               "bool": ("%d", "&")}
+
+# Runtime function --fast-input reads each SKIBIDI variable type with, and whether it needs the address taken.
+FASTREADS = {"float": ("bro_read_float", "&"),
+             "int": ("bro_read_int", "&"),
+             "bool": ("bro_read_bool", "&")}
+
+# --instrument modes: no instrumentation, counters, or counters and the cycles each ONLY IN OHIO
+# loop takes.
+INSTRUMENTMODES = ["off", "counts", "cycles"]
+
+# Where an instrumented program writes its profile unless $BRO_PROFILE says otherwise: the
+# source's name with a .prof extension, in the directory the program runs in.
+def profilePath(sourcePath: str) -> str:
+    if sourcePath is None:
+        return "pog.prof"
+    return os.path.splitext(os.path.basename(sourcePath))[0] + ".prof"
+
+# C source for a string literal holding text, one line of output per line of source.
+def cStringLiteral(text: str) -> str:
+    escapes = {"\\": "\\\\", "\"": "\\\"", "\n": "\\n", "\t": "\\t"}
+    pieces = []
+    for line in text.splitlines(True):
+        chars = []
+        for char in line:
+            if char in escapes:
+                chars.append(escapes[char])
+            elif " " <= char <= "~":
+                chars.append(char)
+            else:
+                # Octal escapes take at most three digits, so they can't run into the next character.
+                chars.extend("\\%03o" % byte for byte in char.encode())
+        pieces.append("\"" + "".join(chars) + "\"")
+    return "\n".join(pieces) if pieces else "\"\""
+
+# Numbers for a C array initializer, sixteen to a line.
+def table(values) -> str:
+    values = list(values)
+    return ",\n    ".join(", ".join(values[start:start + 16]) for start in range(0, len(values), 16))
+
+# Walks the AST built by Parser and writes the C program through an Emitter.
+# fastOutput prints through the buffered runtime in runtime.py instead of one printf per RIZZ,
+# and fastInput reads through its block-buffered input instead of scanf.
+# instrument (see INSTRUMENTMODES) counts how often every statement runs and every loop goes
+# around, and with sourcePath marks the C with #line directives so gdb and perf show .pog lines.
+class CodeGenerator:
+    def __init__(self, emitter: Emitter, fastOutput: bool = False, fastInput: bool = False,
+                 instrument: str = "off", sourcePath: str = None) -> None:
+        self.emitter = emitter
+        self.fastOutput = fastOutput
+        self.fastInput = fastInput
+        self.instrument = instrument
+        self.sourcePath = sourcePath
+        self.probes = []        # (.pog line, label) of every --instrument counter
+        self.counters = {}      # id of a statement -> index of its first counter
+        self.ends = {}          # id of a loop -> index after the last counter of its body
+        self.literals = {}      # str literal -> name of its static constant
+        self.strings = False    # whether the string runtime has been emitted
+        self.reductions = False # whether the SUM/MIN/MAX runtime has been emitted
+        self.includes = set()   # headers included so far
+        self.loops = 0          # SQUAD loops emitted, to name their end variables
+        self.arrays = 0         # whole-array assignments emitted, to name their scalars
+
+    def generate(self, program: Program) -> None:
+        self.include("stdio.h")
+        self.include("stdbool.h")
+        if self.fastOutput:
+            self.include("math.h")
+            self.include("string.h")
+            self.emitter.preludeLine(OUTPUTRUNTIME)
+        if self.fastInput:
+            self.include("errno.h")
+            self.include("stdlib.h")
+            self.include("unistd.h")
+            self.emitter.preludeLine(INPUTRUNTIME)
+        if self.instrument != "off":
+            self.useInstrumentation(program)
+        self.emitter.headerLine("int main(void) {")
+        if self.instrument != "off":
+            self.emitter.headerLine("atexit(bro_dump_profile);")
+
+        self.block(program.statements)
+
+        if self.fastOutput:
+            self.emitter.enderLine("bro_flush();")
+        self.emitter.enderLine("return 0;")
+        self.emitter.enderLine("}")
+
+    def include(self, header: str) -> None:
+        if header not in self.includes:
+            self.includes.add(header)
+            self.emitter.preludeLine("#include <" + header + ">")
+
+    # Emit the string runtime the first time a str variable is declared.
+    def useStrings(self) -> None:
+        if not self.strings:
+            self.strings = True
+            self.include("ctype.h")
+            self.include("stdlib.h")
+            self.emitter.preludeLine(STRINGRUNTIME)
+
+    # Emit the SUM/MIN/MAX runtime the first time a reduction is used.
+    def useReductions(self) -> None:
+        if not self.reductions:
+            self.reductions = True
+            self.emitter.preludeLine(REDUCTIONRUNTIME)
+
+    # Number the counters and emit them with their tables and the code that writes them out.
+    def useInstrumentation(self, program: Program) -> None:
+        self.probe(program.statements, 1)
+        labels = []
+        for line, label in self.probes:
+            if label not in labels:
+                labels.append(label)
+        size = str(max(1, len(self.probes)))
+        self.include("stdlib.h")
+        self.emitter.preludeLine("#define BRO_COUNTERS " + str(len(self.probes)))
+        self.emitter.preludeLine("#define BRO_PROFILE_PATH " + quoted(profilePath(self.sourcePath)))
+        self.emitter.preludeLine("static unsigned long long bro_counts[" + size + "];")
+        self.emitter.preludeLine("static const int bro_count_lines[" + size + "] = {"
+                                 + table(str(line) for line, label in self.probes) + "};")
+        self.emitter.preludeLine("static const char *const bro_count_labels[] = {"
+                                 + ", ".join(quoted(label) for label in labels) + "};")
+        self.emitter.preludeLine("static const unsigned char bro_count_kinds[" + size + "] = {"
+                                 + table(str(labels.index(label)) for line, label in self.probes) + "};")
+        self.emitter.preludeLine(INSTRUMENTRUNTIME)
+        if self.sourcePath is not None:
+            self.emitter.markLines(os.path.abspath(self.sourcePath))
+
+    # Give the statements their counters in source order: how often each one runs, then for a
+    # loop how many trips it makes and, with cycles, how long an ONLY IN OHIO loop takes. A
+    # statement an AST pass made up has no line of its own and counts under the one before it.
+    def probe(self, statements: list, line: int) -> None:
+        for statement in statements:
+            line = getattr(statement, "line", None) or line
+            kind = type(statement).__name__
+            self.counters[id(statement)] = len(self.probes)
+            self.probes.append((line, kind))
+            if kind == "While" or kind == "For":
+                self.probes.append((line, kind + ".trips"))
+                if kind == "While" and self.instrument == "cycles":
+                    self.probes.append((line, kind + ".cycles"))
+            if kind in ("If", "While", "For"):
+                self.probe(statement.body, line)
+                self.ends[id(statement)] = len(self.probes)
+
+    # C to add to counter number offset of statement.
+    def counter(self, statement: Node, offset: int = 0) -> str:
+        return "bro_counts[" + str(self.counters[id(statement)] + offset) + "]"
+
+    # Name of the static constant holding a str literal, emitting it on first use.
+    def literal(self, text: str) -> str:
+        name = self.literals.get(text)
+        if name is None:
+            name = self.literals[text] = "bro_lit_" + str(len(self.literals))
+            self.emitter.preludeLine("static const char " + name + "[] = " + text + ";")
+        return name
+
+    def block(self, statements: list) -> None:
+        if self.instrument == "off":
+            for statement in statements:
+                getattr(self, "gen" + type(statement).__name__)(statement)
+            return
+        # The closing brace after a body belongs to the statement the body is in.
+        enclosing = self.emitter.sourceLine
+        for statement in statements:
+            self.emitter.sourceLine = self.probes[self.counters[id(statement)]][0]
+            self.emitter.emitLine(self.counter(statement) + "++;")
+            getattr(self, "gen" + type(statement).__name__)(statement)
+        self.emitter.sourceLine = enclosing
+
+    # Statements
+
+    def genPrint(self, node: Print) -> None:
+        if node.format == "string":
+            literal = node.value[:-1] + "\\n\""   # [:-1] to remove the quotation mark
+            if not self.fastOutput:
+                self.emitter.emitLine("printf(" + literal + ");")
+            elif "%" in literal:
+                # printf would read the % as a conversion, so keep printf for these.
+                self.emitter.emitLine("bro_flush();")
+                self.emitter.emitLine("printf(" + literal + ");")
+            else:
+                self.emitter.emitLine("bro_print_literal(" + literal + ");")
+        elif node.format == "str":
+            self.emitter.emitLine("bro_str_print(&" + node.value + ");")
+        elif self.fastOutput:
+            function, cast = FASTPRINTS[node.format]
+            self.emitter.emitLine(function + "(" + self.printed(node.value, cast) + ");")
+        else:
+            format, cast = PRINTFORMATS[node.format]
+            self.emitter.emitLine("printf(\"" + format + "\\n\", " + self.printed(node.value, cast) + ");")
+
+    def genOutput(self, node: Output) -> None:
+        literal = self.literal(cStringLiteral(node.text))
+        if self.fastOutput:
+            self.emitter.emitLine("bro_write(" + literal + ", sizeof(" + literal + ") - 1);")
+        else:
+            self.emitter.emitLine("fwrite(" + literal + ", 1, sizeof(" + literal + ") - 1, stdout);")
+
+    def genAssign(self, node: Assign) -> None:
+        self.emitter.emitLine(node.name + " = " + self.expression(node.value) + ";")
+
+    def genIf(self, node: If) -> None:
+        self.emitter.emitLine("if (" + self.expression(node.condition) + "){")
+        self.block(node.body)
+        self.emitter.emitLine("}")
+
+    def genWhile(self, node: While) -> None:
+        timed = self.instrument == "cycles"
+        if timed:
+            self.emitter.emitLine("{")
+            self.emitter.emitLine("unsigned long long bro_start = bro_cycles();")
+        self.emitter.emitLine("while (" + self.expression(node.condition) + ") {")
+        if self.instrument != "off":
+            self.emitter.emitLine(self.counter(node, 1) + "++;")
+        self.block(node.body)
+        self.emitter.emitLine("}")
+        if timed:
+            self.emitter.emitLine(self.counter(node, 2) + " += bro_cycles() - bro_start;")
+            self.emitter.emitLine("}")
+
+    # A Declare without a value only declares the variable (see DeadCodeEliminator).
+    def genDeclare(self, node: Declare) -> None:
+        if node.varType == "str":
+            self.useStrings()
+            if node.isNew:
+                self.emitter.headerLine("bro_str " + node.name + " = {0};")
+                self.emitter.enderLine("free(" + node.name + ".buf);")
+            if node.value is not None:
+                # Point the string at the literal's static constant; nothing is copied.
+                literal = self.literal(node.value)
+                self.emitter.emitLine("bro_str_set(&" + node.name + ", " + literal + ", sizeof(" + literal + ") - 1);")
+        else:
+            if node.isNew:
+                self.emitter.headerLine(node.varType + " " + node.name + ";")
+            if node.value is None:
+                return
+            separator = "=" if node.varType == "bool" else " = "
+            self.emitter.emitLine(node.name + separator + self.expression(node.value) + ";")
+
+    # Arrays get static storage, since large ones don't fit on the stack (and so OpenMP threads
+    # share them), aligned for vector loads. The declaration sets every element each time it
+    # runs, like a local initializer.
+    def genArrayDeclare(self, node: ArrayDeclare) -> None:
+        self.include("string.h")
+        self.emitter.headerLine("static _Alignas(64) int " + node.name + "[" + node.size + "];")
+        count = len(node.values)
+        if count:
+            values = ", ".join(node.values) + (", " if node.trailing else "")
+            self.emitter.emitLine("memcpy(" + node.name + ", (const int[]){" + values + "}, sizeof(int) * " + str(count) + ");")
+        if count < int(node.size):
+            rest = node.name + " + " + str(count) if count else node.name
+            self.emitter.emitLine("memset(" + rest + ", 0, sizeof(int) * " + str(int(node.size) - count) + ");")
+
+    def genAssignIndex(self, node: AssignIndex) -> None:
+        self.emitter.emitLine(node.name + "[" + self.expression(node.index) + "] = " + self.expression(node.value) + ";")
+
+    # A loop gcc can vectorize: a constant trip count, and the arrays read through restrict pointers
+    # (the target, read or written, through one pointer of its own), after the scalar parts of the
+    # value are computed once.
+    def genAssignArray(self, node: AssignArray) -> None:
+        prefix = "bro_array" + str(self.arrays) + "_"
+        self.arrays += 1
+        element, scalars = elementwise(node.value, "bro_i", prefix)
+        self.emitter.emitLine("{")
+        for number, scalar in enumerate(scalars):
+            self.emitter.emitLine("int " + prefix + str(number) + " = " + self.expression(scalar) + ";")
+        self.emitter.emitLine("int *restrict bro_dst = " + node.name + ";")
+        pointers = {node.name: "bro_dst"}
+        for name in sorted({part.name for part in operands(element) if type(part) is Index} - {node.name}):
+            pointers[name] = "bro_src" + str(len(pointers) - 1)
+            self.emitter.emitLine("const int *restrict " + pointers[name] + " = " + name + ";")
+        self.emitter.emitLine("for (int bro_i = 0; bro_i < " + str(node.size) + "; bro_i++) {")
+        self.emitter.emitLine("bro_dst[bro_i] = " + self.expression(element, pointers) + ";")
+        self.emitter.emitLine("}")
+        self.emitter.emitLine("}")
+
+    # The end bound is kept in a variable of its own, so it is only evaluated once.
+    def genFor(self, node: For) -> None:
+        end = "bro_for" + str(self.loops)
+        self.loops += 1
+        self.emitter.emitLine("{")
+        self.emitter.emitLine("int " + end + " = " + self.expression(node.end) + ";")
+        if node.parallel is not None:
+            clauses = list(node.parallel)
+            if self.instrument != "off":
+                # Each thread counts the body in its own copy of the counters, added up at the end.
+                first = self.counters[id(node)] + 1
+                clauses.append("reduction(+:bro_counts[" + str(first) + ":" + str(self.ends[id(node)] - first) + "])")
+            self.emitter.emitLine(" ".join(["#pragma omp parallel for"] + clauses))
+        self.emitter.emitLine("for (int " + node.name + " = " + self.expression(node.start) + "; "
+                              + node.name + " < " + end + "; " + node.name + "++) {")
+        if self.instrument != "off":
+            self.emitter.emitLine(self.counter(node, 1) + "++;")
+        self.block(node.body)
+        self.emitter.emitLine("}")
+        self.emitter.emitLine("}")
+
+    def genInput(self, node: Input) -> None:
+        # Emit scanf but also validate the input. If invalid, set the variable to 0 and clear the input.
+        if self.fastOutput:
+            self.emitter.emitLine("bro_flush();")   # Prompts must be visible before we wait for input.
+        if node.varType == "str":
+            # Reading a word never fails, and at end of input the string is left alone.
+            self.emitter.emitLine("bro_str_read(&" + node.name + ");")
+            return
+        if self.fastInput:
+            function, address = FASTREADS[node.varType]
+            self.emitter.emitLine("if(0 == " + function + "(" + address + node.name + ")) {")
+            self.emitter.emitLine(node.name + " = 0;")
+            self.emitter.emitLine("bro_skip_word();")
+        else:
+            format, address = SCANFORMATS[node.varType]
+            self.emitter.emitLine("if(0 == scanf(\"" + format + "\", " + address + node.name + ")) {")
+            self.emitter.emitLine(node.name + " = 0;")
+            self.emitter.emitLine("scanf(\"%*s\");")
+        self.emitter.emitLine("}")
+
+    # Expressions are rendered as C source text.
+
+    # A RIZZ expression with the cast its type is printed with, if any.
+    def printed(self, node: Node, cast: str) -> str:
+        if cast:
+            return cast + "(" + self.expression(node) + ")"
+        return self.expression(node)
+
+    # pointers maps array names to the pointers they are read through, if not by name.
+    def expression(self, node: Node, pointers: dict = None) -> str:
+        kind = type(node)
+        if kind is BinaryOp:
+            right = self.expression(node.right, pointers)
+            if node.op in "+-" and right[0] in "+-":
+                right = " " + right   # a - -b, not a--b
+            return self.expression(node.left, pointers) + node.op + right
+        if kind is Number:
+            return node.text
+        if kind is Variable:
+            return node.name
+        if kind is Index:
+            name = pointers.get(node.name, node.name) if pointers else node.name
+            return name + "[" + self.expression(node.index) + "]"
+        if kind is Reduce:
+            self.useReductions()
+            return "bro_" + node.op.lower() + "(" + node.name + ", " + str(node.size) + ")"
+        if kind is UnaryOp:
+            return node.op + self.expression(node.operand, pointers)
+        return "true" if node.value else "false"
@@ -0,0 +1,176 @@
+import contextlib
+import mmap
+import os
+import time
+from chunklexer import *
+from tokenbuffer import *
+from parse import *
+from emitter import *
+from codegen import *
+from fold import *
+from partial import *
+from loops import *
+from dce import *
+from parallel import *
+from profiler import *
+from incremental import *
+
+# Bump whenever the generated C changes, so cached output from older compilers isn't reused.
+VERSION = "1.5"
+
+# Settings that change the generated C.
+class CompileOptions:
+    def __init__(self, fold: bool = False, fastOutput: bool = False, fastInput: bool = False,
+                 loops: bool = False, dce: bool = False, partialEval: bool = False, instrument: str = "off") -> None:
+        self.fold = fold
+        self.partialEval = partialEval
+        self.loops = loops
+        self.dce = dce
+        self.fastOutput = fastOutput
+        self.fastInput = fastInput
+        self.instrument = instrument
+
+    # Stable text form of the options, used in cache keys.
+    def key(self) -> str:
+        return ",".join(name + "=" + repr(value) for name, value in sorted(vars(self).items()))
+
+# Outcome of compiling one file. error is the abort message, or None on success.
+# cached is True when the C came from the compile cache, False on a cache miss and None without a cache.
+# stats holds the counters of the AST passes that ran (see parseSource).
+class CompileResult:
+    def __init__(self, path: str, outPath: str, error=None, seconds: float = 0.0) -> None:
+        self.path = path
+        self.outPath = outPath
+        self.error = error
+        self.seconds = seconds
+        self.stats = {}
+        self.cached = None
+
+# C file name for a .pog source: same name with a .c extension, inside outDir.
+def outputPath(path: str, outDir: str) -> str:
+    return os.path.join(outDir, os.path.basename(path)[:-4] + ".c")
+
+# Lex and parse source, then run the enabled AST passes. Returns (program, stats), where stats
+# counts what each pass did: folded nodes, the statements and output characters partial evaluation
+# precomputed, hoisted, reduced and unrolled for loops, removed stores, blocks and variables
+# for dead code elimination, and the SQUAD loops found and how many of them run in parallel.
+# source is the text or an already lexed TokenBuffer. lexJobs is the number of processes large
+# sources may be lexed with (None = number of CPUs). A Profiler times each phase.
+# An IncrementalParser parses a source text in its place, reusing the statements it kept from
+# the sources it parsed before; when it can't, the source is parsed as usual.
+# Compile errors abort through sys.exit like everywhere else in the compiler.
+def parseSource(source, options: CompileOptions, tracer=None, lexJobs: int = 1, profiler=None,
+                incremental=None) -> tuple:
+    phase = phases(profiler)
+    parsed = None
+    if incremental is not None and isinstance(source, str):
+        with phase("parse"):
+            parsed = incremental.parse(source)
+    if parsed is not None:
+        program, ident = parsed
+        if options.fold or options.partialEval or options.loops or options.dce:
+            # These passes change the tree in place, and the parser keeps it for the next source.
+            program = copyTree(program)
+    else:
+        with phase("lex"):
+            if isinstance(source, TokenBuffer):
+                lexer = source.cursor()
+            else:
+                lexer = makeLexer(source, lexJobs)
+            if profiler is not None:
+                lexer = profiler.replay(lexer)
+        with phase("parse"):
+            parser = Parser(lexer)
+            if tracer is not None:
+                tracer.attach(parser)
+            program = parser.program() # Start the parser.
+        ident = parser.ident
+    if profiler is not None:
+        profiler.countStatements(program.statements)
+
+    stats = {}
+    if options.fold:
+        with phase("fold"):
+            folder = ConstantFolder()
+            folder.fold(program)
+        stats["folded"] = folder.folded
+    if options.partialEval:
+        with phase("partialEval"):
+            evaluator = PartialEvaluator()
+            evaluator.evaluate(program)
+        stats.update(evaluated=evaluator.evaluated, output=evaluator.output)
+    if options.loops:
+        with phase("loops"):
+            optimizer = LoopOptimizer(ident)
+            optimizer.optimize(program)
+        stats.update(hoisted=optimizer.hoisted, reduced=optimizer.reduced, unrolled=optimizer.unrolled)
+    if options.dce:
+        with phase("dce"):
+            eliminator = DeadCodeEliminator()
+            eliminator.eliminate(program)
+        stats.update(stores=eliminator.stores, blocks=eliminator.blocks, variables=eliminator.variables)
+    with phase("parallel"):
+        analyzer = ParallelAnalyzer()
+        analyzer.analyze(program)
+    stats.update(squads=analyzer.loops, parallel=analyzer.parallel)
+    return program, stats
+
+# Lex, parse and generate C for source into outPath. Returns the stats of the AST passes.
+# sourcePath is the file source came from, which instrumented C names in its #line directives.
+def compileSource(source, outPath: str, options: CompileOptions, tracer=None, lexJobs: int = 1,
+                  profiler=None, sourcePath: str = None, incremental=None) -> dict:
+    program, stats = parseSource(source, options, tracer, lexJobs, profiler, incremental)
+    phase = phases(profiler)
+    with phase("codegen"):
+        emitter = Emitter(outPath)
+        generator = CodeGenerator(emitter, options.fastOutput, options.fastInput, options.instrument, sourcePath)
+        generator.generate(program) # Walk the tree and emit the C code
+    with phase("write"):
+        emitter.writeFile() # writes the file
+    return stats
+
+# Profiler.phase, or a phase that measures nothing without a profiler.
+def phases(profiler):
+    if profiler is not None:
+        return profiler.phase
+    return lambda name: contextlib.nullcontext()
+
+# Compile one file, turning an abort into an error result so a batch can carry on.
+# With a cache, unchanged sources reuse the C generated last time instead of being compiled.
+# mapped lexes the file from a memory map into a TokenBuffer instead of reading it into a string.
+# incremental is the IncrementalParser that parsed the file's earlier versions, if any.
+def compileFile(path: str, outDir: str, options: CompileOptions, cache=None, tracer=None, lexJobs: int = 1,
+                mapped: bool = False, profiler=None, incremental=None) -> CompileResult:
+    result = CompileResult(path, outputPath(path, outDir))
+    start = time.perf_counter()
+    source = None
+    phase = phases(profiler)
+    try:
+        with phase("read"):
+            if mapped:
+                source = mapSource(path)
+            else:
+                with open(path, 'r') as inputFile:
+                    source = inputFile.read()
+        if cache is not None:
+            settings = options.key()
+            if options.instrument != "off":
+                settings += ",path=" + os.path.abspath(path)   # named in the #line directives
+            key = cache.key(source, VERSION, settings)
+            result.cached = cache.fetch(key, result.outPath)
+        if not result.cached:
+            if mapped:
+                with phase("lex"):
+                    source = TokenBuffer(source)
+            result.stats = compileSource(source, result.outPath, options, tracer, lexJobs, profiler, path, incremental)
+            if cache is not None:
+                cache.store(key, result.outPath)
+    except SystemExit as e:
+        result.error = str(e.code)
+    except Exception as e:
+        result.error = type(e).__name__ + ": " + str(e)
+    finally:
+        if isinstance(source, (TokenBuffer, mmap.mmap)):
+            source.close()
+    result.seconds = time.perf_counter() - start
+    return result
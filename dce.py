@@ -0,0 +1,121 @@
+import copy
+from nodes import *
+from analysis import *
+from fold import *
+
+# Dead code elimination over the AST (--dce), driven by a backward liveness analysis: a store
+# whose value is never read before the next store is removed, along with any variable that ends
+# up unused, IS ... CHAT or ONLY IN OHIO blocks whose condition folds to false, and IS ... CHAT
+# blocks left empty.
+# SKIBIDI keeps its variable's old value at end of input, so it is neither a use nor a kill.
+# Stores whose value may trap (int division) are kept, so a program still stops where it did.
+class DeadCodeEliminator:
+    def __init__(self) -> None:
+        self.stores = 0         # assignments and declarations removed
+        self.blocks = 0         # blocks removed because they never run or are empty
+        self.variables = 0      # variables no longer declared at all
+        self.removedDeclares = []
+
+    def eliminate(self, program: Program) -> Program:
+        before = self.referenced(program.statements)
+        self.block(program.statements, set(), True)
+
+        # The first declaration of a variable also declares it. If that one was removed but the
+        # variable is still used, reserve the declaration at the start of the program.
+        after = self.referenced(program.statements)
+        reserved = [Declare(statement.varType, statement.name, None, True)
+                    for statement in self.removedDeclares if statement.name in after]
+        program.statements[:0] = reserved
+        self.variables = len(before - after)
+        return program
+
+    # Backward pass over statements with the variables live after them; returns the variables live
+    # before them. With sweep set, dead statements are removed from the list as well.
+    def block(self, statements: list, live: set, sweep: bool) -> set:
+        kept = []
+        for statement in reversed(statements):
+            kind = type(statement)
+            if kind is Print:
+                live = live | reads([statement])
+            elif kind is AssignIndex:
+                # Only changes one element, so the array stays live.
+                live = live | {statement.name} | variables(statement.index) | variables(statement.value)
+            elif kind is AssignArray:
+                # Kept like an element store: removing the array's declaration would leave it undeclared.
+                live = live | {statement.name} | variables(statement.value)
+            elif kind in (Assign, Declare, ArrayDeclare):
+                if statement.name not in live and self.removable(statement):
+                    if sweep:
+                        self.remove(statement)
+                    continue
+                live = live - {statement.name}
+                if kind is not ArrayDeclare:
+                    live = live | variables(statement.value)
+            elif kind is If or kind is While:
+                if self.isFalse(statement.condition):
+                    if sweep:
+                        self.blocks += 1
+                        self.removeBody(statement.body)
+                    continue
+                if kind is If:
+                    live = live | variables(statement.condition) | self.block(statement.body, live, sweep)
+                    if sweep and not statement.body and not mayTrap(statement.condition):
+                        self.blocks += 1
+                        continue
+                else:
+                    # Live at the top of the loop: what is live after it, what the condition reads
+                    # and what the body reads before writing, for as many trips as it takes to settle.
+                    head = live | variables(statement.condition)
+                    while True:
+                        grown = head | self.block(statement.body, head, False)
+                        if grown == head:
+                            break
+                        head = grown
+                    if sweep:
+                        self.block(statement.body, head, True)
+                    live = head
+            elif kind is For:
+                # Like a loop, but the loop variable is set on every trip and gone afterwards.
+                head = live - {statement.name}
+                while True:
+                    grown = head | (self.block(statement.body, head, False) - {statement.name})
+                    if grown == head:
+                        break
+                    head = grown
+                if sweep:
+                    self.block(statement.body, head, True)
+                live = head | variables(statement.start) | variables(statement.end)
+            kept.append(statement)
+        if sweep:
+            kept.reverse()
+            statements[:] = kept
+        return live
+
+    def removable(self, statement: Node) -> bool:
+        if type(statement) is ArrayDeclare or (type(statement) is Declare and statement.varType == "str"):
+            return True
+        return statement.value is None or not mayTrap(statement.value)
+
+    def remove(self, statement: Node) -> None:
+        self.stores += 1
+        if type(statement) is Declare and statement.isNew:
+            self.removedDeclares.append(statement)
+
+    # Everything in a block that never runs, counted like any other removed store.
+    def removeBody(self, statements: list) -> None:
+        for statement in statements:
+            kind = type(statement)
+            if kind in (Assign, Declare, ArrayDeclare):
+                self.remove(statement)
+            elif kind in (If, While, For):
+                self.removeBody(statement.body)
+
+    def isFalse(self, condition: Node) -> bool:
+        folded = ConstantFolder().expression(copy.deepcopy(condition))
+        if type(folded) is Number:
+            return float(folded.text) == 0
+        return type(folded) is Bool and not folded.value
+
+    # Names read or written anywhere in the statements.
+    def referenced(self, statements: list) -> set:
+        return reads(statements) | set(writes(statements))
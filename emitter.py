@@ -1,23 +1,85 @@
+import shutil
+import tempfile
+
 # keeps track of code and outputs the code into c
+# The prelude (includes and file-scope runtime code) is written first, then the header, which opens main().
+# Code is collected in chunk lists. Once the main body grows past bufferSize it is streamed
+# to a temporary spill file, so only the header and ender are ever held in memory in full.
+# With markLines, body lines are attributed to the .pog source through #line directives: each one
+# belongs to sourceLine, and the ender goes back to the C file's own numbering.
 class Emitter:
-    def __init__(self, fullPath) -> None:
+    def __init__(self, fullPath, bufferSize: int = 1 << 16) -> None:
         self.fullPath = fullPath
-        self.header = ""
-        self.code = ""
-        self.ender = ""
-    
+        self.prelude = []
+        self.header = []
+        self.code = []          # body chunks not yet written to the spill file
+        self.codeSize = 0
+        self.ender = []
+        self.bufferSize = bufferSize
+        self.spill = None       # temporary file holding the body written so far
+        self.sourceName = None  # .pog path #line directives name, once markLines is called
+        self.sourceLine = None  # .pog line the next body lines belong to
+        self.nextLine = None    # line the C compiler gives the next body line
+        self.codeLines = 0      # body lines emitted, directives included
+
     def emit(self, code: str) -> None:
-        self.code += code
-    
+        self.code.append(code)
+        self.codeSize += len(code)
+        if self.codeSize >= self.bufferSize:
+            self.flush()
+
     def emitLine(self, code: str) -> None:
-        self.code += code + '\n'
-    
+        if self.sourceName is not None:
+            self.markLine(code)
+        self.emit(code + '\n')
+
+    def markLines(self, sourceName: str) -> None:
+        self.sourceName = sourceName
+
+    # A #line directive ahead of code, unless the C compiler already numbers it sourceLine.
+    def markLine(self, code: str) -> None:
+        if self.sourceLine is not None and self.sourceLine != self.nextLine:
+            self.emit("#line " + str(self.sourceLine) + " " + quoted(self.sourceName) + "\n")
+            self.codeLines += 1
+            self.nextLine = self.sourceLine
+        lines = code.count('\n') + 1
+        self.codeLines += lines
+        if self.nextLine is not None:
+            self.nextLine += lines
+
+    def preludeLine(self, code: str) -> None:
+        self.prelude.append(code + '\n')
+
     def headerLine(self, code: str) -> None:
-        self.header += code + '\n'
+        self.header.append(code + '\n')
 
     def enderLine(self, code: str) -> None:
-        self.ender += code + '\n'
-    
+        self.ender.append(code + '\n')
+
+    # Stream buffered body chunks out to the spill file.
+    def flush(self) -> None:
+        if self.spill is None:
+            self.spill = tempfile.TemporaryFile('w+')
+        self.spill.writelines(self.code)
+        self.code = []
+        self.codeSize = 0
+
     def writeFile(self):
         with open(self.fullPath, 'w') as outputFile:
-            outputFile.write(self.header + self.code + self.ender) 
\ No newline at end of file
+            outputFile.writelines(self.prelude)
+            outputFile.writelines(self.header)
+            if self.spill is not None:
+                self.spill.flush()
+                self.spill.seek(0)
+                shutil.copyfileobj(self.spill, outputFile)
+                self.spill.close()
+                self.spill = None
+            outputFile.writelines(self.code)
+            if self.sourceName is not None:
+                before = sum(chunk.count('\n') for chunk in self.prelude + self.header) + self.codeLines
+                outputFile.write("#line " + str(before + 2) + " " + quoted(self.fullPath) + "\n")
+            outputFile.writelines(self.ender)
+
+# A C string literal of a file name, for #line.
+def quoted(name: str) -> str:
+    return "\"" + name.replace("\\", "\\\\").replace("\"", "\\\"") + "\""
@@ -0,0 +1,94 @@
+import re
+from lexer import *
+from tok import *
+
+# Single characters and operators that map straight to a token type.
+OPERATORS = {"+": TokenType.PLUS,
+             "-": TokenType.MINUS,
+             "*": TokenType.ASTERISK,
+             "/": TokenType.SLASH,
+             "[": TokenType.ARRSTART,
+             "]": TokenType.ARREND,
+             ",": TokenType.ARRCOMMA,
+             "\n": TokenType.NEWLINE,
+             "==": TokenType.EQEQ,
+             "!=": TokenType.NOTEQ,
+             ">": TokenType.GT,
+             ">=": TokenType.GTEQ,
+             "<": TokenType.LT,
+             "<=": TokenType.LTEQ}
+
+# Master pattern for the common ASCII case: skip whitespace and a comment, then one token.
+# Group 1 = identifier/keyword, 2 = number, 3 = operator, 4 = string.
+MASTER = re.compile(r'[ \t\r]*(?:#[^\n]*)?'
+                    r'(?:([A-Za-z][A-Za-z0-9]*)'
+                    r'|([0-9]+(?:\.[0-9]+)?)'
+                    r'|(==|!=|>=?|<=?|[-+*/\[\],\n])'
+                    r'|("[^"\r\n\t\\%]*"))')
+
+# Operators and keywords always have the same text, so one shared (read-only) Token each is enough.
+# FastLexer extends this per source with the identifiers and numbers it has seen.
+FIXEDTOKENS = {text: Token(text, kind) for text, kind in list(OPERATORS.items()) + list(KEYWORDS.items())}
+
+# The shared NEWLINE token, which FastLexer counts lines by.
+NEWLINETOKEN = FIXEDTOKENS["\n"]
+
+# How many tokens FastLexer matches ahead of the parser in one go.
+BATCHSIZE = 512
+
+# Same as Lexer but matches a whole token per step with the master pattern, a batch at a time.
+# Anything the pattern can't decide on its own (errors, non-ASCII text, '\0') falls back to
+# Lexer.getToken once the parser reaches it, so the token stream and error messages are exactly the same.
+class FastLexer(Lexer):
+    def __init__(self, source: str) -> None:
+        super().__init__(source)
+        self.pending = iter(())   # Tokens matched ahead of the parser.
+        self.seen = dict(FIXEDTOKENS)   # Text -> shared Token for everything except strings.
+
+    # Return the next token.
+    def getToken(self) -> Token:
+        token = next(self.pending, None)
+        if token is None:
+            return self.refill()
+        # Strings the pattern matches never hold a newline, so only NEWLINE tokens end a line.
+        self.line = self.nextLine
+        if token is NEWLINETOKEN:
+            self.nextLine += 1
+        return token
+
+    # Match the next batch of tokens starting at curPos and return the first one.
+    def refill(self) -> Token:
+        source = self.source
+        length = len(source)
+        seen = self.seen
+        tokens = []
+        append = tokens.append
+        pos = self.curPos
+
+        for m in MASTER.finditer(source, pos):
+            if m.start() != pos:
+                break   # The pattern skipped over something it couldn't match.
+            end = m.end()
+            group = m.lastindex
+            if end < length and group != 3 and (source[end] >= '\x80' or (group == 2 and source[end] == '.')):
+                break   # Unicode letters/digits or a malformed number; let the slow path decide.
+            tokText = m.group(group)
+            token = seen.get(tokText)
+            if token is None:
+                if group == 1:
+                    token = seen[tokText] = Token(tokText, TokenType.IDENT)
+                elif group == 2:
+                    token = seen[tokText] = Token(tokText, TokenType.FLOAT if '.' in tokText else TokenType.INTEGER)
+                else:
+                    token = Token(tokText, TokenType.STRING)
+            append(token)
+            pos = end
+            if len(tokens) == BATCHSIZE:
+                break
+
+        self.curPos = pos
+        self.curChar = source[pos] if pos < length else '\0'
+        if not tokens:
+            return Lexer.getToken(self)
+        self.pending = iter(tokens)
+        return self.getToken()
@@ -0,0 +1,179 @@
+import math
+from nodes import *
+
+INTMIN = -2 ** 31
+INTMAX = 2 ** 31 - 1
+
+# Constant folding and algebraic simplification over the AST, with C semantics:
+# int arithmetic truncates and must stay in range, anything mixed with a float literal is
+# computed as double, and BASED/CRINGE take part in arithmetic as 1/0.
+class ConstantFolder:
+    def __init__(self) -> None:
+        self.folded = 0         # number of expression nodes folded away
+
+    def fold(self, program: Program) -> Program:
+        self.block(program.statements)
+        return program
+
+    def block(self, statements: list) -> None:
+        for statement in statements:
+            kind = type(statement)
+            if kind is Print:
+                if statement.format not in ("string", "str"):
+                    statement.value = self.expression(statement.value)
+            elif kind is Assign or kind is AssignArray:
+                statement.value = self.expression(statement.value)
+            elif kind is Declare:
+                if statement.varType != "str":
+                    statement.value = self.expression(statement.value)
+            elif kind is AssignIndex:
+                statement.index = self.expression(statement.index)
+                statement.value = self.expression(statement.value)
+            elif kind is If or kind is While:
+                statement.condition = self.expression(statement.condition)
+                self.block(statement.body)
+            elif kind is For:
+                statement.start = self.expression(statement.start)
+                statement.end = self.expression(statement.end)
+                self.block(statement.body)
+
+    # Return (value, isFloat) for a constant node, or None if it isn't a constant.
+    def constant(self, node: Node):
+        kind = type(node)
+        if kind is Number:
+            if node.isFloat:
+                return float(node.text), True
+            value = int(node.text)
+            if INTMIN <= value <= INTMAX:
+                return value, False
+        elif kind is Bool:
+            return int(node.value), False
+        return None
+
+    # Build the literal node for a folded value, or None if C couldn't represent it the same way.
+    def literal(self, value, isFloat: bool):
+        if isFloat:
+            if not math.isfinite(value):
+                return None
+            return Number(repr(value), True)
+        if isinstance(value, bool):
+            value = int(value)
+        if not INTMIN <= value <= INTMAX:
+            return None
+        return Number(str(value), False)
+
+    # An int or bool variable; x + 0 is only an identity when x can't be -0.0.
+    def isIntegral(self, node: Node) -> bool:
+        if type(node) is Variable:
+            return node.varType != "float"
+        constant = self.constant(node)
+        return constant is not None and not constant[1]
+
+    def isInt(self, node: Node, value: int) -> bool:
+        return type(node) is Number and not node.isFloat and node.text == str(value)
+
+    def expression(self, node: Node) -> Node:
+        kind = type(node)
+        if kind is UnaryOp:
+            return self.unary(node)
+        if kind is BinaryOp:
+            return self.binary(node)
+        if kind is Index:
+            node.index = self.expression(node.index)
+        return node
+
+    def unary(self, node: UnaryOp) -> Node:
+        operand = self.expression(node.operand)
+        node.operand = operand
+
+        constant = self.constant(operand)
+        if constant is not None:
+            value, isFloat = constant
+            result = self.literal(-value if node.op == "-" else value, isFloat)
+            if result is not None:
+                self.folded += 1
+                return result
+
+        # +x is x, and - -x is x.
+        if node.op == "+":
+            self.folded += 1
+            return operand
+        if node.op == "-" and type(operand) is UnaryOp and operand.op == "-":
+            self.folded += 2
+            return operand.operand
+        return node
+
+    def binary(self, node: BinaryOp) -> Node:
+        left = node.left = self.expression(node.left)
+        right = node.right = self.expression(node.right)
+        op = node.op
+
+        leftConstant = self.constant(left)
+        rightConstant = self.constant(right)
+        if leftConstant is not None and rightConstant is not None:
+            result = self.evaluate(op, leftConstant, rightConstant)
+            if result is not None:
+                self.folded += 1
+                return result
+
+        # x - -y is x + y, and x + -y is x - y.
+        if op in ("+", "-") and type(right) is UnaryOp and right.op == "-":
+            self.folded += 1
+            node.op = "+" if op == "-" else "-"
+            node.right = right.operand
+            return node
+        if op in ("+", "-") and rightConstant is not None and rightConstant[0] < 0:
+            negated = self.literal(-rightConstant[0], rightConstant[1])
+            if negated is not None:
+                self.folded += 1
+                node.op = "+" if op == "-" else "-"
+                node.right = negated
+                return node
+
+        # Identities with an int literal. x + 0 is left alone for floats, since -0.0 + 0 is 0.0.
+        if (op == "*" and self.isInt(right, 1)) or (op == "/" and self.isInt(right, 1)) or (op == "-" and self.isInt(right, 0)):
+            self.folded += 1
+            return left
+        if op == "+" and self.isInt(right, 0) and self.isIntegral(left):
+            self.folded += 1
+            return left
+        if (op == "*" and self.isInt(left, 1)) or (op == "+" and self.isInt(left, 0) and self.isIntegral(right)):
+            self.folded += 1
+            return right
+        return node
+
+    def evaluate(self, op: str, left: tuple, right: tuple):
+        a, leftFloat = left
+        b, rightFloat = right
+        isFloat = leftFloat or rightFloat
+        if isFloat:
+            a = float(a)
+            b = float(b)
+
+        if op == "+":
+            return self.literal(a + b, isFloat)
+        if op == "-":
+            return self.literal(a - b, isFloat)
+        if op == "*":
+            return self.literal(a * b, isFloat)
+        if op == "/":
+            if b == 0:
+                return None
+            if isFloat:
+                return self.literal(a / b, True)
+            # C integer division truncates toward zero.
+            quotient = abs(a) // abs(b)
+            return self.literal(quotient if (a < 0) == (b < 0) else -quotient, False)
+
+        # Comparisons give an int 1 or 0 in C.
+        if op == "<":
+            return self.literal(int(a < b), False)
+        if op == "<=":
+            return self.literal(int(a <= b), False)
+        if op == ">":
+            return self.literal(int(a > b), False)
+        if op == ">=":
+            return self.literal(int(a >= b), False)
+        if op == "==":
+            return self.literal(int(a == b), False)
+        return self.literal(int(a != b), False)
@@ -0,0 +1,173 @@
+import re
+from fastlexer import *
+from parse import *
+from profiler import TokenReplay
+
+# First word of a line, which tells whether it opens a block (ONLY IN OHIO, IS ... CHAT, SQUAD)
+# or closes one (SUSSY, THANKS CHAT).
+FIRSTWORD = re.compile(r'[ \t\r]*([A-Za-z]+)')
+OPENERS = {"ONLY", "IS", "SQUAD"}
+CLOSERS = {"SUSSY", "THANKS"}
+
+# Split source into the text of its top-level statements, as (first line, text) pairs. Every
+# piece is one statement and the lines after it that don't start with a word: blank lines,
+# comments, and the rest of a string that ended with a newline. Lines before the first statement
+# are a piece of their own. This only looks at the first word of each line; IncrementalParser
+# checks that each piece really parses as one statement.
+def splitStatements(source: str) -> list:
+    pieces = []
+    start = 0
+    startLine = 1
+    depth = 0
+    lines = source.split('\n')
+    for number, line in enumerate(lines):
+        match = FIRSTWORD.match(line)
+        if match is None:
+            continue
+        word = match.group(1)
+        if depth == 0 and number > start:
+            pieces.append((startLine, '\n'.join(lines[start:number]) + '\n'))
+            start = number
+            startLine = number + 1
+        if word in OPENERS:
+            depth += 1
+        elif word in CLOSERS:
+            depth -= 1
+    if start < len(lines):
+        pieces.append((startLine, '\n'.join(lines[start:])))
+    return pieces
+
+# Every slot of each node class, its base classes' included.
+def nodeSlots(kind) -> tuple:
+    return tuple(name for base in reversed(kind.__mro__) for name in getattr(base, "__slots__", ()))
+
+SLOTS = {}
+
+# A copy of a tree of nodes that shares nothing the passes change with the original. Nodes made by
+# the passes may leave line unset, and the copy leaves it unset too.
+def copyTree(node):
+    kind = type(node)
+    if kind is list:
+        return [copyTree(item) for item in node]
+    if not isinstance(node, Node):
+        return node
+    slots = SLOTS.get(kind)
+    if slots is None:
+        slots = SLOTS[kind] = nodeSlots(kind)
+    copy = kind.__new__(kind)
+    for name in slots:
+        if hasattr(node, name):
+            setattr(copy, name, copyTree(getattr(node, name)))
+    return copy
+
+# One top-level statement of a source: the tokens of its text and the last parse of it. Lines are
+# counted from the start of the text. The same text elsewhere in the source gets a Fragment of its
+# own, sharing the tokens of template.
+class Fragment:
+    def __init__(self, text: str, template=None) -> None:
+        if template is not None:
+            self.tokens, self.lines, self.names = template.tokens, template.lines, template.names
+        else:
+            lexer = FastLexer(text)
+            self.tokens = []
+            self.lines = []
+            token = lexer.getToken()
+            while token.kind != TokenType.EOF:
+                self.tokens.append(token)
+                self.lines.append(lexer.line)
+                token = lexer.getToken()
+            self.names = sorted({token.text for token in self.tokens if token.kind == TokenType.IDENT})
+        self.before = None      # (type, size) of every name when the statement was parsed
+        self.after = None       # and after it
+        self.node = None        # the statement, or None for a piece without one
+        self.offset = 0         # lines the statement's line numbers are shifted by
+
+# Parses a source one top-level statement at a time and keeps every statement between calls, so
+# parsing an edited source only lexes and parses the statements whose text changed, or that use
+# a variable whose declaration changed. The rest are reused as they are, and their effect on the
+# symbol table is replayed without parsing them. The result is the same as Parser.program() on
+# the whole source.
+class IncrementalParser:
+    def __init__(self) -> None:
+        self.fragments = {}     # statement text -> Fragments of its occurrences, in source order
+        self.reused = 0         # statements reused by the last parse
+        self.parsed = 0         # and parsed again
+        self.whole = False      # whether the last source had to be parsed as a whole instead
+
+    # Returns (Program, SymbolTable), or None if the source doesn't split into statements that
+    # parse on their own (a syntax error, for one); Parser then has to take the whole source.
+    def parse(self, source: str):
+        ident = SymbolTable()
+        statements = []
+        fragments = {}
+        self.reused = self.parsed = 0
+        self.whole = True
+        for line, text in splitStatements(source):
+            occurrences = fragments.setdefault(text, [])
+            known = self.fragments.get(text, ())
+            if len(occurrences) < len(known):
+                fragment = known[len(occurrences)]
+            else:
+                try:
+                    fragment = Fragment(text, known[0] if known else (occurrences[0] if occurrences else None))
+                except SystemExit:
+                    return None
+            occurrences.append(fragment)
+            if fragment.before == self.state(ident, fragment.names):
+                self.reused += 1
+                self.apply(ident, fragment)
+            else:
+                self.parsed += 1
+                fragment.before = self.state(ident, fragment.names)
+                if not self.parseFragment(fragment, ident):
+                    fragment.before = None
+                    return None
+                fragment.after = self.state(ident, fragment.names)
+                fragment.offset = 0
+            if fragment.node is not None:
+                self.relocate([fragment.node], line - 1 - fragment.offset)
+                fragment.offset = line - 1
+                statements.append(fragment.node)
+        self.fragments = fragments
+        self.whole = False
+        return Program(statements), ident
+
+    # Parse the fragment's statement with the symbol table as it is at that point of the source.
+    def parseFragment(self, fragment: Fragment, ident: SymbolTable) -> bool:
+        parser = Parser(TokenReplay(fragment.tokens, None, fragment.lines))
+        parser.ident = ident
+        try:
+            while parser.checkToken(TokenType.NEWLINE):
+                parser.nextToken()
+            fragment.node = None
+            if not parser.checkToken(TokenType.EOF):
+                fragment.node = parser.statement()
+        except SystemExit:
+            return False
+        return parser.checkToken(TokenType.EOF)
+
+    # Type and size of every name in names.
+    def state(self, ident: SymbolTable, names: list) -> list:
+        return [(ident.types.get(name), ident.sizes.get(name)) for name in names]
+
+    # Give the names of a fragment the types and sizes its statement left them with.
+    def apply(self, ident: SymbolTable, fragment: Fragment) -> None:
+        for name, (varType, size) in zip(fragment.names, fragment.after):
+            if varType is None:
+                ident.types.pop(name, None)
+            else:
+                ident.types[name] = varType
+            if size is None:
+                ident.sizes.pop(name, None)
+            else:
+                ident.sizes[name] = size
+
+    # Shift the line numbers of statements and everything nested in them.
+    def relocate(self, statements: list, shift: int) -> None:
+        if shift == 0:
+            return
+        for statement in statements:
+            if getattr(statement, "line", None) is not None:
+                statement.line += shift
+            if type(statement) in (If, While, For):
+                self.relocate(statement.body, shift)
@@ -6,6 +6,8 @@ class Lexer:
         self.source = source + '\n' # Source code to lex as a string. Append a newline to simplify lexing/parsing the last token/statement.
         self.curChar = ''   # Current character in the string.
         self.curPos = -1    # Current position in the string.
+        self.line = 0       # Line of the last token returned by getToken, counting from 1.
+        self.nextLine = 1   # Line the next token starts on.
         self.nextChar()
 
     # Process the next character.
@@ -162,4 +164,9 @@ class Lexer:
             self.abort("Unknown token: " + self.curChar)
 			
         self.nextChar()
+        self.line = self.nextLine
+        if token.kind == TokenType.NEWLINE:
+            self.nextLine += 1
+        elif token.kind == TokenType.STRING:
+            self.nextLine += token.text.count('\n')  # A string may end with a newline.
         return token
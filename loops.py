@@ -0,0 +1,297 @@
+import copy
+from nodes import *
+from symbols import *
+from analysis import *
+from fold import INTMIN, INTMAX
+
+MAXTRIPS = 16           # loops that run at most this many times can be unrolled
+UNROLLBUDGET = 64       # if the unrolled copies add up to at most this many statements
+
+COMPARE = {"<": lambda a, b: a < b, "<=": lambda a, b: a <= b,
+           ">": lambda a, b: a > b, ">=": lambda a, b: a >= b,
+           "==": lambda a, b: a == b, "!=": lambda a, b: a != b}
+
+def wrapInt(value: int) -> int:
+    return ((value + 2 ** 31) & 0xFFFFFFFF) - 2 ** 31
+
+# Loop optimizations for ONLY IN OHIO over the AST, with the same results as the plain loops.
+# Inner loops are optimized first. A loop whose trip count is a small constant is unrolled;
+# otherwise invariant assignments are hoisted out of it, i * c for a counter i becomes a running
+# sum, and invariant subexpressions are computed once into temporaries. Hoisted code runs in a
+# preheader guarded by the loop condition ("IS cond CHAT ... ONLY IN OHIO cond"), so a loop that
+# never runs still changes nothing. SQUAD loops are left as written, so ParallelAnalyzer sees
+# their bodies as the programmer wrote them.
+class LoopOptimizer:
+    def __init__(self, ident: SymbolTable) -> None:
+        self.ident = ident      # Parser's symbol table; temporaries are declared in it too
+        self.hoisted = 0        # assignments and subexpressions moved out of loops
+        self.reduced = 0        # multiplications turned into additions
+        self.unrolled = 0       # loops replaced by copies of their body
+        self.temps = 0
+
+    def optimize(self, program: Program) -> Program:
+        program.statements = self.block(program.statements)
+        return program
+
+    def block(self, statements: list) -> list:
+        result = []
+        for statement in statements:
+            kind = type(statement)
+            if kind is If:
+                statement.body = self.block(statement.body)
+            elif kind is While:
+                statement.body = self.block(statement.body)
+                copies = self.unroll(statement, result)
+                if copies is not None:
+                    result.extend(copies)
+                    continue
+                statement = self.loop(statement)
+            result.append(statement)
+        return result
+
+    # Hoist and strength-reduce one loop. Returns the loop, or the guarded preheader holding it.
+    def loop(self, loop: While) -> Node:
+        guard = copy.deepcopy(loop.condition)
+        preheader = []
+        self.hoistAssignments(loop, preheader)
+        self.reduceStrength(loop, preheader)
+        self.hoistExpressions(loop, preheader)
+        if not preheader:
+            return loop
+        return If(guard, preheader + [loop])
+
+    # Unrolling
+
+    # The loop body repeated once per trip, or None unless the loop is "i <op> constant" with i set
+    # to a constant just before it and stepped by a constant exactly once per trip.
+    def unroll(self, loop: While, preceding: list):
+        condition = loop.condition
+        if type(condition) is not BinaryOp or condition.op not in COMPARE:
+            return None
+        if type(condition.left) is not Variable or condition.left.varType != "int":
+            return None
+        bound = self.intValue(condition.right)
+        counter = condition.left.name
+        step = self.step(loop.body, counter)
+        start = self.startValue(preceding, counter)
+        if bound is None or step is None or start is None or self.intValue(step[2]) is None:
+            return None
+
+        sign = 1 if step[1] == "+" else -1
+        value = start
+        trips = 0
+        while COMPARE[condition.op](value, bound):
+            trips += 1
+            if trips > MAXTRIPS:
+                return None
+            value = wrapInt(value + sign * self.intValue(step[2]))
+        if trips * self.size(loop.body) > UNROLLBUDGET or self.hasArray(loop.body):
+            return None
+
+        # A loop that never runs still declares the variables it declares first.
+        copies = self.declarations(loop.body) if trips == 0 else []
+        for trip in range(trips):
+            # Only the first copy declares its variables; the rest reuse them.
+            body = loop.body if trip == 0 else self.redeclared(copy.deepcopy(loop.body))
+            copies.extend(body)
+        self.unrolled += 1
+        return copies
+
+    # Value of the int constant set to name by the closest statement before the loop that writes it.
+    def startValue(self, preceding: list, name: str):
+        for statement in reversed(preceding):
+            if name in writes([statement]):
+                if type(statement) in (Assign, Declare) and statement.name == name:
+                    return self.intValue(statement.value)
+                return None
+        return None
+
+    def size(self, statements: list) -> int:
+        total = 0
+        for statement in statements:
+            total += 1
+            if type(statement) in (If, While, For):
+                total += self.size(statement.body)
+        return total
+
+    # An int[] declared inside the body would be declared twice in the same C block.
+    def hasArray(self, statements: list) -> bool:
+        for statement in statements:
+            if type(statement) is ArrayDeclare:
+                return True
+            if type(statement) in (If, While, For) and self.hasArray(statement.body):
+                return True
+        return False
+
+    # Header-only copies of the first declarations in statements, at any depth, as
+    # DeadCodeEliminator reserves them.
+    def declarations(self, statements: list) -> list:
+        result = []
+        for statement in statements:
+            if type(statement) is Declare and statement.isNew:
+                result.append(Declare(statement.varType, statement.name, None, True))
+            elif type(statement) in (If, While, For):
+                result.extend(self.declarations(statement.body))
+        return result
+
+    def redeclared(self, statements: list) -> list:
+        for statement in statements:
+            if type(statement) is Declare:
+                statement.isNew = False
+            elif type(statement) in (If, While, For):
+                self.redeclared(statement.body)
+        return statements
+
+    # Hoisting
+
+    # Move "x IS e" out of the loop when e doesn't change inside it, x is written nowhere else in
+    # the loop, and neither the condition nor an earlier statement reads x on the first trip.
+    def hoistAssignments(self, loop: While, preheader: list) -> None:
+        changed = True
+        while changed:
+            changed = False
+            written = writes(loop.body)
+            readBefore = variables(loop.condition)
+            for index, statement in enumerate(loop.body):
+                if (type(statement) in (Assign, Declare) and written[statement.name] == 1
+                        and statement.name not in readBefore and self.ident.lookup(statement.name) != "str"
+                        and self.invariant(statement.value, written)):
+                    preheader.append(statement)
+                    del loop.body[index]
+                    self.hoisted += 1
+                    changed = True
+                    break
+                readBefore |= reads([statement])
+
+    # Replace the largest invariant arithmetic subexpressions in the loop by temporaries computed
+    # in the preheader. Equal subexpressions share one temporary.
+    def hoistExpressions(self, loop: While, preheader: list) -> None:
+        written = writes(loop.body)
+        temps = {}
+
+        def replace(node: Node) -> Node:
+            kind = type(node)
+            if kind is BinaryOp and node.op in ARITHMETIC and self.invariant(node, written) and variables(node):
+                key = repr(node)
+                if key not in temps:
+                    temps[key] = self.temporary(node, preheader)
+                    self.hoisted += 1
+                return temps[key]
+            if kind is BinaryOp:
+                node.left = replace(node.left)
+                node.right = replace(node.right)
+            elif kind is UnaryOp:
+                node.operand = replace(node.operand)
+            return node
+
+        loop.condition = replace(loop.condition)
+        rewrite(loop.body, replace)
+
+    # Strength reduction
+
+    # For a counter stepped once per trip by "i IS i + k" with k invariant, replace i * c (c an
+    # invariant int) by a temporary t set to i * c before the loop and stepped by k * c after i is.
+    def reduceStrength(self, loop: While, preheader: list) -> None:
+        written = writes(loop.body)
+        for name in [statement.name for statement in loop.body if type(statement) in (Assign, Declare)]:
+            step = self.step(loop.body, name)
+            if step is None or self.ident.lookup(name) != "int":
+                continue
+            index, op, increment = step
+            if not self.invariant(increment, written) or expressionType(increment) != "int":
+                continue
+            temps = {}
+
+            def replace(node: Node) -> Node:
+                kind = type(node)
+                if kind is BinaryOp:
+                    if node.op == "*":
+                        factor = self.factor(node.left, node.right, name, written)
+                        if factor is None:
+                            factor = self.factor(node.right, node.left, name, written)
+                        if factor is not None:
+                            key = repr(factor)
+                            if key not in temps:
+                                temps[key] = (self.temporary(BinaryOp("*", Variable(name, "int"), factor), preheader), factor)
+                                self.reduced += 1
+                            return temps[key][0]
+                    node.left = replace(node.left)
+                    node.right = replace(node.right)
+                elif kind is UnaryOp:
+                    node.operand = replace(node.operand)
+                return node
+
+            loop.condition = replace(loop.condition)
+            rewrite(loop.body, replace)
+            updates = []
+            for temp, factor in temps.values():
+                value = self.intValue(increment), self.intValue(factor)
+                if None not in value:
+                    stride = Number(str(wrapInt(value[0] * value[1])), False)
+                elif value[0] == 1:
+                    stride = copy.deepcopy(factor)
+                else:
+                    stride = BinaryOp("*", copy.deepcopy(increment), copy.deepcopy(factor))
+                updates.append(Assign(temp.name, BinaryOp(op, Variable(temp.name, "int"), stride)))
+            loop.body[index + 1:index + 1] = updates
+
+    # The invariant int factor c of counter * c, or None.
+    def factor(self, node: Node, other: Node, counter: str, written: dict):
+        if type(node) is not Variable or node.name != counter:
+            return None
+        if expressionType(other) != "int" or not self.invariant(other, written):
+            return None
+        return other
+
+    # Helpers
+
+    # (index, op, k) for the one top-level "name IS name + k" or "name IS name - k" of the body,
+    # when nothing else in the loop writes name.
+    def step(self, body: list, name: str):
+        if writes(body).get(name) != 1:
+            return None
+        for index, statement in enumerate(body):
+            if type(statement) in (Assign, Declare) and statement.name == name:
+                value = statement.value
+                if (type(value) is BinaryOp and value.op in ("+", "-") and type(value.left) is Variable
+                        and value.left.name == name and name not in variables(value.right)):
+                    return index, value.op, value.right
+        return None
+
+    # Whether node has the same value on every trip and can be evaluated early without trapping:
+    # int division is never moved, since a guard in the loop might be what keeps it from dividing by 0,
+    # and neither is indexing, for the same reason.
+    def invariant(self, node: Node, written: dict) -> bool:
+        kind = type(node)
+        if kind is Index:
+            return False
+        if kind is Variable:
+            # A whole array in an AssignArray value stands for a different element at each position.
+            return node.name not in written and node.varType != "int[]"
+        if kind is Reduce:
+            return node.name not in written
+        if kind is UnaryOp:
+            return self.invariant(node.operand, written)
+        if kind is BinaryOp:
+            if node.op == "/" and cType(node) == "int":
+                return False
+            return self.invariant(node.left, written) and self.invariant(node.right, written)
+        return True
+
+    def intValue(self, node: Node):
+        negate = type(node) is UnaryOp and node.op == "-"
+        if negate:
+            node = node.operand
+        if type(node) is not Number or node.isFloat:
+            return None
+        value = -int(node.text) if negate else int(node.text)
+        return value if INTMIN <= value <= INTMAX else None
+
+    # Declare a new variable of the expression's C type holding value, at the end of the preheader.
+    def temporary(self, value: Node, preheader: list) -> Variable:
+        name = "bro_loop" + str(self.temps)
+        self.temps += 1
+        varType = cType(value)
+        self.ident.declare(name, varType)
+        preheader.append(Declare(varType, name, value, True))
+        return Variable(name, varType)
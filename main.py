@@ -1,23 +1,216 @@
-from lexer import *
-from parse import *
-from tok import *
-from emitter import *
+from compiler import *
+from batch import *
+from cache import *
+from build import *
+from vm import *
+from tracer import *
+from profiler import *
+from watch import *
+import argparse
+import glob
 import os
+import sys
+import tempfile
+import time
+
+# argv defaults to the command line. run carries out --run (default: runProgram); the compile
+# server passes one that only builds the program.
+def main(argv: list = None, run=None):
+    argParser = argparse.ArgumentParser(description="Compile .pog files to C.")
+    argParser.add_argument("sources", nargs="+",
+                           help="source files, directories or glob patterns; more than one file compiles them as a batch")
+    argParser.add_argument("-o", "--out-dir", default="code-examples/compiled",
+                           help="directory the C files are written to")
+    argParser.add_argument("-j", "--jobs", type=int, default=None,
+                           help="worker processes for batch compilation (default: number of CPUs)")
+    argParser.add_argument("--lex-jobs", type=int, default=None,
+                           help="worker processes for lexing a single source of 1 MiB or more (default: number of CPUs; 1 lexes in-process)")
+    argParser.add_argument("--mmap", action="store_true",
+                           help="lex a single source from a memory-mapped file into a compact token buffer instead of reading it into a string")
+    argParser.add_argument("--trace", choices=TRACEMODES, default="off",
+                           help="trace parser productions: off, counts (calls and time per production) or full (also print every call); single file only")
+    argParser.add_argument("--profile", metavar="FILE", default=None,
+                           help="write a JSON profile of the compilation to FILE: time and peak memory per phase, tokens by type, statements by kind and parser productions; single file only")
+    argParser.add_argument("--cprofile", metavar="FILE", default=None,
+                           help="with --profile, also run the compilation under cProfile and dump its stats to FILE")
+    argParser.add_argument("--fold", action="store_true",
+                           help="fold constant expressions and simplify identities at compile time")
+    argParser.add_argument("--loops", action="store_true",
+                           help="optimize ONLY IN OHIO loops: hoist invariant code, turn counter multiplications into additions and unroll short constant loops")
+    argParser.add_argument("--partial-eval", action="store_true",
+                           help="run the statements before the first SKIBIDI at compile time and emit their output as is")
+    argParser.add_argument("--dce", action="store_true",
+                           help="remove stores nobody reads, unused variables and blocks that never run")
+    argParser.add_argument("--instrument", choices=INSTRUMENTMODES, default="off",
+                           help="count how often every statement runs and every loop goes around (counts), and also time ONLY IN OHIO loops (cycles); the program writes the counts by .pog line to NAME.prof or $BRO_PROFILE when it exits, and #line directives map the C back to the .pog source")
+    argParser.add_argument("--fast-output", action="store_true",
+                           help="print through a buffered runtime with hand-rolled number formatting instead of printf")
+    argParser.add_argument("--fast-input", action="store_true",
+                           help="read SKIBIDI input through a block-buffered runtime instead of scanf")
+    argParser.add_argument("--cache-dir", default=".pogcache",
+                           help="directory of the compilation cache")
+    argParser.add_argument("--cache-size", type=float, default=256,
+                           help="maximum size of the compilation cache in MB")
+    argParser.add_argument("--no-cache", action="store_true",
+                           help="always compile, without reading or writing the cache")
+    argParser.add_argument("--run", action="store_true",
+                           help="build the generated C with the system C compiler and run it; single file only")
+    argParser.add_argument("--backend", choices=["c", "vm"], default="c",
+                           help="how --run executes the program: build the C (default) or interpret bytecode in the VM")
+    argParser.add_argument("--opt-level", choices=OPTLEVELS, default="2",
+                           help="C compiler optimization level for --run (default: 2)")
+    argParser.add_argument("--watch", action="store_true",
+                           help="keep running and recompile every source whenever it changes, only lexing and parsing the top-level statements that changed")
+    argParser.add_argument("--interval", type=float, default=0.5,
+                           help="seconds between checks for changes with --watch (default: 0.5)")
+    args = argParser.parse_args(argv)
+    options = CompileOptions(fold=args.fold, fastOutput=args.fast_output, fastInput=args.fast_input,
+                             loops=args.loops, dce=args.dce, partialEval=args.partial_eval,
+                             instrument=args.instrument)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    # Tracing and profiling need a real parse, so they never take C from the cache.
+    cache = None
+    if not args.no_cache and args.trace == "off" and args.profile is None:
+        cache = CompileCache(args.cache_dir, int(args.cache_size * 1024 * 1024))
+
+    isBatch = len(args.sources) > 1 or any(os.path.isdir(item) or glob.has_magic(item) for item in args.sources)
+    if args.cprofile is not None and args.profile is None:
+        sys.exit("Error: --cprofile needs --profile.")
+    if args.profile is not None and (isBatch or args.run):
+        sys.exit("Error: --profile takes a single source file and can't be combined with --run.")
+    if args.watch:
+        if args.run or args.profile is not None or args.trace != "off" or args.mmap:
+            sys.exit("Error: --watch can't be combined with --run, --profile, --trace or --mmap.")
+        # Every change is new source, so watching doesn't read or write the cache.
+        Watcher(args.sources, args.out_dir, options, args.interval).run()
+        return
+    if args.run:
+        if isBatch:
+            sys.exit("Error: --run takes a single source file.")
+        if args.backend == "vm" and args.instrument != "off":
+            sys.exit("Error: --instrument needs the C backend.")
+        sys.exit((run or runProgram)(args, options, cache))
 
-def main():
     print("Brainrot Compiler")
+    if isBatch:
+        results = compileBatch(findSources(args.sources), args.out_dir, options, args.jobs, cache)
+        failed = printSummary(results)
+    else:
+        tracer = Tracer(args.trace)
+        profiler = None
+        if args.profile is not None:
+            # The profile always counts productions, even when they aren't traced.
+            productions = tracer if args.trace != "off" else Tracer("counts")
+            profiler = Profiler(args.cprofile)
+            profiler.start()
+            results = [compileFile(args.sources[0], args.out_dir, options, cache, productions, args.lex_jobs, args.mmap, profiler)]
+            profiler.stop()
+            writeProfile(profiler.report(args.sources[0], options, results[0].stats, productions), args.profile)
+        else:
+            results = [compileFile(args.sources[0], args.out_dir, options, cache, tracer, args.lex_jobs, args.mmap)]   # create c file with same name as original file
+        if results[0].error is not None:
+            sys.exit(results[0].error)
+        failed = 0
+        if results[0].cached:
+            print("Reused cached C for unchanged source.")
+        else:
+            stats = results[0].stats
+            if args.fold:
+                print("Folded " + str(stats["folded"]) + " expression nodes.")
+            if args.partial_eval:
+                print("Precomputed %d top-level statements and %d characters of output."
+                      % (stats["evaluated"], stats["output"]))
+            if args.loops:
+                print("Loops: hoisted %d, strength-reduced %d, unrolled %d."
+                      % (stats["hoisted"], stats["reduced"], stats["unrolled"]))
+            if args.dce:
+                print("Removed %d dead stores, %d dead blocks and %d unused variables."
+                      % (stats["stores"], stats["blocks"], stats["variables"]))
+            if stats["squads"]:
+                print("Parallelized %d of %d SQUAD loops." % (stats["parallel"], stats["squads"]))
+        if args.instrument != "off":
+            print("Instrumented; the program writes its profile to " + instrumentProfile(args.sources[0]) + " when it exits.")
+        print("Parsing completed.")
+        tracer.report()
+        if profiler is not None:
+            print("Wrote profile to " + args.profile + ".")
+
+    if cache is not None:
+        printCacheStats(cache, results)
+    if failed:
+        sys.exit(1)
+
+# Transpile, build and run one program. Stdout belongs to the program, so timings go to stderr.
+# Both compile steps are cached, so running an unchanged program only pays for the run itself.
+def runProgram(args, options: CompileOptions, cache) -> int:
+    if args.backend == "vm":
+        return runInVM(args, options)
+    with tempfile.TemporaryDirectory() as scratch:
+        binary, timings = buildProgram(args, options, cache, scratch)
+        sys.stdout.flush()
+        start = time.perf_counter()
+        returnCode = runExecutable(binary)
+        finished = time.perf_counter()
+    sys.stderr.write(timings + ", run %.3fs\n" % (finished - start) + runNotes(args))
+    return returnCode
+
+# Transpile and build one program for --run. Without a cache the executable is built in scratch.
+# Returns (path of the executable, the transpile and cc timings as --run reports them).
+def buildProgram(args, options: CompileOptions, cache, scratch: str) -> tuple:
+    start = time.perf_counter()
+    result = compileFile(args.sources[0], args.out_dir, options, cache, lexJobs=args.lex_jobs, mapped=args.mmap)
+    if result.error is not None:
+        sys.exit(result.error)
+    transpiled = time.perf_counter()
+
+    binDir = os.path.join(args.cache_dir, "bin") if cache is not None else scratch
+    binaries = CompileCache(binDir, cache.maxBytes if cache is not None else 0, ".bin")
+    flags = compilerFlags(args.opt_level, usesOpenMP(result.outPath), args.instrument != "off")
+    binary, built = buildExecutable(result.outPath, binaries, findCompiler(), flags)
+    compiled = time.perf_counter()
+    if cache is not None:
+        binaries.evict()
+    return binary, ("transpile %.3fs%s, cc %.3fs%s"
+                    % (transpiled - start, " (cached)" if result.cached else "",
+                       compiled - transpiled, " (cached)" if built else ""))
+
+# What --run reports on stderr after the timings.
+def runNotes(args) -> str:
+    if args.instrument != "off":
+        return "Wrote profile to " + instrumentProfile(args.sources[0]) + ".\n"
+    return ""
+
+# Where an instrumented program writes its profile when run from here.
+def instrumentProfile(sourcePath: str) -> str:
+    return os.environ.get("BRO_PROFILE") or profilePath(sourcePath)
+
+# Compile one program to bytecode and interpret it, skipping the C toolchain entirely.
+def runInVM(args, options: CompileOptions) -> int:
+    start = time.perf_counter()
+    if args.mmap:
+        with TokenBuffer.fromFile(args.sources[0]) as source:
+            program, stats = parseSource(source, options)
+    else:
+        with open(args.sources[0], 'r') as inputFile:
+            source = inputFile.read()
+        program, stats = parseSource(source, options, lexJobs=args.lex_jobs)
+    bytecode = BytecodeCompiler().compile(program)
+    compiled = time.perf_counter()
 
-    if len(sys.argv) != 2:
-        sys.exit("Error: Compiler needs source file as argument.")
-    with open(sys.argv[1], 'r') as inputFile:
-        source = inputFile.read()
-    # Initialize the lexer and parser.
-    lexer = Lexer(source)
-    emitter = Emitter("code-examples/compiled/" + os.path.basename(sys.argv[1])[:-4] + ".c")  # create c file with same name as original file
-    parser = Parser(lexer, emitter)
+    VM(bytecode).run()
+    finished = time.perf_counter()
+    sys.stderr.write("compile %.3fs, run %.3fs\n" % (compiled - start, finished - compiled))
+    return 0
 
-    parser.program() # Start the parser.
-    emitter.writeFile() # writes the file
-    print("Parsing completed.")
+# Workers count hits and misses in their own processes, so add them up from the results.
+def printCacheStats(cache: CompileCache, results: list) -> None:
+    hits = sum(1 for result in results if result.cached)
+    misses = sum(1 for result in results if result.cached is False)
+    cache.evict()
+    totals = cache.recordStats(hits, misses, cache.evictions)
+    print("Cache: %d hits, %d misses, %d evictions (all runs: %d hits, %d misses, %d evictions)"
+          % (hits, misses, cache.evictions, totals["hits"], totals["misses"], totals["evictions"]))
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# AST node classes built by Parser and walked by the code generators.
+# Every node uses __slots__ since large programs create a lot of them.
+
+class Node:
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(name + "=" + repr(getattr(self, name)) for name in self.__slots__)
+        return type(self).__name__ + "(" + fields + ")"
+
+
+# Statements
+
+# Base of the statement nodes. line is the source line the statement starts on; it is set by
+# Parser, so statements the AST passes make up have none.
+class Statement(Node):
+    __slots__ = ("line",)
+
+# program ::= {statement}
+class Program(Node):
+    __slots__ = ("statements",)
+
+    def __init__(self, statements: list) -> None:
+        self.statements = statements
+
+# "RIZZ" (comparison | string)
+# format is "string" for a string literal (value is the literal's text), "str" for a string
+# variable (value is its name), or the static type of the expression: "int", "float" or "bool".
+class Print(Statement):
+    __slots__ = ("format", "value")
+
+    def __init__(self, format: str, value) -> None:
+        self.format = format
+        self.value = value
+
+# ident "IS" expression
+class Assign(Statement):
+    __slots__ = ("name", "value")
+
+    def __init__(self, name: str, value: Node) -> None:
+        self.name = name
+        self.value = value
+
+# ident "[" expression "]" "IS" expression
+class AssignIndex(Statement):
+    __slots__ = ("name", "index", "value")
+
+    def __init__(self, name: str, index: Node, value: Node) -> None:
+        self.name = name
+        self.index = index
+        self.value = value
+
+# ident "IS" expression, for an int[] ident: sets every element. In value, an int[] variable
+# stands for its element at the same position (all of them have size elements); the parts that
+# read no whole array are evaluated once, before any element is written.
+class AssignArray(Statement):
+    __slots__ = ("name", "size", "value")
+
+    def __init__(self, name: str, size: int, value: Node) -> None:
+        self.name = name
+        self.size = size
+        self.value = value
+
+# "IS" comparison "CHAT" nl {statement} "THANKS CHAT"
+class If(Statement):
+    __slots__ = ("condition", "body")
+
+    def __init__(self, condition: Node, body: list) -> None:
+        self.condition = condition
+        self.body = body
+
+# "ONLY IN OHIO" comparison nl {statement} "SUSSY"
+class While(Statement):
+    __slots__ = ("condition", "body")
+
+    def __init__(self, condition: Node, body: list) -> None:
+        self.condition = condition
+        self.body = body
+
+# "SQUAD" ident "FROM" expression "UNTIL" expression nl {statement} "SUSSY"
+# Runs the body with ident set to start, start + 1, ... up to but not including end; both bounds
+# are evaluated once, end first. ident is an int that only exists in the body and can't be assigned.
+# parallel is None for a serial loop, or the OpenMP clauses ParallelAnalyzer proved it can run
+# its iterations in parallel with.
+class For(Statement):
+    __slots__ = ("name", "start", "end", "body", "parallel")
+
+    def __init__(self, name: str, start: Node, end: Node, body: list) -> None:
+        self.name = name
+        self.start = start
+        self.end = end
+        self.body = body
+        self.parallel = None
+
+# "ON GYATT" ident "IS" (expression | string)
+# isNew is set on the first declaration of the name with this type, which also declares the C variable.
+# For "str" the value is the string literal's text. value is None for a declaration that only
+# declares the variable, which dead code elimination leaves behind.
+class Declare(Statement):
+    __slots__ = ("varType", "name", "value", "isNew")
+
+    def __init__(self, varType: str, name: str, value, isNew: bool) -> None:
+        self.varType = varType
+        self.name = name
+        self.value = value
+        self.isNew = isNew
+
+# "ON GYATT" ident "[" integer "]" "IS" "[" {integer ","} "]"
+# values are the element texts; trailing is set when the list ended with a separator.
+class ArrayDeclare(Statement):
+    __slots__ = ("name", "size", "values", "trailing")
+
+    def __init__(self, name: str, size: str, values: list, trailing: bool) -> None:
+        self.name = name
+        self.size = size
+        self.values = values
+        self.trailing = trailing
+
+# "SKIBIDI" ident
+class Input(Statement):
+    __slots__ = ("varType", "name")
+
+    def __init__(self, varType: str, name: str) -> None:
+        self.varType = varType
+        self.name = name
+
+# Text written to stdout as is. Partial evaluation replaces the statements it ran with one.
+class Output(Statement):
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+# Expressions
+
+# Integer or float literal, kept as its source text.
+class Number(Node):
+    __slots__ = ("text", "isFloat")
+
+    def __init__(self, text: str, isFloat: bool) -> None:
+        self.text = text
+        self.isFloat = isFloat
+
+# varType is the variable's declared type, looked up once when the parser builds the node.
+class Variable(Node):
+    __slots__ = ("name", "varType")
+
+    def __init__(self, name: str, varType: str) -> None:
+        self.name = name
+        self.varType = varType
+
+# ident "[" expression "]", an element of an int[]
+class Index(Node):
+    __slots__ = ("name", "index")
+
+    def __init__(self, name: str, index: Node) -> None:
+        self.name = name
+        self.index = index
+
+# ("SUM" | "MIN" | "MAX") ident, over all size elements of an int[]
+class Reduce(Node):
+    __slots__ = ("op", "name", "size")
+
+    def __init__(self, op: str, name: str, size: int) -> None:
+        self.op = op
+        self.name = name
+        self.size = size
+
+# "BASED" or "CRINGE"
+class Bool(Node):
+    __slots__ = ("value",)
+
+    def __init__(self, value: bool) -> None:
+        self.value = value
+
+class UnaryOp(Node):
+    __slots__ = ("op", "operand")
+
+    def __init__(self, op: str, operand: Node) -> None:
+        self.op = op
+        self.operand = operand
+
+# Arithmetic and comparison operators, all left associative.
+class BinaryOp(Node):
+    __slots__ = ("op", "left", "right")
+
+    def __init__(self, op: str, left: Node, right: Node) -> None:
+        self.op = op
+        self.left = left
+        self.right = right
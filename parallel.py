@@ -0,0 +1,209 @@
+from nodes import *
+from analysis import *
+
+# Decides which SQUAD loops can run their iterations in parallel (with OpenMP) and still give the
+# results of running them in order. A loop qualifies when every trip only touches its own data:
+# - no RIZZ, SKIBIDI, str variables, array declarations or whole-array assignments in the body,
+#   since their order matters;
+# - every array the body writes is only used at one index, the loop variable plus an offset the
+#   body never changes, so trips write different elements (arrays it only reads can be read
+#   anywhere);
+# - every scalar the body writes is either private, set at the top of the body before any read
+#   (lastprivate, so it ends with the last trip's value as it would serially), or an int
+#   reduction: only ever updated by "s IS s + e" / "s IS s - e", or by
+#   "IS e < m CHAT m IS e THANKS CHAT" for a min (and the same with > for a max).
+# Float sums stay serial: adding in another order rounds differently. Loops nested in a parallel
+# loop run serially inside it.
+class ParallelAnalyzer:
+    def __init__(self) -> None:
+        self.loops = 0          # SQUAD loops considered
+        self.parallel = 0       # and how many of them run in parallel
+
+    def analyze(self, program: Program) -> Program:
+        self.block(program.statements)
+        return program
+
+    def block(self, statements: list) -> None:
+        for statement in statements:
+            kind = type(statement)
+            if kind is For:
+                self.loops += 1
+                statement.parallel = self.clauses(statement)
+                if statement.parallel is not None:
+                    self.parallel += 1
+                    continue
+                self.block(statement.body)
+            elif kind is If or kind is While:
+                self.block(statement.body)
+
+    # The OpenMP clauses for the loop, or None if its trips may depend on each other.
+    def clauses(self, loop: For):
+        if not self.independent(loop.body):
+            return None
+        result = []
+        for name in sorted(self.scalarWrites(loop.body)):
+            reduction = self.reduction(loop.body, name)
+            if reduction is not None:
+                result.append("reduction(" + reduction + ":" + name + ")")
+            elif self.private(loop.body, name):
+                result.append("lastprivate(" + name + ")")
+            else:
+                return None
+        written = writes(loop.body)
+        for name in self.arrayWrites(loop.body):
+            indexes = self.indexes(loop.body, name)
+            if len(set(repr(index) for index in indexes)) != 1 or not self.distinct(indexes[0], loop.name, written):
+                return None
+        return result
+
+    # Whether the body only holds statements whose order between trips doesn't matter.
+    def independent(self, statements: list) -> bool:
+        for statement in statements:
+            kind = type(statement)
+            if kind in (Print, Input, Output, ArrayDeclare, AssignArray):
+                return False
+            if kind is Declare and statement.varType == "str":
+                return False
+            if kind in (If, While, For) and not self.independent(statement.body):
+                return False
+        return True
+
+    # Scalars assigned anywhere in the statements. Loop variables of nested loops are private to them.
+    def scalarWrites(self, statements: list) -> set:
+        names = set()
+        for statement in statements:
+            kind = type(statement)
+            if kind in (Assign, Declare):
+                names.add(statement.name)
+            elif kind in (If, While, For):
+                names |= self.scalarWrites(statement.body)
+        return names
+
+    def arrayWrites(self, statements: list) -> set:
+        names = set()
+        for statement in statements:
+            kind = type(statement)
+            if kind is AssignIndex:
+                names.add(statement.name)
+            elif kind in (If, While, For):
+                names |= self.arrayWrites(statement.body)
+        return names
+
+    # Every index the statements use array name with, reads and writes alike.
+    def indexes(self, statements: list, name: str) -> list:
+        found = self.targets(statements, name)
+
+        def visit(node: Node) -> Node:
+            kind = type(node)
+            if kind is Index:
+                if node.name == name:
+                    found.append(node.index)
+                visit(node.index)
+            elif kind is Reduce and node.name == name:
+                found.append(node)      # reads every element, so never a distinct index
+            elif kind is BinaryOp:
+                visit(node.left)
+                visit(node.right)
+            elif kind is UnaryOp:
+                visit(node.operand)
+            return node
+
+        rewrite(statements, visit)
+        return found
+
+    # Indexes of the assignments to elements of array name.
+    def targets(self, statements: list, name: str) -> list:
+        found = []
+        for statement in statements:
+            kind = type(statement)
+            if kind is AssignIndex and statement.name == name:
+                found.append(statement.index)
+            elif kind in (If, While, For):
+                found.extend(self.targets(statement.body, name))
+        return found
+
+    # Whether index is counter, counter + e, e + counter or counter - e for an e that reads
+    # nothing the body writes (the loop variables of nested loops included), so it is different
+    # on every trip.
+    def distinct(self, index: Node, counter: str, written: dict) -> bool:
+        if type(index) is Variable:
+            return index.name == counter
+        if type(index) is not BinaryOp or index.op not in ("+", "-"):
+            return False
+        left, right = index.left, index.right
+        if index.op == "+" and not (type(left) is Variable and left.name == counter):
+            left, right = right, left
+        offset = variables(right)
+        return (type(left) is Variable and left.name == counter
+                and counter not in offset and not offset & written.keys())
+
+    # "+", "min" or "max" if every use of the int variable name in the statements is a reduction
+    # update of that kind, else None.
+    def reduction(self, statements: list, name: str):
+        kinds = set()
+        if not self.updates(statements, name, kinds) or len(kinds) != 1:
+            return None
+        return kinds.pop()
+
+    def updates(self, statements: list, name: str, kinds: set) -> bool:
+        for statement in statements:
+            kind = type(statement)
+            if kind in (Assign, Declare) and statement.name == name:
+                if not self.isSum(statement.value, name):
+                    return False
+                kinds.add("+")
+            elif kind is If and self.extreme(statement, name) is not None:
+                kinds.add(self.extreme(statement, name))
+            elif name in reads([statement]):
+                if kind in (If, While):
+                    if name in variables(statement.condition):
+                        return False
+                elif kind is For:
+                    if name in variables(statement.start) | variables(statement.end):
+                        return False
+                else:
+                    return False
+                if not self.updates(statement.body, name, kinds):
+                    return False
+            elif kind in (If, While, For) and not self.updates(statement.body, name, kinds):
+                return False
+        return True
+
+    # name + e, e + name or name - e, for an int name that e doesn't read.
+    def isSum(self, value: Node, name: str) -> bool:
+        if type(value) is not BinaryOp or value.op not in ("+", "-"):
+            return False
+        if self.isCounter(value.left, name) and name not in variables(value.right):
+            return True
+        return value.op == "+" and self.isCounter(value.right, name) and name not in variables(value.left)
+
+    def isCounter(self, node: Node, name: str) -> bool:
+        return type(node) is Variable and node.name == name and node.varType == "int"
+
+    # "min" or "max" for "IS e < name CHAT name IS e THANKS CHAT" and its variations, else None.
+    def extreme(self, statement: If, name: str):
+        condition = statement.condition
+        if type(condition) is not BinaryOp or condition.op not in ("<", "<=", ">", ">="):
+            return None
+        if len(statement.body) != 1 or type(statement.body[0]) is not Assign or statement.body[0].name != name:
+            return None
+        value = statement.body[0].value
+        if self.isCounter(condition.right, name):
+            candidate, smaller = condition.left, condition.op in ("<", "<=")
+        elif self.isCounter(condition.left, name):
+            candidate, smaller = condition.right, condition.op in (">", ">=")
+        else:
+            return None
+        if repr(candidate) != repr(value) or name in variables(value):
+            return None
+        return "min" if smaller else "max"
+
+    # Whether the scalar is set at the top level of the body before anything reads it.
+    def private(self, statements: list, name: str) -> bool:
+        for statement in statements:
+            kind = type(statement)
+            if name in reads([statement]):
+                return False
+            if kind in (Assign, Declare) and statement.name == name:
+                return True
+        return False
@@ -1,23 +1,23 @@
 import sys
 from lexer import *
 from tok import *
-from emitter import *
+from nodes import *
+from symbols import *
 
 # Parser object keeps track of current token and checks if the code matches the grammar.
+# It builds an AST (see nodes.py); code generation is a separate pass over the tree.
 class Parser:
-    def __init__(self, lexer: Lexer, emitter: Emitter):
+    def __init__(self, lexer: Lexer):
         self.lexer = lexer
-        self.emitter = emitter
 
 
-        self.ident = {"int" : set(),
-                      "float" : set(),
-                      "str" : set(),
-                      "bool" : set(),
-                      "int[]": set()}  # stores all variables seen so far in their respective types
+        self.ident = SymbolTable()  # stores all variables seen so far with their types
+        self.loopVariables = set()  # variables of the SQUAD loops being parsed
 
         self.curToken = None
         self.peekToken = None
+        self.curLine = 0    # Source lines of the current and peek tokens.
+        self.peekLine = 0
         self.nextToken()
         self.nextToken()    # Call this twice to initialize current and peek.
 
@@ -38,112 +38,138 @@ class Parser:
     # Advances the current token.
     def nextToken(self) -> None:
         self.curToken = self.peekToken
+        self.curLine = self.peekLine
         self.peekToken = self.lexer.getToken()
+        self.peekLine = self.lexer.line
 
     def abort(self, message: str) -> None:
         sys.exit("Error. " + message)
-    
+
+    # Text of the current INTEGER token in decimal. C would read a leading zero as octal (and
+    # reject 08) while the passes and the VM read decimal, so every backend gets this text.
+    def integer(self) -> str:
+        return str(int(self.curToken.text))
+
     # Production rules
 
     # program ::= {statement}
-    def program(self) -> None:
-        self.emitter.headerLine("#include <stdio.h>")
-        self.emitter.headerLine("#include <stdbool.h>")
-        self.emitter.headerLine("int main(void) {")
+    def program(self) -> Program:
+        statements = []
 
         while self.checkToken(TokenType.NEWLINE):
             self.nextToken()
 
         # Parse all the statements in the program
         while not self.checkToken(TokenType.EOF):
-            self.statement()
-        
-        self.emitter.enderLine("return 0;")
-        self.emitter.enderLine("}")
-        
-    
-    def statement(self) -> None:
-        # "RIZZ" (print) (expression | string)
+            statements.append(self.statement())
+
+        return Program(statements)
+
+
+    def statement(self) -> Node:
+        line = self.curLine
+        # "RIZZ" (print) (comparison | string)
         if self.checkToken(TokenType.RIZZ):
             self.nextToken()
 
             if self.checkToken(TokenType.STRING):
                 # Simple string, so print it.
-                self.emitter.emitLine("printf(" + self.curToken.text[:-1] + "\\n\");")   # [:-1] to remove the quotation mark
+                node = Print("string", self.curToken.text)
                 self.nextToken()
-            
-            # If identifier, check which identifier it is
-            elif self.checkToken(TokenType.IDENT):
-
-                if self.curToken.text in self.ident["float"]:
-                    self.emitter.emit("printf(\"%" + ".2f\\n\", (float)(")
-                    self.expression()
-                    self.emitter.emitLine("));")
-
-                elif self.curToken.text in self.ident["int"]:
-                    self.emitter.emit("printf(\"%" + "d\\n\", (int)(")
-                    self.expression()
-                    self.emitter.emitLine("));")
-
-                elif self.curToken.text in self.ident["str"]:
-                    self.emitter.emitLine("printf(" + self.curToken.text)
-
-                elif self.curToken.text in self.ident["bool"]:
-                    self.emitter.emit("printf(\"%" + "d\\n\", (bool)(")
-                    self.comparison()
-                    self.emitter.emitLine("));")
 
+            # Else it is an expression, printed with the type of the whole expression
+            else:
+                value = self.comparison()
+                if type(value) is Variable and value.varType == "str":
+                    node = Print("str", value.name)
                 else:
-                    self.abort("Need to intialize identifier before printing")
+                    node = Print(self.valueType(value), value)
 
-            # Else it is an expression
-            else:
-                self.emitter.emit("printf(\"%" + ".2f\\n\", (float)(")
-                self.expression()
-                self.emitter.emitLine("));")
-        
         elif self.checkToken(TokenType.IDENT):
-            self.emitter.emit(self.curToken.text)
+            name = self.curToken.text
+            varType = self.ident.lookup(name)
+            if varType is None:
+                self.abort("Assigning to undeclared variable " + name)
+            self.checkWritable(name)
             self.nextToken()
-            self.match(TokenType.IS)
-            self.emitter.emit(" = ")
-            self.expression()
-            self.emitter.emitLine(";")
-        
+
+            # ident "[" expression "]" "IS" expression
+            if self.checkToken(TokenType.ARRSTART):
+                index = self.index(name, varType)
+                self.match(TokenType.IS)
+                value = self.expression()
+                self.checkAssignable(name + "[]", "int", value)
+                node = AssignIndex(name, index, value)
+            # ident "IS" expression, which for an int[] sets every element
+            else:
+                self.match(TokenType.IS)
+                value = self.expression()
+                if varType == "int[]":
+                    self.checkArrayValue(name, value)
+                    node = AssignArray(name, self.ident.sizes[name], value)
+                else:
+                    self.checkAssignable(name, varType, value)
+                    node = Assign(name, value)
+
         # "IS" comparison "CHAT" nl {statement} "THANKS CHAT" nl
         elif self.checkToken(TokenType.IS):
-            self.emitter.emit("if (")
             self.nextToken()
-            self.comparison()
-            self.emitter.emit(")")
+            condition = self.comparison()
+            self.valueType(condition)
             self.match(TokenType.CHAT)
-            self.emitter.emitLine("{")
 
             self.nl()
 
+            body = []
             while not self.checkToken(TokenType.THANKS):
-                self.statement()
-            
+                body.append(self.statement())
+
             self.match(TokenType.THANKS)
             self.match(TokenType.CHAT)
-            self.emitter.emitLine("}")
-        
+            node = If(condition, body)
+
         # "ONLY IN OHIO" comparison nl {statement nl} "SUSSY" nl
         elif self.checkToken(TokenType.ONLY):
             self.nextToken()
             self.match(TokenType.IN)
             self.match(TokenType.OHIO)
-            self.emitter.emit("while (")
-            self.comparison()
-            self.emitter.emitLine(") {")
+            condition = self.comparison()
+            self.valueType(condition)
             self.nl()
 
+            body = []
             while not self.checkToken(TokenType.SUSSY):
-                self.statement()
-        
+                body.append(self.statement())
+
             self.match(TokenType.SUSSY)
-            self.emitter.emitLine("}")
-        
+            node = While(condition, body)
+
+        # "SQUAD" ident "FROM" expression "UNTIL" expression nl {statement} "SUSSY" nl
+        # The loop variable only exists inside the loop.
+        elif self.checkToken(TokenType.SQUAD):
+            self.nextToken()
+            name = self.curToken.text
+            self.match(TokenType.IDENT)
+            if name in self.ident:
+                self.abort("SQUAD variable " + name + " is already declared as " + self.ident.lookup(name))
+            self.match(TokenType.FROM)
+            start = self.expression()
+            self.checkAssignable(name, "int", start)
+            self.match(TokenType.UNTIL)
+            end = self.expression()
+            self.checkAssignable(name, "int", end)
+            self.nl()
+
+            self.ident.declare(name, "int")
+            self.loopVariables.add(name)
+            body = []
+            while not self.checkToken(TokenType.SUSSY):
+                body.append(self.statement())
+            self.loopVariables.remove(name)
+            self.ident.undeclare(name)
+
+            self.match(TokenType.SUSSY)
+            node = For(name, start, end, body)
 
         # "ON GYATT" ident "IS" expression
         elif self.checkToken(TokenType.ON):
@@ -151,100 +177,48 @@ class Parser:
             self.match(TokenType.GYATT)
             varName = self.curToken.text
             self.match(TokenType.IDENT)
-
+            self.checkWritable(varName)
 
             if self.checkToken(TokenType.IS):
                 self.nextToken()
-                # Find and determine what type the variable is and intialize the variable if not initalized
-                if self.checkToken(TokenType.INTEGER):
-                    self.intializeVariable("int", varName, 0)
-                    self.emitter.emit(varName + " = ")
-                    self.expression()
-                
-                elif self.checkToken(TokenType.FLOAT):
-                    self.intializeVariable("float", varName, 0)
-                    self.emitter.emit(varName + " = ")
-                    self.expression()
-
-                # Strings have a character limit of 256
-                elif self.checkToken(TokenType.STRING):
-                    self.intializeVariable("str", varName, 0)
-                    self.emitter.emit("strcpy(" + varName + ", " + self.curToken.text + ")")
-                    self.emitter.enderLine("free(" + varName +");")
+                # Strings carry their length, so there is no character limit
+                if self.checkToken(TokenType.STRING):
+                    isNew = self.intializeVariable("str", varName, 0)
+                    node = Declare("str", varName, self.curToken.text, isNew)
                     self.nextToken()
 
-                elif self.checkToken(TokenType.BASED) or self.checkToken(TokenType.CRINGE):
-                    self.intializeVariable("bool", varName)
-                    self.emitter.emit(varName + "=")
-                    self.expression()
-
-                elif self.checkToken(TokenType.IDENT):
-                    
-                    if self.curToken.text in self.ident["float"]:
-                        self.intializeVariable("float", varName, 0)
-                    
-                    elif self.curToken.text in self.ident["int"]:
-                        self.intializeVariable("int", varName, 0)
-                    
-                    else:
-                        self.abort("Expected initalized variable after IS.")
-
-                    self.emitter.emit(varName + " = ")
-                    self.expression()
-                        
+                # A new variable takes the type of the whole expression; a redeclared one keeps its type
                 else:
-                    self.abort("Could not recognize variable type")
+                    value = self.expression()
+                    varType = self.ident.lookup(varName) or self.valueType(value)
+                    self.checkAssignable(varName, varType, value)
+                    isNew = self.intializeVariable(varType, varName, 0)
+                    node = Declare(varType, varName, value, isNew)
 
             elif self.checkToken(TokenType.ARRSTART):
                 self.nextToken()
                 arrSize = self.curToken.text
+                if self.checkToken(TokenType.INTEGER):
+                    arrSize = self.integer()
                 self.match(TokenType.INTEGER)
                 self.match(TokenType.ARREND)
 
-                self.intializeVariable("int[]", varName, arrSize)
-            
+                node = self.intializeVariable("int[]", varName, arrSize)
+
             else:
                 self.abort("Invalid format for ON GYATT")
 
-            self.emitter.emitLine(";")
-
         # "SKIBIDI" ident; input must initialize variable to determine type
         elif self.checkToken(TokenType.SKIBIDI):
             self.nextToken()
 
-            # ensures the variable is the correct type, 
+            # ensures the variable is the correct type,
             if self.checkToken(TokenType.IDENT):
-                if self.curToken.text in self.ident["float"]:
-                    # Emit scanf but also validate the input. If invalid, set the variable to 0 and clear the input.
-                    self.emitter.emitLine("if(0 == scanf(\"%" + "f\", &" + self.curToken.text + ")) {")
-                    self.emitter.emitLine(self.curToken.text + " = 0;")
-                    self.emitter.emit("scanf(\"%")
-                    self.emitter.emitLine("*s\");")
-                    self.emitter.emitLine("}")
-
-                elif self.curToken.text in self.ident["int"]:
-                    self.emitter.emitLine("if(0 == scanf(\"%" + "d\", &" + self.curToken.text + ")) {")
-                    self.emitter.emitLine(self.curToken.text + " = 0;")
-                    self.emitter.emit("scanf(\"%")
-                    self.emitter.emitLine("*s\");")
-                    self.emitter.emitLine("}")
-                
-                elif self.curToken.text in self.ident["str"]:
-                    self.emitter.emitLine("if(0 == scanf(\"%" + "s\", " + self.curToken.text + ")) {")
-                    self.emitter.emitLine(self.curToken.text + " = 0;")
-                    self.emitter.emit("scanf(\"%")
-                    self.emitter.emitLine("*s\");")
-                    self.emitter.emitLine("}")
-
-                elif self.curToken.text in self.ident["bool"]:
-                    self.emitter.emitLine("if(0 == scanf(\"%" + "d\", &" + self.curToken.text + ")) {")
-                    self.emitter.emitLine(self.curToken.text + " = 0;")
-                    self.emitter.emit("scanf(\"%")
-                    self.emitter.emitLine("*s\");")
-                    self.emitter.emitLine("}")
-                
-                else:
+                varType = self.ident.lookup(self.curToken.text)
+                if varType is None or varType == "int[]":
                     self.abort("Expected an initalized variable for SKIBIDI")
+                self.checkWritable(self.curToken.text)
+                node = Input(varType, self.curToken.text)
             else:
                 self.abort("Expected an initalized variable for SKIBIDI")
             self.nextToken()
@@ -256,132 +230,190 @@ class Parser:
 
         # Newline.
         self.nl()
-        
-    
+        node.line = line
+        return node
+
+
     # nl ::= '\n' +
     def nl(self) -> None:
         self.match(TokenType.NEWLINE)
-        print("NEWLINE")
 
         while self.checkToken(TokenType.NEWLINE):
             self.nextToken()
 
     # expression ::= term {( "-" | "+" ) term}
-    def expression(self) -> None:
-        print("EXPRESSION")
-
-        self.term()
+    def expression(self) -> Node:
+        node = self.term()
         # Can have 0 o r more +/- epxressions
         while self.checkToken(TokenType.PLUS) or self.checkToken(TokenType.MINUS):
-            self.emitter.emit(self.curToken.text)
+            op = self.curToken.text
             self.nextToken()
-            self.term()
-    
-    # term ::= unary {( "/" | "*" ) unary}
-    def term(self) -> None:
-        print("TERM")
+            node = BinaryOp(op, node, self.term())
+        return node
 
-        self.unary()
+    # term ::= unary {( "/" | "*" ) unary}
+    def term(self) -> Node:
+        node = self.unary()
         # Can have 0 or more *// expressions
         while self.checkToken(TokenType.ASTERISK) or self.checkToken(TokenType.SLASH):
-            self.emitter.emit(self.curToken.text)
+            op = self.curToken.text
             self.nextToken()
-            self.unary()
-    
-    def unary(self) -> None:
-        print("UNARY")
+            node = BinaryOp(op, node, self.unary())
+        return node
 
+    def unary(self) -> Node:
         # Optional unary +/-
         if self.checkToken(TokenType.PLUS) or self.checkToken(TokenType.MINUS):
-            self.emitter.emit(self.curToken.text)
+            op = self.curToken.text
             self.nextToken()
-        self.primary()
-    
-    # primary ::= number | ident
-    def primary(self) -> None:
+            return UnaryOp(op, self.primary())
+        return self.primary()
+
+    # primary ::= number | ident | ident "[" expression "]" | ("SUM" | "MIN" | "MAX") ident
+    def primary(self) -> Node:
 
-        if self.checkToken(TokenType.INTEGER) or self.checkToken(TokenType.FLOAT): 
-            self.emitter.emit(self.curToken.text)
+        if self.checkToken(TokenType.INTEGER) or self.checkToken(TokenType.FLOAT):
+            if self.checkToken(TokenType.FLOAT):
+                node = Number(self.curToken.text, True)
+            else:
+                node = Number(self.integer(), False)
             self.nextToken()
 
         elif self.checkToken(TokenType.IDENT):
-            # Ensure the variable already exists.
-            if self.curToken.text not in self.ident["int"] and self.curToken.text not in self.ident["float"] and self.curToken.text not in self.ident["bool"]:
-                print(self.ident["int"], self.ident["float"])
+            # Ensure the variable already exists. Whether its type fits is checked by valueType.
+            varType = self.ident.lookup(self.curToken.text)
+            if varType is None:
                 self.abort("Referencing variable before assignment: " + self.curToken.text)
 
-            self.emitter.emit(self.curToken.text)
+            name = self.curToken.text
             self.nextToken()
+            if self.checkToken(TokenType.ARRSTART):
+                node = Index(name, self.index(name, varType))
+            else:
+                node = Variable(name, varType)
+
+        elif self.checkToken(TokenType.SUM) or self.checkToken(TokenType.MIN) or self.checkToken(TokenType.MAX):
+            op = self.curToken.text
+            self.nextToken()
+            name = self.curToken.text
+            varType = self.ident.lookup(name)
+            self.match(TokenType.IDENT)
+            if varType != "int[]":
+                self.abort("Cannot take " + op + " of " + str(varType) + " variable " + name)
+            size = self.ident.sizes[name]
+            if size == 0 and op != "SUM":
+                self.abort(op + " of empty array " + name)
+            node = Reduce(op, name, size)
 
         elif self.checkToken(TokenType.BASED):
-            self.emitter.emit("true")
+            node = Bool(True)
             self.nextToken()
-        
+
         elif self.checkToken(TokenType.CRINGE):
-            self.emitter.emit("false")
+            node = Bool(False)
             self.nextToken()
 
         else:
             # Error!
             self.abort("Unexpected token at " + self.curToken.text)
 
-    def comparison(self) -> None:
-        print("COMPARISON")
-        self.expression()
+        return node
 
-        # Must have one comparison operator and another expression
-        if self.isComparisonOperator():
-            self.emitter.emit(self.curToken.text)
-            self.nextToken()
-            self.expression()
+    def comparison(self) -> Node:
+        node = self.expression()
 
         # Can have 0 or more comparison operator and expressions.
         while self.isComparisonOperator():
-            self.emitter.emit(self.curToken.text)
+            op = self.curToken.text
             self.nextToken()
-            self.expression()
-        
-        while self.isComparisonOperator():
-            self.nextToken()
-            self.expression()
-    
-    
+            node = BinaryOp(op, node, self.expression())
+        return node
+
+
     def isComparisonOperator(self) -> bool:
         return self.checkToken(TokenType.GT) or self.checkToken(TokenType.GTEQ) or self.checkToken(TokenType.LT) or self.checkToken(TokenType.LTEQ) or self.checkToken(TokenType.EQEQ) or self.checkToken(TokenType.NOTEQ)
-    
-    def intializeVariable(self, varType: str, varName: str, arrSize: str) -> None:
+
+    # Static type of an expression ("int", "float" or "bool"). Strings and arrays can't take part in one.
+    def valueType(self, node: Node) -> str:
+        varType = expressionType(node)
+        if varType not in NUMERICTYPES:
+            self.abort("Cannot use " + varType + " variable in an expression")
+        return varType
+
+    # Catch mixed-type mistakes before they reach C, where they would silently convert.
+    def checkAssignable(self, varName: str, varType: str, value: Node) -> None:
+        valueType = self.valueType(value)
+        if not assignable(varType, valueType):
+            self.abort("Cannot store " + valueType + " expression in " + varType + " variable " + varName)
+
+    # The value of a whole-array assignment: int arithmetic on scalars and on arrays of the same
+    # size as array name, which are taken element by element.
+    def checkArrayValue(self, name: str, node: Node) -> None:
+        kind = type(node)
+        if kind is Variable and node.varType == "int[]":
+            size = self.ident.sizes[node.name]
+            if size != self.ident.sizes[name]:
+                self.abort("Cannot assign array " + node.name + " of size " + str(size) + " to array "
+                           + name + " of size " + str(self.ident.sizes[name]))
+        elif kind is BinaryOp and node.op in ("+", "-", "*", "/"):
+            self.checkArrayValue(name, node.left)
+            self.checkArrayValue(name, node.right)
+        elif kind is UnaryOp:
+            self.checkArrayValue(name, node.operand)
+        else:
+            self.checkAssignable(name + "[]", "int", node)
+
+    # "[" expression "]" after an array name. A constant index must be inside the array; any other
+    # index is checked when the program runs (by the VM; C doesn't check).
+    def index(self, name: str, varType: str) -> Node:
+        if varType != "int[]":
+            self.abort("Cannot index " + varType + " variable " + name)
+        self.match(TokenType.ARRSTART)
+        index = self.expression()
+        if self.valueType(index) == "float":
+            self.abort("Index of array " + name + " must be an int")
+        size = self.ident.sizes[name]
+        if type(index) is Number and not 0 <= int(index.text) < size:
+            self.abort("Index " + index.text + " is out of range for array " + name + " of size " + str(size))
+        self.match(TokenType.ARREND)
+        return index
+
+    def checkWritable(self, varName: str) -> None:
+        if varName in self.loopVariables:
+            self.abort("Cannot assign to SQUAD variable " + varName)
+
+    # Declare varName in the symbol table. Returns whether it is new for scalars; for arrays,
+    # parses the initializer and returns the ArrayDeclare. An array can only be declared once.
+    def intializeVariable(self, varType: str, varName: str, arrSize: str):
         # check if ident exists in symbol table. if not declare it
-        if varName not in self.ident[varType]:
-            if varType == "str":
-                self.ident["str"].add(varName)
-                self.emitter.headerLine("char *" + varName + " = malloc(256);")
-            elif varType == "int[]":
-                self.ident["int[]"].add(varName)
-                self.emitter.emit("int " + varName + "[" + arrSize + "] = ")
-
-                # For intialization of array
-                self.nextToken()
-                self.emitter.emit("{")
-                self.match(TokenType.ARRSTART)
+        declared = self.ident.lookup(varName)
+        if declared == varType and varType != "int[]":
+            return False
+        if declared is not None:
+            self.abort("Variable " + varName + " is already declared as " + declared)
+
+        if varType != "int[]":
+            self.ident.declare(varName, varType)
+            return True
+        self.ident.declare(varName, varType, int(arrSize))
+
+        # For intialization of array
+        self.nextToken()
+        self.match(TokenType.ARRSTART)
 
-                i = 0
-                while self.checkToken(TokenType.INTEGER):
-                    i += 1
-                    self.emitter.emit(self.curToken.text)
-                    self.nextToken()
-                    if self.checkToken(TokenType.ARREND):
-                        break
-                    self.emitter.emit(", ")
-                    self.nextToken()
+        values = []
+        trailing = False
+        while self.checkToken(TokenType.INTEGER):
+            values.append(self.integer())
+            self.nextToken()
+            if self.checkToken(TokenType.ARREND):
+                trailing = False
+                break
+            trailing = True
+            self.nextToken()
 
-                if i > int(arrSize):
-                    self.abort("Intialized variables are greater than the given array size.")
-                
-                self.match(TokenType.ARREND)
-                self.emitter.emit("}")
+        if len(values) > int(arrSize):
+            self.abort("Intialized variables are greater than the given array size.")
 
-            # Case for int, bool and float
-            else:
-                self.ident[varType].add(varName)
-                print(self.ident[varType])
-                self.emitter.headerLine(varType + " " + varName + ";")
\ No newline at end of file
+        self.match(TokenType.ARREND)
+        return ArrayDeclare(varName, arrSize, values, trailing)
@@ -0,0 +1,79 @@
+import io
+import math
+from nodes import *
+from analysis import *
+from vm import BytecodeCompiler, VM, BudgetExceeded
+
+MAXTRIPS = 100000           # loop trips the evaluator runs before giving up
+MAXOUTPUT = 1 << 20         # characters of output it is willing to embed in the C
+MAXELEMENTS = 1 << 16       # and array elements
+
+# Compile-time partial evaluation (--partial-eval). The top-level statements before the first one
+# that reads input (all of them, for a program that never reads) are run in the VM, and replaced
+# by their output written as is, followed by declarations holding the values the rest of the
+# program goes on to use.
+# If the prefix runs too long, prints too much, stops on a runtime error or leaves a value that
+# has no literal, the program is left as it was.
+class PartialEvaluator:
+    def __init__(self) -> None:
+        self.evaluated = 0      # top-level statements replaced
+        self.output = 0         # characters of output precomputed
+
+    def evaluate(self, program: Program) -> Program:
+        statements = program.statements
+        count = 0
+        while count < len(statements) and not hasInput([statements[count]]):
+            count += 1
+        if count == 0:
+            return program
+
+        bytecode = BytecodeCompiler().compile(Program(statements[:count]))
+        output = io.StringIO()
+        vm = VM(bytecode, io.StringIO(), output, MAXTRIPS)
+        try:
+            vm.run()
+        except (BudgetExceeded, SystemExit):
+            return program
+        text = output.getvalue()
+        if len(text) > MAXOUTPUT:
+            return program
+
+        rest = statements[count:]
+        state = []
+        for name in sorted(reads(rest) | set(writes(rest))):
+            if name in bytecode.types:
+                statement = self.declaration(name, bytecode.types[name], vm.variables[bytecode.slots[name]])
+                if statement is None:
+                    return program
+                state.append(statement)
+
+        program.statements = ([Output(text)] if text else []) + state + rest
+        self.evaluated = count
+        self.output = len(text)
+        return program
+
+    # A first declaration of name holding value, or None if value can't be written as a literal.
+    def declaration(self, name: str, varType: str, value) -> Node:
+        if varType == "int[]":
+            if type(value) is not list:
+                return None
+            # Elements after the last nonzero one are zeroed by the declaration anyway.
+            length = len(value)
+            while length and value[length - 1] == 0:
+                length -= 1
+            if length > MAXELEMENTS:
+                return None
+            return ArrayDeclare(name, str(len(value)), [str(element) for element in value[:length]], False)
+        if varType == "str":
+            # A str the prefix never set holds no string yet; in C it is empty.
+            return Declare("str", name, '"' + value + '"' if type(value) is str else None, True)
+        if varType == "bool":
+            return Declare("bool", name, Bool(value != 0), True)
+        if varType == "int":
+            return Declare("int", name, Number(str(value), False), True)
+        if math.isinf(value) and varType == "float":
+            # Out of range for a float, so the stored value is infinite again.
+            return Declare(varType, name, Number("-1e39" if value < 0 else "1e39", True), True)
+        if not math.isfinite(value):
+            return None
+        return Declare(varType, name, Number(repr(float(value)), True), True)
@@ -0,0 +1,140 @@
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from tok import *
+from nodes import *
+
+# Compile-time profile of one source (--profile): wall time and peak traced memory of each phase,
+# tokens by TokenType, statements by kind, parser productions (through a Tracer) and the counters
+# of the AST passes, written out as JSON. With cprofilePath set, the whole compilation also runs
+# under cProfile and its stats are dumped there for pstats or snakeviz.
+# tracemalloc and the production tracer slow compilation down, so the times are for comparing
+# phases and runs with each other, not with an unprofiled compile.
+class Profiler:
+    def __init__(self, cprofilePath: str = None) -> None:
+        self.cprofilePath = cprofilePath
+        self.cprofile = None
+        self.phases = {}        # phase name -> {"seconds", "peakBytes", "netBytes"}, in the order they first ran
+        self.tokens = {}        # TokenType name -> count
+        self.statements = {}    # statement node class name -> count, at any depth
+        self.started = None
+        self.seconds = 0.0
+
+    def start(self) -> None:
+        tracemalloc.start()
+        self.started = time.perf_counter()
+        if self.cprofilePath is not None:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def stop(self) -> None:
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cprofilePath)
+        self.seconds = time.perf_counter() - self.started
+        tracemalloc.stop()
+
+    # Time the block and record the most memory it had allocated at once, on top of what was
+    # allocated before it. A phase that runs more than once adds up its times and keeps its
+    # largest peak.
+    def phase(self, name: str):
+        return Phase(self, name)
+
+    def record(self, name: str, seconds: float, peakBytes: int, netBytes: int) -> None:
+        phase = self.phases.setdefault(name, {"seconds": 0.0, "peakBytes": 0, "netBytes": 0})
+        phase["seconds"] += seconds
+        phase["peakBytes"] = max(phase["peakBytes"], peakBytes)
+        phase["netBytes"] += netBytes
+
+    # Lex the whole source now, counting tokens by kind, and return a lexer that hands the same
+    # tokens to the parser. Lexing and parsing normally interleave, so this is what lets them be
+    # timed apart. A lexing error is raised when the parser reaches it, as it would be otherwise.
+    def replay(self, lexer):
+        tokens = []
+        lines = []
+        error = None
+        try:
+            token = lexer.getToken()
+            while token.kind != TokenType.EOF:
+                tokens.append(token)
+                lines.append(lexer.line)
+                token = lexer.getToken()
+        except SystemExit as e:
+            error = e.code
+        for token in tokens:
+            name = token.kind.name
+            self.tokens[name] = self.tokens.get(name, 0) + 1
+        return TokenReplay(tokens, error, lines)
+
+    def countStatements(self, statements: list) -> None:
+        for statement in statements:
+            name = type(statement).__name__
+            self.statements[name] = self.statements.get(name, 0) + 1
+            if type(statement) in (If, While, For):
+                self.countStatements(statement.body)
+
+    # The report as a dict ready for json.dump. tracer is the Tracer that counted productions.
+    def report(self, path: str, options, stats: dict, tracer) -> dict:
+        productions = {}
+        for name in tracer.calls:
+            if tracer.calls[name]:
+                productions[name] = {"calls": tracer.calls[name], "seconds": tracer.seconds[name]}
+        return {"source": path,
+                "sourceBytes": os.path.getsize(path),
+                "options": vars(options),
+                "seconds": self.seconds,
+                "phases": [dict(name=name, **phase) for name, phase in self.phases.items()],
+                "peakBytes": max((phase["peakBytes"] for phase in self.phases.values()), default=0),
+                "tokens": self.tokens,
+                "tokenCount": sum(self.tokens.values()),
+                "statements": self.statements,
+                "statementCount": sum(self.statements.values()),
+                "productions": productions,
+                "passes": stats,
+                "cprofile": self.cprofilePath}
+
+# Write a report to path as JSON.
+def writeProfile(report: dict, path: str) -> None:
+    with open(path, 'w') as profileFile:
+        json.dump(report, profileFile, indent=2)
+        profileFile.write("\n")
+
+# One timed block of a Profiler (see Profiler.phase).
+class Phase:
+    def __init__(self, profiler: Profiler, name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        tracemalloc.reset_peak()
+        self.before = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        seconds = time.perf_counter() - self.start
+        current, peak = tracemalloc.get_traced_memory()
+        self.profiler.record(self.name, seconds, peak - self.before, current - self.before)
+
+# Hands tokens lexed ahead of time to Parser in place of a lexer. lines holds the line of each
+# token; without them every token is on line 0.
+class TokenReplay:
+    def __init__(self, tokens: list, error, lines: list = None) -> None:
+        self.pending = iter(tokens)
+        self.error = error
+        self.lines = iter(lines) if lines is not None else None
+        self.line = 0       # Line of the last token returned, as in Lexer.
+
+    # Return the next token.
+    def getToken(self):
+        token = next(self.pending, None)
+        if token is not None:
+            if self.lines is not None:
+                self.line = next(self.lines)
+            return token
+        if self.error is not None:
+            sys.exit(self.error)
+        return Token('', TokenType.EOF)
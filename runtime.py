@@ -0,0 +1,443 @@
+# C runtime code emitted ahead of main() when the matching option is enabled.
+
+# Buffered output for RIZZ (--fast-output). Text is collected in one large buffer and handed to
+# stdio in bulk; numbers are formatted by hand. Prints exactly what the printf calls it replaces do.
+OUTPUTRUNTIME = r"""
+#define BRO_OUT_SIZE (1 << 16)
+static char bro_out[BRO_OUT_SIZE];
+static size_t bro_out_len;
+
+/* Hand everything buffered to stdio. Called before input, before printf and at exit. */
+static void bro_flush(void) {
+    fwrite(bro_out, 1, bro_out_len, stdout);
+    bro_out_len = 0;
+}
+
+static void bro_write(const char *text, size_t len) {
+    if (bro_out_len + len > BRO_OUT_SIZE) {
+        bro_flush();
+        if (len > BRO_OUT_SIZE) {
+            fwrite(text, 1, len, stdout);
+            return;
+        }
+    }
+    memcpy(bro_out + bro_out_len, text, len);
+    bro_out_len += len;
+}
+
+/* A string literal, whose length the C compiler already knows. */
+#define bro_print_literal(text) bro_write(text, sizeof(text) - 1)
+
+/* printf("%d\n", value) */
+static void bro_print_int(int value) {
+    char digits[16];
+    char *end = digits + sizeof(digits);
+    char *p = end;
+    unsigned int magnitude = value < 0 ? 0u - (unsigned int)value : (unsigned int)value;
+    *--p = '\n';
+    do {
+        *--p = (char)('0' + magnitude % 10);
+        magnitude /= 10;
+    } while (magnitude);
+    if (value < 0)
+        *--p = '-';
+    bro_write(p, (size_t)(end - p));
+}
+
+/* printf("%.2f\n", value) for a float promoted to double. A float has 24 significant bits, so
+   value * 100 is exact in a double and rounding it to the nearest integer, ties to even, gives
+   the same digits printf does. NaNs, infinities and huge values still go through snprintf. */
+static void bro_print_float(double value) {
+    char digits[64];
+    char *end = digits + sizeof(digits);
+    char *p = end;
+    double scaled, rest;
+    long long cents;
+    unsigned long long magnitude;
+    int i;
+
+    if (!(value > -1e15 && value < 1e15)) {
+        bro_write(digits, (size_t)snprintf(digits, sizeof(digits), "%.2f\n", value));
+        return;
+    }
+    scaled = value * 100;
+    cents = (long long)scaled;
+    rest = scaled - (double)cents;
+    if (rest > 0.5 || (rest == 0.5 && (cents & 1)))
+        cents++;
+    else if (rest < -0.5 || (rest == -0.5 && (cents & 1)))
+        cents--;
+
+    magnitude = cents < 0 ? 0ull - (unsigned long long)cents : (unsigned long long)cents;
+    *--p = '\n';
+    for (i = 0; i < 2; i++) {
+        *--p = (char)('0' + magnitude % 10);
+        magnitude /= 10;
+    }
+    *--p = '.';
+    do {
+        *--p = (char)('0' + magnitude % 10);
+        magnitude /= 10;
+    } while (magnitude);
+    if (signbit(value))
+        *--p = '-';     /* also -0.00, like printf */
+    bro_write(p, (size_t)(end - p));
+}
+"""
+
+# Block-buffered input for SKIBIDI (--fast-input). stdin is read in large blocks with read() and
+# numbers are parsed here. Each bro_read_* function returns what the scanf call it replaces does:
+# 1 on success, 0 on a matching failure (with the same characters consumed) and EOF at end of input.
+INPUTRUNTIME = r"""
+#define BRO_IN_SIZE (1 << 16)
+static char bro_in[BRO_IN_SIZE];
+static size_t bro_in_pos, bro_in_len;
+static int bro_in_eof;
+
+/* Text of the number being read, handed to strtof so floats round exactly like scanf. */
+static char *bro_token;
+static size_t bro_token_len, bro_token_cap;
+
+/* Next input character without consuming it, or EOF. End of input is sticky, as it is for stdin. */
+static int bro_peek(void) {
+    if (bro_in_pos == bro_in_len) {
+        ssize_t got;
+        if (bro_in_eof)
+            return EOF;
+        do {
+            got = read(0, bro_in, BRO_IN_SIZE);
+        } while (got < 0 && errno == EINTR);
+        if (got <= 0) {
+            bro_in_eof = 1;
+            return EOF;
+        }
+        bro_in_pos = 0;
+        bro_in_len = (size_t)got;
+    }
+    return (unsigned char)bro_in[bro_in_pos];
+}
+
+static int bro_is_space(int c) {
+    return c == ' ' || (c >= '\t' && c <= '\r');
+}
+
+/* Skip whitespace. Returns 0 at end of input. */
+static int bro_skip_space(void) {
+    int c;
+    while ((c = bro_peek()) != EOF && bro_is_space(c))
+        bro_in_pos++;
+    return c != EOF;
+}
+
+/* Consume the next character into the token text. */
+static void bro_take(void) {
+    if (bro_token_len + 1 >= bro_token_cap) {
+        bro_token_cap = bro_token_cap ? bro_token_cap * 2 : 64;
+        bro_token = realloc(bro_token, bro_token_cap);
+        if (bro_token == NULL)
+            abort();
+    }
+    bro_token[bro_token_len++] = bro_in[bro_in_pos++];
+    bro_token[bro_token_len] = '\0';
+}
+
+static void bro_take_sign(void) {
+    int c = bro_peek();
+    if (c == '+' || c == '-')
+        bro_take();
+}
+
+/* Consume decimal (or hex) digits; returns how many. */
+static size_t bro_take_digits(int hex) {
+    size_t count = 0;
+    int c;
+    while ((c = bro_peek()) != EOF && ((c >= '0' && c <= '9')
+            || (hex && ((c >= 'a' && c <= 'f') || (c >= 'A' && c <= 'F'))))) {
+        bro_take();
+        count++;
+    }
+    return count;
+}
+
+/* Consume the longest case-insensitive prefix of word; returns how many characters matched. */
+static size_t bro_take_word(const char *word) {
+    size_t matched = 0;
+    int c;
+    while (word[matched] && (c = bro_peek()) != EOF && (c | 0x20) == word[matched]) {
+        bro_take();
+        matched++;
+    }
+    return matched;
+}
+
+/* A failed inf or nan match also consumes the character that broke it, unlike other failures. */
+static int bro_fail_word(void) {
+    if (bro_peek() != EOF)
+        bro_in_pos++;
+    return 0;
+}
+
+/* scanf("%*s"): skip the offending word after a failed conversion. */
+static void bro_skip_word(void) {
+    int c;
+    if (!bro_skip_space())
+        return;
+    while ((c = bro_peek()) != EOF && !bro_is_space(c))
+        bro_in_pos++;
+}
+
+/* scanf("%d", target). strtol saturates at 64 bits, then the value is truncated to int. */
+static int bro_read_int(int *target) {
+    unsigned long long magnitude = 0, limit;
+    int negative, overflow = 0, digits = 0, c;
+
+    if (!bro_skip_space())
+        return EOF;
+    c = bro_peek();
+    negative = c == '-';
+    if (c == '+' || c == '-')
+        bro_in_pos++;
+    limit = negative ? 9223372036854775808ull : 9223372036854775807ull;
+    while ((c = bro_peek()) != EOF && c >= '0' && c <= '9') {
+        unsigned d = (unsigned)(c - '0');
+        if (magnitude > (limit - d) / 10)
+            overflow = 1;
+        else
+            magnitude = magnitude * 10 + d;
+        bro_in_pos++;
+        digits++;
+    }
+    if (!digits)
+        return 0;
+    if (overflow)
+        magnitude = limit;
+    *target = (int)(long long)(negative ? 0ull - magnitude : magnitude);
+    return 1;
+}
+
+/* scanf("%d") into a bool only keeps the low byte of the int. */
+static int bro_read_bool(bool *target) {
+    int value;
+    int result = bro_read_int(&value);
+    if (result == 1)
+        *target = (unsigned char)value != 0;
+    return result;
+}
+
+/* strtof(text). Plain decimals whose digits fit in a float's 24-bit mantissa, with at most 10
+   decimals, are one correctly rounded float division of two exact values, so they give the same
+   float as strtof without calling it. */
+static float bro_to_float(const char *text) {
+    static const float powers[] = {1e0f, 1e1f, 1e2f, 1e3f, 1e4f, 1e5f, 1e6f, 1e7f, 1e8f, 1e9f, 1e10f};
+    const char *p = text;
+    unsigned long mantissa = 0;
+    int decimals = -1;
+    float value;
+
+    if (*p == '+' || *p == '-')
+        p++;
+    for (; *p; p++) {
+        if (*p >= '0' && *p <= '9') {
+            mantissa = mantissa * 10 + (unsigned long)(*p - '0');
+            if (mantissa > (1ul << 24))
+                return strtof(text, NULL);
+            if (decimals >= 0 && ++decimals > 10)
+                return strtof(text, NULL);
+        } else if (*p == '.' && decimals < 0) {
+            decimals = 0;
+        } else {
+            return strtof(text, NULL);
+        }
+    }
+    value = (float)mantissa / powers[decimals < 0 ? 0 : decimals];
+    return *text == '-' ? -value : value;
+}
+
+/* scanf("%f", target), following glibc: inf or infinity (anything in between fails), nan without
+   a (...) suffix, hex floats, and an exponent marker without digits still converts the mantissa. */
+static int bro_read_float(float *target) {
+    int c, hex = 0, dot = 0;
+    size_t digits;
+
+    if (!bro_skip_space())
+        return EOF;
+    bro_token_len = 0;
+    bro_take_sign();
+    c = bro_peek();
+    if (c == 'i' || c == 'I') {
+        digits = bro_take_word("infinity");
+        if (digits != 3 && digits != 8)
+            return bro_fail_word();
+    } else if (c == 'n' || c == 'N') {
+        if (bro_take_word("nan") < 3)
+            return bro_fail_word();
+    } else {
+        digits = bro_take_digits(0);
+        if (digits == 1 && bro_token[bro_token_len - 1] == '0' && (bro_peek() | 0x20) == 'x') {
+            bro_take();
+            hex = 1;
+            digits = bro_take_digits(1);
+        }
+        if (bro_peek() == '.') {
+            bro_take();
+            dot = 1;
+            digits += bro_take_digits(hex);
+        }
+        if (!digits && !(hex && dot))
+            return 0;   /* glibc takes "0x." as 0, but not "0x" or "." */
+        if (digits && (bro_peek() | 0x20) == (hex ? 'p' : 'e')) {
+            bro_take();
+            bro_take_sign();
+            bro_take_digits(0);
+        }
+    }
+    *target = bro_to_float(bro_token);
+    return 1;
+}
+
+/* getc/ungetc over the input buffer, for the string runtime. */
+static int bro_getc(void) {
+    int c = bro_peek();
+    if (c != EOF)
+        bro_in_pos++;
+    return c;
+}
+
+#define BRO_GETC() bro_getc()
+#define BRO_UNGETC(c) (bro_in_pos--)
+"""
+
+# Length-tracked strings for str variables, emitted once a program declares one. A bro_str points
+# at a static literal or at its own heap buffer, which SKIBIDI reads words into and which is freed
+# once at exit. Reads stdin through the --fast-input runtime when that comes first, else stdio.
+STRINGRUNTIME = r"""
+typedef struct {
+    const char *ptr;
+    size_t len;
+    char *buf;      /* owned buffer for input, or NULL */
+    size_t cap;
+} bro_str;
+
+static void bro_str_set(bro_str *target, const char *ptr, size_t len) {
+    target->ptr = ptr;
+    target->len = len;
+}
+
+#ifndef BRO_GETC
+#define BRO_GETC() getchar()
+#define BRO_UNGETC(c) ungetc(c, stdin)
+#endif
+
+/* scanf("%s") into target, without a length limit. At end of input target is left alone. */
+static void bro_str_read(bro_str *target) {
+    size_t len = 0;
+    int c;
+    while ((c = BRO_GETC()) != EOF && isspace(c))
+        ;
+    if (c == EOF)
+        return;
+    do {
+        if (len == target->cap) {
+            target->cap = target->cap ? target->cap * 2 : 256;
+            target->buf = realloc(target->buf, target->cap);
+            if (target->buf == NULL)
+                abort();
+        }
+        target->buf[len++] = (char)c;
+    } while ((c = BRO_GETC()) != EOF && !isspace(c));
+    if (c != EOF)
+        BRO_UNGETC(c);
+    target->ptr = target->buf;
+    target->len = len;
+}
+
+/* printf("%s\n", text), written with its known length. */
+static void bro_str_print(const bro_str *text) {
+#ifdef BRO_OUT_SIZE
+    bro_write(text->ptr, text->len);
+    bro_write("\n", 1);
+#else
+    fwrite(text->ptr, 1, text->len, stdout);
+    putchar('\n');
+#endif
+}
+"""
+
+# SUM, MIN and MAX of an int[]. The size is always a constant, so once gcc inlines them these are
+# loops with a known trip count it can vectorize. The sum wraps like the VM's instead of
+# overflowing, which would be undefined. MIN and MAX keep BRO_LANES running results, which gcc
+# turns into vector compares even without SSE4.1's pminsd; one running result is a chain of
+# dependent compares and doesn't vectorize at all.
+REDUCTIONRUNTIME = r"""
+#define BRO_LANES 8
+
+static inline int bro_sum(const int *restrict a, int n) {
+    unsigned int total = 0;
+    for (int i = 0; i < n; i++)
+        total += (unsigned int)a[i];
+    return (int)total;
+}
+
+static inline int bro_min(const int *restrict a, int n) {
+    int lanes[BRO_LANES];
+    int i = 0;
+    for (int k = 0; k < BRO_LANES; k++)
+        lanes[k] = a[0];
+    for (; i + BRO_LANES <= n; i += BRO_LANES)
+        for (int k = 0; k < BRO_LANES; k++)
+            lanes[k] = a[i + k] < lanes[k] ? a[i + k] : lanes[k];
+    for (; i < n; i++)
+        lanes[0] = a[i] < lanes[0] ? a[i] : lanes[0];
+    for (int k = 1; k < BRO_LANES; k++)
+        lanes[0] = lanes[k] < lanes[0] ? lanes[k] : lanes[0];
+    return lanes[0];
+}
+
+static inline int bro_max(const int *restrict a, int n) {
+    int lanes[BRO_LANES];
+    int i = 0;
+    for (int k = 0; k < BRO_LANES; k++)
+        lanes[k] = a[0];
+    for (; i + BRO_LANES <= n; i += BRO_LANES)
+        for (int k = 0; k < BRO_LANES; k++)
+            lanes[k] = a[i + k] > lanes[k] ? a[i + k] : lanes[k];
+    for (; i < n; i++)
+        lanes[0] = a[i] > lanes[0] ? a[i] : lanes[0];
+    for (int k = 1; k < BRO_LANES; k++)
+        lanes[0] = lanes[k] > lanes[0] ? lanes[k] : lanes[0];
+    return lanes[0];
+}
+"""
+
+# Counters of --instrument. Code generation declares BRO_COUNTERS counters in bro_counts, with the
+# .pog line of each in bro_count_lines and its label in bro_count_labels[bro_count_kinds[i]], and
+# BRO_PROFILE_PATH; main registers bro_dump_profile with atexit. The profile is plain text, one
+# counter per line: the .pog line, the label and the count, tab separated. $BRO_PROFILE overrides
+# where it goes.
+# bro_cycles() reads the time stamp counter on x86, and counts nanoseconds elsewhere.
+INSTRUMENTRUNTIME = r"""
+#if defined(__x86_64__) || defined(__i386__)
+#include <x86intrin.h>
+static inline unsigned long long bro_cycles(void) { return __rdtsc(); }
+#else
+#include <time.h>
+static inline unsigned long long bro_cycles(void) {
+    struct timespec now;
+    clock_gettime(CLOCK_MONOTONIC, &now);
+    return (unsigned long long)now.tv_sec * 1000000000ull + (unsigned long long)now.tv_nsec;
+}
+#endif
+
+static void bro_dump_profile(void) {
+    const char *path = getenv("BRO_PROFILE");
+    FILE *file = fopen(path && *path ? path : BRO_PROFILE_PATH, "w");
+    if (!file) {
+        fprintf(stderr, "Could not write the profile to %s\n", path && *path ? path : BRO_PROFILE_PATH);
+        return;
+    }
+    fprintf(file, "# line\tcounter\tcount\n");
+    for (int i = 0; i < BRO_COUNTERS; i++)
+        fprintf(file, "%d\t%s\t%llu\n", bro_count_lines[i], bro_count_labels[bro_count_kinds[i]], bro_counts[i]);
+    fclose(file);
+}
+"""
@@ -0,0 +1,190 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import shutil
+import signal
+import socket
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import main as compilerMain
+
+# Compile server: keeps compilers warm behind a Unix domain socket, so a compile doesn't pay for
+# starting Python and importing the compiler every time. client.py sends it the command line of
+# main.py; asyncio takes requests from any number of clients at once and hands each to a pool of
+# worker processes, which imported the compiler once when the pool started and keep whatever
+# they have loaded between requests. The compile cache works as with main.py.
+# A request is one line of JSON: {"argv": [...], "cwd": ..., "env": {...}, "scratch": ...}, where
+# scratch is a directory of the client's that --run may put the executable in. The reply is one
+# line of JSON: {"stdout": ..., "stderr": ..., "code": ...}, plus for --run either "binary" and
+# "timings" for the client to run the program itself, or "local" when the client has to run
+# main.py itself (the VM backend reads and writes the terminal directly).
+# Usage: python server.py [--socket PATH] [--workers N]
+
+# Socket path shared by server and client: $POG_SOCKET, or one per user in /tmp.
+def socketPath() -> str:
+    return os.environ.get("POG_SOCKET") or "/tmp/pog-%d.sock" % os.getuid()
+
+# Longest request line accepted; the client's environment travels with it.
+REQUESTLIMIT = 1 << 22
+
+# Raised by buildOnly to end a --run request once the executable is built.
+class Built(Exception):
+    def __init__(self, binary: str, timings: str, notes: str) -> None:
+        self.binary = binary
+        self.timings = timings
+        self.notes = notes
+
+# Raised to end a --run request the client has to run locally.
+class RunLocally(Exception):
+    pass
+
+# Serve one request in a worker: run main.py's main in the client's directory and environment
+# and capture what it prints and the status it exits with.
+def serveRequest(request: dict) -> dict:
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    reply = {}
+    cwd = os.getcwd()
+    env = dict(os.environ)
+
+    # Build the executable into the client's scratch directory and stop there; the client runs it.
+    def buildOnly(args, options, cache) -> int:
+        if args.backend == "vm":
+            raise RunLocally()
+        binary, timings = compilerMain.buildProgram(args, options, cache, request["scratch"])
+        if os.path.dirname(os.path.abspath(binary)) != os.path.abspath(request["scratch"]):
+            # A cached binary may be evicted by another compile before the client gets to run it.
+            binary = shutil.copy2(binary, os.path.join(request["scratch"], "program"))
+        raise Built(os.path.abspath(binary), timings, compilerMain.runNotes(args))
+
+    try:
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                compilerMain.main(request["argv"], buildOnly)
+                code = 0
+            except SystemExit as e:
+                code = exitStatus(e.code, stderr)
+    except Built as built:
+        code = 0
+        reply.update(binary=built.binary, timings=built.timings, notes=built.notes)
+    except RunLocally:
+        code = 0
+        reply["local"] = True
+    except Exception as e:
+        code = exitStatus("Error: " + type(e).__name__ + ": " + str(e), stderr)
+    finally:
+        os.environ.clear()
+        os.environ.update(env)
+        os.chdir(cwd)
+    reply.update(stdout=stdout.getvalue(), stderr=stderr.getvalue(), code=code)
+    return reply
+
+# The exit status for a SystemExit code, writing a message the way the interpreter would.
+def exitStatus(code, stderr) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    stderr.write(str(code) + "\n")
+    return 1
+
+# Runs first in every worker. argparse names the program after sys.argv[0], so usage and error
+# messages read as main.py's.
+def startWorker() -> None:
+    sys.argv = [compilerMain.__file__]
+
+# The compiler is already imported with this module; running this once per worker only makes the
+# pool start all of them up front instead of on the first requests.
+def warm(number: int) -> int:
+    return os.getpid()
+
+class CompileServer:
+    def __init__(self, path: str, workers: int) -> None:
+        self.path = path
+        self.workers = workers
+        self.pool = None
+
+    def serve(self) -> None:
+        self.claimSocket()
+        self.startPool()
+        try:
+            asyncio.run(self.listen())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.pool.shutdown()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def startPool(self) -> None:
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=startWorker)
+        list(self.pool.map(warm, range(self.workers)))
+
+    # Take over the socket path, unless another server is still listening on it.
+    def claimSocket(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+            sys.exit("Error: A compile server is already listening on " + self.path + ".")
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.remove(self.path)    # Left behind by a server that is gone.
+        finally:
+            probe.close()
+
+    async def listen(self) -> None:
+        server = await asyncio.start_unix_server(self.handle, path=self.path, limit=REQUESTLIMIT)
+        os.chmod(self.path, 0o600)
+        print("Compile server listening on %s with %d workers." % (self.path, self.workers), flush=True)
+        # Stop on SIGTERM as on Ctrl-C, so the socket is removed either way.
+        stopped = asyncio.get_running_loop().create_future()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set_result, None)
+        async with server:
+            await stopped
+
+    # Serve a request in the pool. A worker that dies (killed, out of memory) breaks the whole
+    # pool for good, so a broken pool is replaced by a new one and the request is tried once more.
+    async def serveInPool(self, request: dict) -> dict:
+        for attempt in range(2):
+            pool = self.pool
+            try:
+                return await asyncio.get_running_loop().run_in_executor(pool, serveRequest, request)
+            except BrokenProcessPool:
+                if self.pool is pool:   # Other requests may have seen the same pool break.
+                    print("A worker died; starting new workers.", file=sys.stderr, flush=True)
+                    pool.shutdown(wait=False)
+                    self.startPool()
+        return {"stdout": "", "stderr": "Error: The compile server's workers died while compiling.\n", "code": 1}
+
+    async def handle(self, reader, writer) -> None:
+        try:
+            line = await reader.readline()
+            if line:
+                request = json.loads(line)
+                reply = await self.serveInPool(request)
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            print("Dropped a request: " + type(e).__name__ + ": " + str(e), file=sys.stderr, flush=True)
+        finally:
+            writer.close()
+
+def main():
+    argParser = argparse.ArgumentParser(description="Serve compiles of .pog files to client.py over a Unix domain socket.")
+    argParser.add_argument("--socket", default=socketPath(),
+                           help="socket path (default: $POG_SOCKET or /tmp/pog-UID.sock)")
+    argParser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                           help="compiler processes serving requests at once (default: number of CPUs)")
+    args = argParser.parse_args()
+    CompileServer(args.socket, max(1, args.workers)).serve()
+
+if __name__ == "__main__":
+    main()
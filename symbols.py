@@ -0,0 +1,66 @@
+from nodes import *
+
+# Typed symbol table used by Parser, and the static types of expressions.
+
+# Types an expression can have, widest last. Comparisons give a bool, and anything mixed with a
+# float literal (a C double) or a float variable is a float.
+NUMERICTYPES = ("bool", "int", "float")
+
+# Maps every declared variable to its type: "int", "float", "str", "bool" or "int[]", and every
+# array to its size. A name keeps the type it was first declared with.
+class SymbolTable:
+    def __init__(self) -> None:
+        self.types = {}
+        self.sizes = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.types
+
+    # Type of name, or None if it hasn't been declared.
+    def lookup(self, name: str):
+        return self.types.get(name)
+
+    def declare(self, name: str, varType: str, size: int = None) -> None:
+        self.types[name] = varType
+        if size is not None:
+            self.sizes[name] = size
+
+    # Forget name again, once the SQUAD loop it belongs to has ended.
+    def undeclare(self, name: str) -> None:
+        del self.types[name]
+
+# Static type of an expression: one of NUMERICTYPES, or the type of the first operand that isn't
+# a number ("str" or "int[]") so the caller can report it. Follows C's usual arithmetic
+# conversions, so int-only arithmetic stays int.
+def expressionType(node: Node) -> str:
+    kind = type(node)
+    if kind is Number:
+        return "float" if node.isFloat else "int"
+    if kind is Variable:
+        return node.varType
+    if kind is Bool:
+        return "bool"
+    if kind is Index or kind is Reduce:
+        return "int"
+    if kind is UnaryOp:
+        operandType = expressionType(node.operand)
+        return "int" if operandType == "bool" else operandType
+
+    leftType = expressionType(node.left)
+    if leftType not in NUMERICTYPES:
+        return leftType
+    rightType = expressionType(node.right)
+    if rightType not in NUMERICTYPES:
+        return rightType
+    if node.op in ("+", "-", "*", "/"):
+        return "float" if "float" in (leftType, rightType) else "int"
+    return "bool"
+
+# Whether a value of valueType can be stored in a variable of varType. A float going into an int
+# or bool would silently lose its fraction, so that is a compile error rather than a C conversion.
+def assignable(varType: str, valueType: str) -> bool:
+    if varType == "float":
+        return valueType in NUMERICTYPES
+    if varType in ("int", "bool"):
+        return valueType in ("int", "bool")
+    return False
@@ -43,6 +43,14 @@ class TokenType(enum.Enum):
 	CHAT = 121
     # THANKS CHAT = ENDIF
 	THANKS = 122
+	# SQUAD i FROM a UNTIL b = for i in range(a, b), in parallel when it is safe
+	SQUAD = 123
+	FROM = 124
+	UNTIL = 125
+	# SUM a, MIN a and MAX a reduce a whole int[]
+	SUM = 126
+	MIN = 127
+	MAX = 128
 
 	# Operators.
 	#EQ = 201  
@@ -59,14 +67,15 @@ class TokenType(enum.Enum):
 
 
 class Token:
+    __slots__ = ("text", "kind")
+
     def __init__(self, tokenText: str, tokenKind: TokenType) -> None:
         self.text = tokenText  # The token's actual text
         self.kind = tokenKind  # The tokentype that this token is classified as
     
     def checkIfKeyword(tokenText: str) -> Optional[TokenType]:
-        for kind in TokenType:
-            # Relies on all keyword enum values being 1XX
-            if kind.name == tokenText and kind.value >= 100 and kind.value < 200:
-                return kind
-        
-        return None
+        return KEYWORDS.get(tokenText)
+
+
+# Keyword text -> TokenType, built once. Relies on all keyword enum values being 1XX
+KEYWORDS = {kind.name: kind for kind in TokenType if kind.value >= 100 and kind.value < 200}
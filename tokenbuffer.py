@@ -0,0 +1,226 @@
+import mmap
+import re
+from array import array
+from lexer import *
+from tok import *
+from fastlexer import OPERATORS
+
+# MASTER from fastlexer.py, over bytes. The source has no newline appended here, so a comment
+# must not give back characters to let a token match at the very end.
+BYTEMASTER = re.compile(rb'[ \t\r]*(?:#[^\n]*+)?'
+                        rb'(?:([A-Za-z][A-Za-z0-9]*)'
+                        rb'|([0-9]+(?:\.[0-9]+)?)'
+                        rb'|(==|!=|>=?|<=?|[-+*/\[\],\n])'
+                        rb'|("[^"\r\n\t\\%]*"))')
+
+# Only whitespace and a comment left before the end of the source.
+BYTETAIL = re.compile(rb'[ \t\r]*(?:#[^\n]*)?\Z')
+
+BYTEOPERATORS = {text.encode(): kind.value for text, kind in OPERATORS.items()}
+BYTEKEYWORDS = {text.encode(): kind.value for text, kind in KEYWORDS.items()}
+KINDS = {kind.value: kind for kind in TokenType}
+
+NEWLINEKIND = TokenType.NEWLINE.value
+EOFKIND = TokenType.EOF.value
+INTEGERKIND = TokenType.INTEGER.value
+FLOATKIND = TokenType.FLOAT.value
+STRINGKIND = TokenType.STRING.value
+IDENTKIND = TokenType.IDENT.value
+
+# The bytes of the file at path as a read-only memory map. Reading in text mode turns \r\n and \r
+# into \n, which has to happen here too, so such files are translated into memory instead.
+def mapSource(path: str):
+    with open(path, 'rb') as sourceFile:
+        try:
+            mapping = mmap.mmap(sourceFile.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return b""  # Empty files can't be mapped.
+    if mapping.find(b"\r") == -1:
+        return mapping
+    data = mapping[:].replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    mapping.close()
+    return data
+
+# Every token as four parallel array columns (kind, start and end byte offset, line) over the
+# source bytes, which can be a memory-mapped file. Token text is only decoded when the parser asks
+# for it, so a token costs 14 bytes instead of a Token object and a copy of its text.
+# Lexing follows Lexer exactly: the source is read as if it had a newline appended, anything
+# the byte pattern can't decide (errors, non-ASCII text, '\0') goes through Lexer.getToken one line at
+# a time, and a lexing error is raised only when the parser reaches it.
+class TokenBuffer:
+    def __init__(self, data) -> None:
+        self.data = data    # bytes, or an mmap of the source file
+        self.kinds = array('h')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.lines = array('I')
+        self.error = None   # Lexing error after the last token, raised by TokenCursor.
+        self.texts = {}     # Source bytes -> decoded text of identifiers, numbers and keywords.
+        self.lex()
+
+    # Lex the file at path straight from a memory map; see mapSource.
+    @classmethod
+    def fromFile(cls, path: str):
+        return cls(mapSource(path))
+
+    # Unmap the source. Token text can't be read after this.
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    # Text of token index, decoded from the source.
+    def text(self, index: int) -> str:
+        kind = self.kinds[index]
+        if kind == NEWLINEKIND:
+            return '\n'     # Also the appended newline, which isn't in data.
+        if kind == EOFKIND:
+            return ''
+        raw = self.data[self.starts[index]:self.ends[index]]
+        if kind == STRINGKIND:
+            return str(raw, "utf-8")
+        # Share one str per identifier and number, so the tree doesn't hold a copy per use.
+        text = self.texts.get(raw)
+        if text is None:
+            text = self.texts[raw] = str(raw, "utf-8")
+        return text
+
+    def cursor(self):
+        return TokenCursor(self)
+
+    def add(self, kind: int, start: int, end: int, line: int) -> None:
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+
+    def lex(self) -> None:
+        data = self.data
+        length = len(data)
+        kinds = self.kinds.append
+        starts = self.starts.append
+        ends = self.ends.append
+        lines = self.lines.append
+        line = 1
+        pos = 0
+
+        while pos < length:
+            for m in BYTEMASTER.finditer(data, pos):
+                if m.start() != pos:
+                    break   # The pattern skipped over something it couldn't match.
+                end = m.end()
+                group = m.lastindex
+                if end < length and group != 3 and (data[end] >= 0x80 or (group == 2 and data[end] == 0x2E)):
+                    break   # Unicode letters/digits or a malformed number; let the slow path decide.
+                start = m.start(group)
+                if group == 1:
+                    kind = BYTEKEYWORDS.get(data[start:end], IDENTKIND)
+                elif group == 2:
+                    kind = FLOATKIND if data.find(b".", start, end) != -1 else INTEGERKIND
+                elif group == 3:
+                    kind = BYTEOPERATORS[data[start:end]]
+                else:
+                    kind = STRINGKIND
+                kinds(kind)
+                starts(start)
+                ends(end)
+                lines(line)
+                if kind == NEWLINEKIND:
+                    line += 1
+                pos = end
+            else:
+                if BYTETAIL.match(data, pos):
+                    pos = length
+
+            if pos < length:
+                pos, line = self.lexSlowly(pos, line)
+                if pos is None:
+                    return
+
+        # The newline Lexer appends, then EOF.
+        self.add(NEWLINEKIND, length, length, line)
+        self.add(EOFKIND, length, length, line + 1)
+
+    # Lex the rest of the line at pos with Lexer. A string may end with a newline, so the line
+    # runs on while a newline is directly followed by a quote. Returns (position, line) after it,
+    # or (None, line) when the token stream ended there.
+    def lexSlowly(self, pos: int, line: int) -> tuple:
+        data = self.data
+        length = len(data)
+        stop = data.find(b"\n", pos)
+        while stop != -1 and stop + 1 < length and data[stop + 1] == 0x22:
+            stop = data.find(b"\n", stop + 1)
+        last = stop == -1
+        stop = length if last else stop + 1
+        text = str(data[pos:stop], "utf-8")
+        lexer = Lexer(text if last else text[:-1])  # Lexer adds the line's newline back.
+
+        # Byte offsets of the characters, for ASCII-only text they are the same.
+        ascii = len(text) == stop - pos
+        offset = lambda index: min(stop, pos + (index if ascii else len(text[:index].encode("utf-8"))))
+        try:
+            while True:
+                token = lexer.getToken()
+                kind = token.kind.value
+                if kind == EOFKIND:
+                    if lexer.curPos <= len(lexer.source):
+                        self.add(EOFKIND, offset(lexer.curPos - 1), offset(lexer.curPos - 1), line)
+                        return None, line   # A '\0' in the source ends the stream.
+                    if last:
+                        self.add(EOFKIND, length, length, line)
+                        return None, line
+                    return stop, line
+                end = lexer.curPos
+                self.add(kind, offset(end - len(token.text)), offset(end), line)
+                if kind == NEWLINEKIND:
+                    line += 1
+                elif kind == STRINGKIND:
+                    line += token.text.count('\n')
+        except SystemExit as e:
+            self.error = str(e.code)
+            return None, line
+
+# Hands the tokens of a TokenBuffer to Parser in place of a lexer.
+class TokenCursor:
+    def __init__(self, buffer: TokenBuffer) -> None:
+        self.buffer = buffer
+        self.index = 0
+        self.line = 0       # Line of the last token returned, as in Lexer.
+
+    # Return the next token.
+    def getToken(self):
+        buffer = self.buffer
+        index = self.index
+        if index >= len(buffer.kinds):
+            if buffer.error is not None:
+                sys.exit(buffer.error)
+            return Token('', TokenType.EOF)
+        self.index = index + 1
+        self.line = buffer.lines[index]
+        return BufferToken(KINDS[buffer.kinds[index]], buffer, index)
+
+# A token of a TokenBuffer. The text is only decoded when it is read.
+class BufferToken:
+    __slots__ = ("kind", "buffer", "index")
+
+    def __init__(self, kind: TokenType, buffer: TokenBuffer, index: int) -> None:
+        self.kind = kind
+        self.buffer = buffer
+        self.index = index
+
+    @property
+    def text(self) -> str:
+        return self.buffer.text(self.index)
+
+    @property
+    def line(self) -> int:
+        return self.buffer.lines[self.index]
@@ -0,0 +1,68 @@
+import sys
+import time
+
+# Production rules of Parser that can be traced, and the name printed for them in a full trace.
+PRODUCTIONS = {"program": "PROGRAM",
+               "statement": "STATEMENT",
+               "nl": "NEWLINE",
+               "expression": "EXPRESSION",
+               "term": "TERM",
+               "unary": "UNARY",
+               "primary": "PRIMARY",
+               "comparison": "COMPARISON",
+               "intializeVariable": "INITIALIZE"}
+
+TRACEMODES = ["off", "counts", "full"]
+
+# Counts calls and cumulative time per production of a Parser, optionally printing every call.
+# Nothing is hooked unless attach() is called, so an untraced parser pays nothing.
+class Tracer:
+    def __init__(self, mode: str = "counts", stream=None) -> None:
+        if mode not in TRACEMODES:
+            sys.exit("Error: Unknown trace mode " + mode)
+        self.mode = mode
+        self.stream = stream if stream is not None else sys.stdout
+        self.calls = {name: 0 for name in PRODUCTIONS}
+        self.seconds = {name: 0.0 for name in PRODUCTIONS}
+        self.depth = {name: 0 for name in PRODUCTIONS}
+
+    # Wrap the production methods on this parser instance. Self-calls inside Parser go
+    # through the instance attributes, so recursive productions are counted too.
+    def attach(self, parser) -> None:
+        if self.mode == "off":
+            return
+        for name in PRODUCTIONS:
+            setattr(parser, name, self.wrap(name, getattr(parser, name)))
+
+    def wrap(self, name: str, method):
+        calls = self.calls
+        seconds = self.seconds
+        depth = self.depth
+        stream = self.stream
+        event = PRODUCTIONS[name] if self.mode == "full" else None
+        clock = time.perf_counter
+
+        def traced(*args):
+            if event is not None:
+                stream.write(event + "\n")
+            calls[name] += 1
+            depth[name] += 1
+            start = clock()
+            try:
+                return method(*args)
+            finally:
+                depth[name] -= 1
+                # Only the outermost call of a recursive production adds to its cumulative time.
+                if depth[name] == 0:
+                    seconds[name] += clock() - start
+
+        return traced
+
+    # Print call counts and cumulative time for every production that ran.
+    def report(self) -> None:
+        if self.mode == "off":
+            return
+        self.stream.write("%-20s %10s %12s\n" % ("production", "calls", "cumulative"))
+        for name in PRODUCTIONS:
+            if self.calls[name]:
+                self.stream.write("%-20s %10d %11.6fs\n" % (name, self.calls[name], self.seconds[name]))
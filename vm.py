@@ -0,0 +1,665 @@
+import math
+import struct
+import sys
+from array import array
+from nodes import *
+from analysis import elementwise
+
+# Bytecode backend: compiles the AST into a flat array of (opcode, argument) pairs and runs it
+# in a single dispatch loop, with the same results the generated C would print.
+# Values follow the C types: int wraps at 32 bits, float is rounded to single precision after
+# every operation, float literals are double, and bool is stored as 0/1.
+
+# Opcodes. Every instruction is two array slots: the opcode and its argument (0 if unused).
+CONST = 0       # push consts[arg]
+LOAD = 1        # push variables[arg]
+STOREINT = 2    # pop, convert to int, store in variables[arg]
+STOREFLOAT = 3
+STOREBOOL = 4
+STORE = 5       # pop and store as is (strings, and doubles the loop optimizer introduces)
+ADDINT = 6
+SUBINT = 7
+MULINT = 8
+DIVINT = 9
+ADDFLOAT = 10
+SUBFLOAT = 11
+MULFLOAT = 12
+DIVFLOAT = 13
+ADDDOUBLE = 14
+SUBDOUBLE = 15
+MULDOUBLE = 16
+DIVDOUBLE = 17
+NEGINT = 18
+NEG = 19
+TOFLOAT = 20    # convert the value arg slots below the top of the stack to float
+LT = 21
+LTEQ = 22
+GT = 23
+GTEQ = 24
+EQEQ = 25
+NOTEQ = 26
+JUMP = 27
+JUMPIFFALSE = 28
+PRINTSTRING = 29    # write consts[arg]
+PRINTINT = 30
+PRINTFLOAT = 31
+PRINTBOOL = 32
+INPUT = 33      # read variables[arg] from stdin; the next instruction's argument is the type code
+NEWARRAY = 34   # push a new list holding the elements of consts[arg]
+LOADINDEX = 35  # pop an index, push element index of the list in variables[arg]
+STOREINDEX = 36 # pop a value and an index, store the value as an int at that index
+SUMARRAY = 37   # push the sum of the list in variables[arg], wrapped to an int
+MINARRAY = 38
+MAXARRAY = 39
+
+INPUTTYPES = ["int", "float", "str", "bool"]
+
+ARITHMETIC = {"int": {"+": ADDINT, "-": SUBINT, "*": MULINT, "/": DIVINT},
+              "float": {"+": ADDFLOAT, "-": SUBFLOAT, "*": MULFLOAT, "/": DIVFLOAT},
+              "double": {"+": ADDDOUBLE, "-": SUBDOUBLE, "*": MULDOUBLE, "/": DIVDOUBLE}}
+COMPARISONS = {"<": LT, "<=": LTEQ, ">": GT, ">=": GTEQ, "==": EQEQ, "!=": NOTEQ}
+STORES = {"int": STOREINT, "float": STOREFLOAT, "bool": STOREBOOL, "str": STORE, "double": STORE}
+PRINTS = {"int": PRINTINT, "float": PRINTFLOAT, "bool": PRINTBOOL}
+REDUCTIONS = {"SUM": SUMARRAY, "MIN": MINARRAY, "MAX": MAXARRAY}
+
+INTMIN = -2 ** 31
+
+# Raised by VM.run when a program runs more loop trips than its budget.
+class BudgetExceeded(Exception):
+    pass
+
+def wrapInt(value: int) -> int:
+    return ((value + 2 ** 31) & 0xFFFFFFFF) - 2 ** 31
+
+# C's conversion of a floating value to int. x86 gives INT_MIN for anything out of range.
+def truncateInt(value) -> int:
+    if isinstance(value, int):
+        return wrapInt(value)
+    if value != value or not -2147483649.0 < value < 2147483648.0:
+        return INTMIN
+    return int(value)
+
+# Round a value to single precision, like storing it in a C float.
+def toFloat32(value) -> float:
+    try:
+        return struct.unpack('f', struct.pack('f', value))[0]
+    except OverflowError:
+        return math.copysign(math.inf, value)
+
+# x86 gives a NaN with the sign bit set when an operation on non-NaN values is invalid (inf - inf,
+# 0 * inf, 0 / 0); NaN operands pass through unchanged.
+def invalidNan(result: float, a: float, b: float) -> float:
+    if a == a and b == b:
+        return -math.nan
+    return result
+
+# IEEE division, which C gives for float and double operands.
+def divideFloat(a: float, b: float) -> float:
+    try:
+        return a / b
+    except ZeroDivisionError:
+        if a != a:
+            return a
+        if a == 0:
+            return -math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+# printf("%.2f") of a double, including glibc's spelling of infinities and NaNs.
+def formatFloat(value: float) -> str:
+    if value != value:
+        return "-nan" if math.copysign(1.0, value) < 0 else "nan"
+    return "%.2f" % value
+
+# The characters a printf("<literal>\n") call writes for a RIZZ string literal.
+def printedText(literal: str) -> str:
+    text = literal[1:-1] + "\\n"
+    out = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == "\\" and i + 1 < len(text):
+            escape = text[i + 1]
+            out.append({"n": "\n", "t": "\t", "\\": "\\", "\"": "\""}.get(escape, escape))
+            i += 2
+        elif char == "%" and text.startswith("%%", i):
+            out.append("%")
+            i += 2
+        else:
+            out.append(char)
+            i += 1
+    return "".join(out)
+
+
+# Reads stdin the way the generated scanf calls do.
+class InputReader:
+    def __init__(self, stream) -> None:
+        self.stream = stream
+        self.line = ""
+        self.pos = 0
+
+    # Current character without consuming it, or '' at end of input. Reads a line at a time
+    # so interactive programs only wait for the line they need.
+    def peek(self) -> str:
+        if self.pos >= len(self.line):
+            self.line = self.stream.readline()
+            self.pos = 0
+            if not self.line:
+                return ""
+        return self.line[self.pos]
+
+    def skipWhitespace(self) -> bool:
+        char = self.peek()
+        while char and char.isspace():
+            self.pos += 1
+            char = self.peek()
+        return char != ""
+
+    # Consume characters while they match; returns what was consumed.
+    def takeWhile(self, accept) -> str:
+        taken = []
+        char = self.peek()
+        while char and accept(char):
+            taken.append(char)
+            self.pos += 1
+            char = self.peek()
+        return "".join(taken)
+
+    # Consume the longest prefix of word (case-insensitive); returns how many characters matched.
+    def takeWord(self, word: str) -> int:
+        matched = 0
+        while matched < len(word) and self.peek().lower() == word[matched]:
+            self.pos += 1
+            matched += 1
+        return matched
+
+    def takeSign(self) -> str:
+        char = self.peek()
+        if char == "+" or char == "-":
+            self.pos += 1
+            return char
+        return ""
+
+    # A failed inf or nan match also consumes the character that broke it, unlike other failures.
+    def failWord(self) -> bool:
+        if self.peek():
+            self.pos += 1
+        return False
+
+    # scanf("%*s"): skip the offending word after a failed conversion.
+    def skipWord(self) -> None:
+        if self.skipWhitespace():
+            self.takeWhile(lambda char: not char.isspace())
+
+    # scanf("%d"). Returns None at end of input, False on a matching failure, else the value.
+    def readInt(self):
+        if not self.skipWhitespace():
+            return None
+        sign = self.takeSign()
+        digits = self.takeWhile(lambda char: "0" <= char <= "9")
+        if not digits:
+            return False
+        # strtol saturates at 64 bits, then the value is truncated to int.
+        value = max(-2 ** 63, min(2 ** 63 - 1, int(sign + digits)))
+        return wrapInt(value)
+
+    # scanf("%f"), following glibc: inf or infinity (anything in between fails), nan without a
+    # (...) suffix, hex floats, and an exponent marker without digits still converts the mantissa.
+    def readFloat(self):
+        if not self.skipWhitespace():
+            return None
+        sign = self.takeSign()
+        char = self.peek().lower()
+        if char == "i":
+            if self.takeWord("infinity") not in (3, 8):
+                return self.failWord()
+            return toFloat32(float(sign + "inf"))
+        if char == "n":
+            if self.takeWord("nan") < 3:
+                return self.failWord()
+            return toFloat32(float(sign + "nan"))
+
+        isHex = False
+        digitClass = lambda char: "0" <= char <= "9"
+        mantissa = self.takeWhile(digitClass)
+        if mantissa == "0" and self.peek() in ("x", "X"):
+            self.pos += 1
+            isHex = True
+            digitClass = lambda char: char in "0123456789abcdefABCDEF"
+            mantissa = self.takeWhile(digitClass)
+        if self.peek() == ".":
+            self.pos += 1
+            fraction = self.takeWhile(digitClass)
+            if not mantissa and not fraction:
+                if not isHex:
+                    return False
+                mantissa = "0"  # glibc takes "0x." as 0, but not "0x" or "."
+            mantissa += "." + fraction
+        elif not mantissa:
+            return False
+
+        exponent = ""
+        if mantissa != "0." and self.peek() in (("p", "P") if isHex else ("e", "E")):
+            self.pos += 1
+            expSign = self.takeSign()
+            expDigits = self.takeWhile(lambda char: "0" <= char <= "9")
+            if expDigits:
+                exponent = ("p" if isHex else "e") + expSign + expDigits
+
+        if isHex:
+            try:
+                value = float.fromhex(sign + "0x" + mantissa + (exponent or "p0"))
+            except OverflowError:
+                value = float(sign + "inf")
+        else:
+            value = float(sign + mantissa + exponent)
+        return toFloat32(value)
+
+    # scanf("%s"). Returns None at end of input.
+    def readWord(self):
+        if not self.skipWhitespace():
+            return None
+        return self.takeWhile(lambda char: not char.isspace())
+
+
+# Compiles a Program into bytecode.
+class BytecodeCompiler:
+    def __init__(self) -> None:
+        self.code = array('i')
+        self.consts = []
+        self.constIndex = {}
+        self.slots = {}         # variable name -> index in the variables list
+        self.types = {}         # variable name -> declared type
+        self.sizes = {}         # int[] name -> declared size
+        self.loops = 0          # SQUAD loops compiled, to name their hidden end variables
+        self.arrays = 0         # whole-array assignments compiled, to name their hidden variables
+
+    def compile(self, program: Program):
+        self.block(program.statements)
+        return Bytecode(self.code, self.consts, self.slots, self.types, self.initial())
+
+    def emit(self, op: int, arg: int = 0) -> int:
+        self.code.append(op)
+        self.code.append(arg)
+        return len(self.code) - 2
+
+    def const(self, value) -> int:
+        key = (type(value), value)
+        if key not in self.constIndex:
+            self.constIndex[key] = len(self.consts)
+            self.consts.append(value)
+        return self.constIndex[key]
+
+    def slot(self, name: str) -> int:
+        if name not in self.slots:
+            self.slots[name] = len(self.slots)
+        return self.slots[name]
+
+    def declare(self, name: str, varType: str) -> None:
+        self.types.setdefault(name, varType)
+        self.slot(name)
+
+    # The value of every variable before its declaration runs, which a declaration in a block
+    # that never runs leaves it with: zero of its type, as C declares all of them up front.
+    def initial(self) -> list:
+        values = [0] * len(self.slots)
+        for name, slot in self.slots.items():
+            varType = self.types.get(name)
+            if varType == "str":
+                values[slot] = ""
+            elif varType == "float":
+                values[slot] = 0.0
+            elif varType == "int[]":
+                values[slot] = (0,) * self.sizes[name]
+        return values
+
+    def block(self, statements: list) -> None:
+        for statement in statements:
+            getattr(self, "gen" + type(statement).__name__)(statement)
+
+    # Statements
+
+    def genPrint(self, node: Print) -> None:
+        if node.format == "string":
+            self.emit(PRINTSTRING, self.const(printedText(node.value)))
+        elif node.format == "str":
+            self.emit(LOAD, self.slot(node.value))
+            self.emit(PRINTSTRING, -1)
+        else:
+            self.expression(node.value)
+            self.emit(PRINTS[node.format])
+
+    def genOutput(self, node: Output) -> None:
+        self.emit(PRINTSTRING, self.const(node.text))
+
+    def genAssign(self, node: Assign) -> None:
+        self.expression(node.value)
+        self.emit(STORES[self.types[node.name]], self.slot(node.name))
+
+    def genDeclare(self, node: Declare) -> None:
+        self.declare(node.name, node.varType)
+        if node.value is None:
+            return
+        if node.varType == "str":
+            self.emit(CONST, self.const(node.value[1:-1]))
+        else:
+            self.expression(node.value)
+        self.emit(STORES[self.types[node.name]], self.slot(node.name))
+
+    def genArrayDeclare(self, node: ArrayDeclare) -> None:
+        self.declare(node.name, "int[]")
+        self.sizes.setdefault(node.name, int(node.size))
+        values = [int(value) for value in node.values]
+        self.emit(NEWARRAY, self.const(tuple(values + [0] * (int(node.size) - len(values)))))
+        self.emit(STORE, self.slot(node.name))
+
+    def genAssignIndex(self, node: AssignIndex) -> None:
+        self.expression(node.index)
+        self.expression(node.value)
+        self.emit(STOREINDEX, self.slot(node.name))
+
+    # A loop over the elements, after the scalar parts of the value are stored in hidden variables.
+    def genAssignArray(self, node: AssignArray) -> None:
+        prefix = "bro_array" + str(self.arrays) + "_"
+        self.arrays += 1
+        element, scalars = elementwise(node.value, prefix + "i", prefix)
+        for number, scalar in enumerate(scalars):
+            self.types[prefix + str(number)] = "int"
+            self.expression(scalar)
+            self.emit(STOREINT, self.slot(prefix + str(number)))
+        self.types[prefix + "i"] = "int"
+        counter = self.slot(prefix + "i")
+        self.emit(CONST, self.const(0))
+        self.emit(STOREINT, counter)
+        start = len(self.code)
+        self.emit(LOAD, counter)
+        self.emit(CONST, self.const(node.size))
+        self.emit(LT)
+        jump = self.emit(JUMPIFFALSE)
+        self.emit(LOAD, counter)
+        self.expression(element)
+        self.emit(STOREINDEX, self.slot(node.name))
+        self.emit(LOAD, counter)
+        self.emit(CONST, self.const(1))
+        self.emit(ADDINT)
+        self.emit(STOREINT, counter)
+        self.emit(JUMP, start)
+        self.code[jump + 1] = len(self.code)
+
+    def genInput(self, node: Input) -> None:
+        self.declare(node.name, node.varType)
+        self.emit(INPUT, self.slot(node.name))
+        self.emit(INPUT, INPUTTYPES.index(node.varType))
+
+    def genIf(self, node: If) -> None:
+        self.expression(node.condition)
+        jump = self.emit(JUMPIFFALSE)
+        self.block(node.body)
+        self.code[jump + 1] = len(self.code)
+
+    def genWhile(self, node: While) -> None:
+        start = len(self.code)
+        self.expression(node.condition)
+        jump = self.emit(JUMPIFFALSE)
+        self.block(node.body)
+        self.emit(JUMP, start)
+        self.code[jump + 1] = len(self.code)
+
+    # The loop variable is only declared for the body, so the name can take another type later.
+    def genFor(self, node: For) -> None:
+        end = self.slot("bro_for" + str(self.loops))
+        self.loops += 1
+        self.types[node.name] = "int"
+        counter = self.slot(node.name)
+        self.expression(node.end)
+        self.emit(STOREINT, end)
+        self.expression(node.start)
+        self.emit(STOREINT, counter)
+        start = len(self.code)
+        self.emit(LOAD, counter)
+        self.emit(LOAD, end)
+        self.emit(LT)
+        jump = self.emit(JUMPIFFALSE)
+        self.block(node.body)
+        self.emit(LOAD, counter)
+        self.emit(CONST, self.const(1))
+        self.emit(ADDINT)
+        self.emit(STOREINT, counter)
+        self.emit(JUMP, start)
+        self.code[jump + 1] = len(self.code)
+        del self.types[node.name]
+
+    # Expressions. Each returns the C type of its value: "int", "bool", "float" or "double".
+
+    def expression(self, node: Node) -> str:
+        kind = type(node)
+        if kind is Number:
+            if node.isFloat:
+                self.emit(CONST, self.const(float(node.text)))
+                return "double"
+            self.emit(CONST, self.const(wrapInt(int(node.text))))
+            return "int"
+        if kind is Variable:
+            self.emit(LOAD, self.slot(node.name))
+            return self.types[node.name]
+        if kind is Bool:
+            self.emit(CONST, self.const(int(node.value)))
+            return "bool"
+        if kind is Index:
+            self.expression(node.index)
+            self.emit(LOADINDEX, self.slot(node.name))
+            return "int"
+        if kind is Reduce:
+            self.emit(REDUCTIONS[node.op], self.slot(node.name))
+            return "int"
+        if kind is UnaryOp:
+            operandType = self.expression(node.operand)
+            resultType = "int" if operandType == "bool" else operandType
+            if node.op == "-":
+                self.emit(NEGINT if resultType == "int" else NEG)
+            return resultType
+
+        leftType = self.expression(node.left)
+        rightType = self.expression(node.right)
+        # Usual arithmetic conversions: int operands meeting a float are converted to float first.
+        if "double" in (leftType, rightType):
+            common = "double"
+        elif "float" in (leftType, rightType):
+            common = "float"
+            if leftType != "float":
+                self.emit(TOFLOAT, 1)
+            if rightType != "float":
+                self.emit(TOFLOAT, 0)
+        else:
+            common = "int"
+
+        if node.op in COMPARISONS:
+            self.emit(COMPARISONS[node.op])
+            return "int"
+        self.emit(ARITHMETIC[common][node.op])
+        return common
+
+
+class Bytecode:
+    def __init__(self, code: array, consts: list, slots: dict, types: dict, initial: list) -> None:
+        self.code = code
+        self.consts = consts
+        self.slots = slots
+        self.types = types
+        self.initial = initial  # value of every slot when the program starts; arrays as tuples
+
+
+# Runs Bytecode against an input and output stream. With a budget, run() raises BudgetExceeded
+# once the program has gone round its loops more than budget times.
+class VM:
+    def __init__(self, bytecode: Bytecode, stdin=None, stdout=None, budget: int = None) -> None:
+        self.bytecode = bytecode
+        self.budget = budget
+        self.input = InputReader(stdin if stdin is not None else sys.stdin)
+        self.stdout = stdout if stdout is not None else sys.stdout
+        self.variables = [list(value) if type(value) is tuple else value for value in bytecode.initial]
+        self.output = []
+
+    def flush(self) -> None:
+        if self.output:
+            self.stdout.write("".join(self.output))
+            self.output.clear()     # run() holds on to this list
+        self.stdout.flush()
+
+    def abort(self, message: str) -> None:
+        self.flush()
+        sys.exit("Runtime error. " + message)
+
+    def run(self) -> None:
+        code = self.bytecode.code
+        consts = self.bytecode.consts
+        variables = self.variables
+        output = self.output
+        write = output.append
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+        end = len(code)
+        budget = self.budget
+
+        while pc < end:
+            op = code[pc]
+            arg = code[pc + 1]
+            pc += 2
+
+            if op == LOAD:
+                push(variables[arg])
+            elif op == CONST:
+                push(consts[arg])
+            elif op == STOREINT:
+                variables[arg] = truncateInt(pop())
+            elif op == JUMPIFFALSE:
+                if not pop():
+                    pc = arg
+            elif op == JUMP:
+                pc = arg
+                if budget is not None:
+                    budget -= 1
+                    if budget < 0:
+                        raise BudgetExceeded()
+            elif op <= SUBINT and op >= ADDINT:
+                b = pop()
+                result = stack[-1] + b if op == ADDINT else stack[-1] - b
+                if not -2147483648 <= result <= 2147483647:
+                    result = wrapInt(result)
+                stack[-1] = result
+            elif op >= LT and op <= NOTEQ:
+                b = pop()
+                a = stack[-1]
+                if op == LT:
+                    stack[-1] = int(a < b)
+                elif op == GT:
+                    stack[-1] = int(a > b)
+                elif op == LTEQ:
+                    stack[-1] = int(a <= b)
+                elif op == GTEQ:
+                    stack[-1] = int(a >= b)
+                elif op == EQEQ:
+                    stack[-1] = int(a == b)
+                else:
+                    stack[-1] = int(a != b)
+            elif op == PRINTINT:
+                write(str(truncateInt(pop())) + "\n")
+                if len(output) > 4096:
+                    self.flush()
+            elif op == MULINT:
+                b = pop()
+                stack[-1] = wrapInt(stack[-1] * b)
+            elif op == DIVINT:
+                b = pop()
+                a = stack[-1]
+                if b == 0:
+                    self.abort("Division by zero.")
+                quotient = abs(a) // abs(b)
+                stack[-1] = wrapInt(quotient if (a < 0) == (b < 0) else -quotient)
+            elif op >= ADDFLOAT and op <= DIVDOUBLE:
+                b = float(pop())
+                a = float(stack[-1])
+                kind = (op - ADDFLOAT) % 4
+                if kind == 0:
+                    result = a + b
+                elif kind == 1:
+                    result = a - b
+                elif kind == 2:
+                    result = a * b
+                else:
+                    result = divideFloat(a, b)
+                if result != result:
+                    result = invalidNan(result, a, b)
+                stack[-1] = toFloat32(result) if op <= DIVFLOAT else result
+            elif op == STOREFLOAT:
+                variables[arg] = toFloat32(pop())
+            elif op == STOREBOOL:
+                variables[arg] = int(pop() != 0)
+            elif op == STORE:
+                variables[arg] = pop()
+            elif op == TOFLOAT:
+                stack[-1 - arg] = toFloat32(stack[-1 - arg])
+            elif op == NEGINT:
+                stack[-1] = wrapInt(-stack[-1])
+            elif op == NEG:
+                stack[-1] = -stack[-1]
+            elif op == PRINTFLOAT:
+                write(formatFloat(toFloat32(pop())) + "\n")
+                if len(output) > 4096:
+                    self.flush()
+            elif op == PRINTBOOL:
+                write(("1" if pop() != 0 else "0") + "\n")
+            elif op == PRINTSTRING:
+                write(consts[arg] if arg >= 0 else str(pop()) + "\n")
+                if len(output) > 4096:
+                    self.flush()
+            elif op == LOADINDEX:
+                array = variables[arg]
+                index = stack[-1]
+                if not 0 <= index < len(array):
+                    self.abort("Index out of range.")
+                stack[-1] = array[index]
+            elif op == STOREINDEX:
+                value = pop()
+                index = pop()
+                array = variables[arg]
+                if not 0 <= index < len(array):
+                    self.abort("Index out of range.")
+                array[index] = truncateInt(value)
+            elif op == NEWARRAY:
+                push(list(consts[arg]))
+            elif op == SUMARRAY:
+                push(wrapInt(sum(variables[arg])))
+            elif op == MINARRAY:
+                push(min(variables[arg]))
+            elif op == MAXARRAY:
+                push(max(variables[arg]))
+            elif op == INPUT:
+                inputType = code[pc + 1]
+                pc += 2
+                self.readInput(arg, INPUTTYPES[inputType])
+            else:
+                self.abort("Bad opcode " + str(op))
+
+        self.flush()
+
+    # SKIBIDI: on a failed conversion the variable becomes 0 and the bad word is skipped;
+    # at end of input the variable is left alone.
+    def readInput(self, slot: int, varType: str) -> None:
+        self.flush()    # Prompts must be visible before we wait for input.
+        if varType == "float":
+            value = self.input.readFloat()
+        elif varType == "str":
+            value = self.input.readWord()
+        else:
+            value = self.input.readInt()
+            if varType == "bool" and value is not None and value is not False:
+                value = value & 0xFF    # scanf("%d") into a bool only keeps the low byte
+        if value is None:
+            return
+        if value is False:
+            self.variables[slot] = 0.0 if varType == "float" else 0
+            self.input.skipWord()
+            return
+        self.variables[slot] = value
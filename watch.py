@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+from compiler import *
+from batch import *
+
+# Watch mode: poll the .pog files for changes and recompile each one when it changes. Every file
+# keeps an IncrementalParser, so a recompile only lexes and parses the top-level statements whose
+# text changed; code generation still runs over the whole program. The inputs are expanded again
+# on every poll, so files added to a watched directory are picked up. Compile errors are printed
+# and watching carries on; Ctrl-C stops it.
+class Watcher:
+    def __init__(self, inputs: list, outDir: str, options: CompileOptions, interval: float) -> None:
+        self.inputs = inputs
+        self.outDir = outDir
+        self.options = options
+        self.interval = interval
+        self.seen = {}          # path -> (mtime, size) when it was last compiled
+        self.parsers = {}       # path -> IncrementalParser
+
+    # Paths whose modification time or size differ from when they were last compiled. Files that
+    # went away are forgotten, so they compile from scratch if they come back.
+    def changed(self) -> list:
+        paths = []
+        present = set()
+        for path in findSources(self.inputs):
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            present.add(path)
+            stamp = (info.st_mtime_ns, info.st_size)
+            if self.seen.get(path) != stamp:
+                self.seen[path] = stamp
+                paths.append(path)
+        for path in list(self.seen):
+            if path not in present:
+                del self.seen[path]
+                self.parsers.pop(path, None)
+        return paths
+
+    def compile(self, path: str) -> None:
+        parser = self.parsers.setdefault(path, IncrementalParser())
+        result = compileFile(path, self.outDir, self.options, incremental=parser)
+        if result.error is not None:
+            print("Error in %s: %s" % (path, result.error), flush=True)
+            return
+        if parser.whole:
+            parsed = "parsed in full"
+        else:
+            parsed = "reused %d, parsed %d statements" % (parser.reused, parser.parsed)
+        print("Compiled %s to %s in %.3fs (%s)." % (path, result.outPath, result.seconds, parsed), flush=True)
+
+    def run(self) -> None:
+        print("Watching %s; Ctrl-C stops." % ", ".join(self.inputs), flush=True)
+        try:
+            while True:
+                for path in self.changed():
+                    self.compile(path)
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("Stopped watching.")